@@ -10,6 +10,13 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # BACKEND_URL API Configuration
 BACKEND_URL  = os.getenv("BACKEND_URL")
 
+# Shared rate limit and cache state, in-memory per process when unset
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Requests a client address may make per RATE_LIMIT_WINDOW seconds, across all workers
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "20"))
+RATE_LIMIT_WINDOW = float(os.getenv("RATE_LIMIT_WINDOW", "1"))
+
 # ChromaDB Configuration
 CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_data")
 
@@ -0,0 +1,311 @@
+import logging
+import gzip
+import time
+import zlib
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.state import MemoryStateBackend, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only gzip is offered without it
+    brotli = None
+
+# FastAPI docs and OpenAPI schema paths are never checked or limited
+DEFAULT_EXCLUDE_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class SecurityCustomHeaderCheckMiddleware:
+    """
+    Pure ASGI middleware that rejects requests without a valid "Secret-token" header.
+
+    Unlike ``BaseHTTPMiddleware`` it does not wrap the downstream app in an extra task
+    and memory stream, so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, secret_token: str, exclude_paths: Optional[Iterable[str]] = None):
+        self.app = app
+        self.secret_token = secret_token
+        self.exclude_paths = frozenset(exclude_paths or DEFAULT_EXCLUDE_PATHS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if Headers(scope=scope).get("Secret-token") == self.secret_token:
+            await self.app(scope, receive, send)
+            return
+
+        response = PlainTextResponse("Invalid or missing security token", status_code=401)
+        await response(scope, receive, send)
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI rate limiting middleware.
+
+    :param app: ASGI application.
+    :param limiter: Shared ``RateLimiter``; when omitted, a per-process limiter allowing
+        one request per `rate_limit` seconds is used.
+    :param rate_limit: Time interval in seconds for rate limiting (default: 1 second).
+    :param exclude_paths: List of paths to exclude from rate limiting.
+    """
+
+    # expired limiter leases are pruned once every this many requests
+    PRUNE_INTERVAL = 1024
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: Optional[RateLimiter] = None,
+        rate_limit: float = 1.0,
+        exclude_paths: Optional[Iterable[str]] = None,
+    ):
+        self.app = app
+        self.limiter = limiter or RateLimiter(MemoryStateBackend(), limit=1, window=rate_limit)
+        self.exclude_paths = frozenset(exclude_paths or DEFAULT_EXCLUDE_PATHS)
+        self._requests = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        self._requests += 1
+        if self._requests % self.PRUNE_INTERVAL == 0:
+            self.limiter.prune()
+
+        client_ip = _client_ip(scope)
+        if not await self.limiter.allow(f"ratelimit:{client_ip}"):
+            logger.warning(f"Rate limit exceeded for {client_ip} at {scope['path']}")
+            response = PlainTextResponse("Rate limit exceeded", status_code=429)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class ProcessTimeMiddleware:
+    """
+    Adds an "X-Process-Time" header measured from request start until the response headers are sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                process_time = time.perf_counter() - start_time
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{process_time:.4f} seconds")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class RequestLoggingMiddleware:
+    """
+    Logs every request once the last body chunk has been sent, with its status code and duration.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: Optional[Iterable[str]] = None):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths or DEFAULT_EXCLUDE_PATHS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                process_time = time.perf_counter() - start_time
+                logger.info(
+                    f"{scope['method']} {scope['path']} from {_client_ip(scope)} "
+                    f"-> {status_code} in {process_time:.4f} seconds"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# media types worth compressing; everything else (PDFs, images, ...) is sent as is
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header, preferring brotli on equal q-values.
+    """
+    offered = {"br": 0.0, "gzip": 0.0} if brotli is not None else {"gzip": 0.0}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        if coding == "*":
+            for name in offered:
+                offered[name] = max(offered[name], q)
+        elif coding in offered:
+            offered[coding] = q
+    best = max(offered, key=lambda name: offered[name])
+    return best if offered[best] > 0 else None
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of the `encoding`-compressed representation; a strong ETag must differ per content coding.
+    """
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI gzip/brotli response compression.
+
+    Responses below `minimum_size` bytes, of a non-text type or already encoded are sent
+    unchanged. Responses with an ETag and a public Cache-Control (the catalog endpoints)
+    always have the same bytes for the same ETag, so their compressed form is kept in an
+    LRU keyed by (ETag, encoding) and repeated hits skip the compressor.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache_size: int = 256,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _cached_compress(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        if etag is None:
+            return self.compress(body, encoding)
+        key = (etag, encoding)
+        compressed = self._cache.get(key)
+        if compressed is not None:
+            self._cache.move_to_end(key)
+            return compressed
+        compressed = self.compress(body, encoding)
+        self._cache[key] = compressed
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return compressed
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+        streamer = None
+
+        async def send_start(message: Message, body_encoded: bool):
+            headers = MutableHeaders(scope=message)
+            if body_encoded:
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            await send(message)
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough, streamer
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if streamer is None and start_message is not None and not more_body:
+                # the complete body arrived in one message
+                headers = MutableHeaders(scope=start_message)
+                if len(body) < self.minimum_size:
+                    await send_start(start_message, body_encoded=False)
+                    await send(message)
+                    return
+                etag = headers.get("etag") if "public" in headers.get("cache-control", "") else None
+                body = self._cached_compress(body, encoding, etag)
+                headers["Content-Length"] = str(len(body))
+                await send_start(start_message, body_encoded=True)
+                await send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+
+            if streamer is None:
+                # streamed body: compress chunk by chunk, the total size is unknown up front
+                if encoding == "br":
+                    streamer = brotli.Compressor(quality=self.brotli_quality)
+                else:
+                    streamer = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                headers = MutableHeaders(scope=start_message)
+                if "content-length" in headers:
+                    del headers["content-length"]
+                await send_start(start_message, body_encoded=True)
+
+            if encoding == "br":
+                body = streamer.process(body) + (b"" if more_body else streamer.finish())
+            else:
+                body = streamer.compress(body) + (b"" if more_body else streamer.flush())
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,305 @@
+"""
+Shared state used by the rate limiter and response caches.
+
+Every uvicorn worker and replica talks to the same Redis instance (``REDIS_URL``) so
+limits and cache entries hold cluster-wide. All read-modify-write operations run as
+Lua scripts, which Redis executes atomically. When Redis is not configured or not
+reachable, an in-process ``MemoryStateBackend`` with identical semantics is used
+instead; it is also the stand-in to use in tests.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+try:
+    import redis.asyncio as redis_asyncio
+    from redis.exceptions import RedisError
+except ImportError:  # redis is optional, the in-memory backend is used without it
+    redis_asyncio = None
+    RedisError = Exception
+
+# seconds to wait on Redis before a call falls back to the in-memory state
+REDIS_TIMEOUT = 0.25
+# seconds between repeated warnings while Redis stays unavailable
+REDIS_WARN_INTERVAL = 60.0
+
+logger = logging.getLogger(__name__)
+
+# take up to ARGV[3] tokens from the fixed window counter KEYS[1]
+# (limit ARGV[1], window length ARGV[2] ms); returns {granted, window ms left}
+RATE_LIMIT_SCRIPT = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+local available = tonumber(ARGV[1]) - used
+if available <= 0 then
+    return {0, redis.call('PTTL', KEYS[1])}
+end
+local granted = math.min(available, tonumber(ARGV[3]))
+if redis.call('INCRBY', KEYS[1], granted) == granted then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return {granted, redis.call('PTTL', KEYS[1])}
+"""
+
+# store ARGV[2] under KEYS[1] with version ARGV[1] and ttl ARGV[3] ms,
+# unless a newer version is already cached; returns 1 when stored
+CACHE_SET_SCRIPT = """
+local current = tonumber(redis.call('HGET', KEYS[1], 'v') or '-1')
+if tonumber(ARGV[1]) < current then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'v', ARGV[1], 'd', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class MemoryStateBackend:
+    """
+    In-process implementation of the shared state operations.
+    """
+
+    def __init__(self):
+        self._windows: Dict[str, Tuple[int, float]] = {}
+        self._cache: Dict[str, Tuple[int, bytes, float]] = {}
+        self._counters: Dict[str, int] = {}
+        # counters restart at 0 with the process, so values are only comparable within this id
+        self.local_id: Optional[str] = uuid.uuid4().hex
+
+    async def acquire_tokens(self, key: str, limit: int, window: float, requested: int) -> Tuple[int, float]:
+        now = time.monotonic()
+        used, expires_at = self._windows.get(key, (0, now + window))
+        if expires_at <= now:
+            used, expires_at = 0, now + window
+        granted = max(0, min(limit - used, requested))
+        self._windows[key] = (used + granted, expires_at)
+        return granted, expires_at - now
+
+    async def cache_get(self, key: str) -> Optional[Tuple[int, bytes]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        version, data, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._cache[key]
+            return None
+        return version, data
+
+    async def cache_set(self, key: str, data: bytes, ttl: float, version: int = 0) -> bool:
+        current = await self.cache_get(key)
+        if current is not None and version < current[0]:
+            return False
+        self._cache[key] = (version, data, time.monotonic() + ttl)
+        return True
+
+    async def cache_delete(self, key: str):
+        self._cache.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+
+class RedisStateBackend:
+    """
+    Redis implementation of the shared state operations.
+
+    Any Redis error is logged and the call is answered by a local ``MemoryStateBackend``,
+    so an unavailable Redis degrades limits and caches to per-process instead of failing requests.
+    """
+
+    def __init__(self, url: str, prefix: str = "govconn:", timeout: float = REDIS_TIMEOUT):
+        # a Redis that stops answering must time out into the fallback, not hang the request
+        self.client = redis_asyncio.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.prefix = prefix
+        self.fallback = MemoryStateBackend()
+        self._rate_limit_script = self.client.register_script(RATE_LIMIT_SCRIPT)
+        self._cache_set_script = self.client.register_script(CACHE_SET_SCRIPT)
+        # monotonic time of the last failure warning; None while Redis is healthy
+        self._failing_since: Optional[float] = None
+        # new for every outage while the fallback answers; None while state is shared
+        self.local_id: Optional[str] = None
+        # counter increments the fallback took, replayed to Redis once it is reachable
+        self._missed_increments: Dict[str, int] = {}
+
+    def _warn(self, operation: str, error: Exception):
+        """
+        Log the first failure of an outage, then at most one reminder per
+        REDIS_WARN_INTERVAL seconds until a call succeeds again.
+        """
+        if self.local_id is None:
+            self.local_id = uuid.uuid4().hex
+        now = time.monotonic()
+        if self._failing_since is None or now - self._failing_since >= REDIS_WARN_INTERVAL:
+            logger.warning(f"Redis {operation} failed, using in-memory state: {error}")
+            self._failing_since = now
+
+    def _recovered(self):
+        self.local_id = None
+        if self._failing_since is not None:
+            logger.info("Redis is reachable again, using shared state")
+            self._failing_since = None
+
+    async def acquire_tokens(self, key: str, limit: int, window: float, requested: int) -> Tuple[int, float]:
+        try:
+            granted, ttl_ms = await self._rate_limit_script(
+                keys=[self.prefix + key], args=[limit, int(window * 1000), requested]
+            )
+            self._recovered()
+            return int(granted), max(int(ttl_ms), 0) / 1000
+        except RedisError as e:
+            self._warn("acquire_tokens", e)
+            return await self.fallback.acquire_tokens(key, limit, window, requested)
+
+    async def cache_get(self, key: str) -> Optional[Tuple[int, bytes]]:
+        try:
+            version, data = await self.client.hmget(self.prefix + key, "v", "d")
+            self._recovered()
+            if version is None:
+                return None
+            return int(version), data
+        except RedisError as e:
+            self._warn("cache_get", e)
+            return await self.fallback.cache_get(key)
+
+    async def cache_set(self, key: str, data: bytes, ttl: float, version: int = 0) -> bool:
+        try:
+            stored = await self._cache_set_script(
+                keys=[self.prefix + key], args=[version, data, max(int(ttl * 1000), 1)]
+            )
+            self._recovered()
+            return bool(stored)
+        except RedisError as e:
+            self._warn("cache_set", e)
+            return await self.fallback.cache_set(key, data, ttl, version)
+
+    async def cache_delete(self, key: str):
+        try:
+            await self.client.delete(self.prefix + key)
+            self._recovered()
+        except RedisError as e:
+            self._warn("cache_delete", e)
+            await self.fallback.cache_delete(key)
+
+    def _replayed(self, key: str, missed: int):
+        left = self._missed_increments.pop(key, 0) - missed
+        if left > 0:
+            self._missed_increments[key] = left
+
+    async def incr(self, key: str) -> int:
+        try:
+            missed = self._missed_increments.get(key, 0)
+            count = int(await self.client.incrby(self.prefix + key, 1 + missed))
+            self._replayed(key, missed)
+            self._recovered()
+            return count
+        except RedisError as e:
+            self._warn("incr", e)
+            self._missed_increments[key] = self._missed_increments.get(key, 0) + 1
+            return await self.fallback.incr(key)
+
+    async def get_counter(self, key: str) -> int:
+        try:
+            missed = self._missed_increments.get(key, 0)
+            if missed:
+                count = int(await self.client.incrby(self.prefix + key, missed))
+                self._replayed(key, missed)
+            else:
+                count = int(await self.client.get(self.prefix + key) or 0)
+            self._recovered()
+            return count
+        except RedisError as e:
+            self._warn("get_counter", e)
+            return await self.fallback.get_counter(key)
+
+
+def create_state_backend(url: Optional[str]):
+    """
+    Return a Redis backend for `url`, or the in-memory backend when no url is
+    configured or the redis package is not installed.
+    """
+    if url and redis_asyncio is not None:
+        return RedisStateBackend(url)
+    if url:
+        logger.warning("REDIS_URL is set but the redis package is not installed, using in-memory state")
+    return MemoryStateBackend()
+
+
+# lease marker of a key whose shared window has no tokens left
+REJECTED = -1
+
+
+class RateLimiter:
+    """
+    Fixed-window rate limiter over a shared state backend.
+
+    Instead of one round trip per request, each process leases a batch of up to
+    `lease_size` tokens from the shared window and spends them locally. Unused leased
+    tokens simply expire with the window, so the cluster-wide limit is never exceeded;
+    a process may only reject slightly early while another process still holds tokens.
+    """
+
+    def __init__(self, backend, limit: int, window: float = 1.0, lease_size: int = 1):
+        self.backend = backend
+        self.limit = limit
+        self.window = window
+        self.lease_size = max(1, min(lease_size, limit))
+        # key -> (tokens left, lease expiry); REJECTED tokens until the window resets
+        self._leases: Dict[str, Tuple[int, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        tokens, expires_at = self._leases.get(key, (0, now))
+        if expires_at > now:
+            # a key the shared window rejected stays rejected locally until it resets
+            if tokens == REJECTED:
+                return False
+            if tokens > 0:
+                self._leases[key] = (tokens - 1, expires_at)
+                return True
+
+        # only one coroutine per key refills the lease; the others reuse its result
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            tokens, expires_at = self._leases.get(key, (0, now))
+            if expires_at <= now or tokens == 0:
+                granted, ttl = await self.backend.acquire_tokens(key, self.limit, self.window, self.lease_size)
+                # an expired window reports no ttl, keep the rejection cached for one window at most
+                tokens, expires_at = granted, now + (ttl if ttl > 0 else self.window)
+            if tokens <= 0:
+                self._leases[key] = (REJECTED, min(expires_at, now + self.window))
+                return False
+            self._leases[key] = (tokens - 1, expires_at)
+            return True
+
+    def prune(self):
+        """
+        Drop expired leases so the table does not grow with every client seen.
+        """
+        now = time.monotonic()
+        for key in [k for k, (_, expires_at) in self._leases.items() if expires_at <= now]:
+            del self._leases[key]
+            lock = self._locks.get(key)
+            if lock is not None and not lock.locked():
+                del self._locks[key]
+
+
+
+_state_backend = None
+
+
+def get_state_backend():
+    """
+    Return the process-wide state backend, created from ``REDIS_URL`` on first use.
+    """
+    global _state_backend
+    if _state_backend is None:
+        from app.core.config import REDIS_URL
+        _state_backend = create_state_backend(REDIS_URL)
+    return _state_backend
@@ -1,5 +1,6 @@
 #!/bin/sh
 export CHROMA_TELEMETRY_ENABLED=false
 
-# Start FastAPI server
-uvicorn app.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+# Start FastAPI server; the client address comes from the ingress' X-Forwarded-For,
+# so rate limits apply per client rather than to the ingress
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --proxy-headers --forwarded-allow-ips "*"
\ No newline at end of file
@@ -123,7 +123,7 @@ export interface DocumentType {
 // Analytics
 export interface MostReservedSlotItem {
   booking_date: string;
-  max_reserved: number;
+  max_reserved: number; // reservations of all slots starting in that hour
   start_time: string;
 }
 
@@ -1,35 +1,102 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+from typing import List, Literal, Optional
+from datetime import date, timedelta
+from app.db.session import get_read_db
 from app.crud.analytics_crud import (
     fetch_most_reserved_slots, fetch_appointment_percentage_change,
-    fetch_today_appointment_count, fetch_overall_satisfaction
+    fetch_today_appointment_count, fetch_overall_satisfaction, fetch_office_dashboard,
+    fetch_time_series, fetch_capacity_recommendations, fetch_office_attendance
 )
 from app.schemas.analytics_schema import (
     MostReservedSlotSchema, AppointmentPercentageChangeSchema,
-    TodayAppointmentCountSchema, OverallSatisfactionSchema
+    TodayAppointmentCountSchema, OverallSatisfactionSchema, OfficeDashboardSchema,
+    TimeSeriesSchema, CapacityRecommendationSchema, OfficeAttendanceSchema
 )
+from app.utils.responses import FastJSONResponse
+from app.utils.timeseries import bucket_count
 
 router = APIRouter(
     prefix="/api/v1/analytics",
     tags=["Analytics"]
 )
 
+MAX_TIME_SERIES_BUCKETS = 2000
+MAX_ATTENDANCE_DAYS = 366
+
 @router.get("/appointments/most_reserved_slot/{service_id}", response_model=List[MostReservedSlotSchema])
-async def get_most_reserved_slot(service_id : int, db: Session = Depends(get_db)):
+async def get_most_reserved_slot(service_id : int, db: Session = Depends(get_read_db)):
     return fetch_most_reserved_slots(service_id, db)
 
 @router.get("/appointments/percentage_change/{service_id}", response_model=AppointmentPercentageChangeSchema)
-async def get_appointment_percentage_change(service_id: int, db: Session = Depends(get_db)):
+async def get_appointment_percentage_change(service_id: int, db: Session = Depends(get_read_db)):
     percentage_change = fetch_appointment_percentage_change(service_id, db)
     return {"percentage_change": percentage_change}
 
 @router.get("/appointments/today_count/{service_id}", response_model=TodayAppointmentCountSchema)
-async def get_today_appointment_count(service_id: int, db: Session = Depends(get_db)):
+async def get_today_appointment_count(service_id: int, db: Session = Depends(get_read_db)):
     today_count = fetch_today_appointment_count(service_id, db)
     return {"today_count": today_count}
 
 @router.get("/services/overall_satisfaction/", response_model=List[OverallSatisfactionSchema])
-async def get_overall_satisfaction(db: Session = Depends(get_db)):
+async def get_overall_satisfaction(db: Session = Depends(get_read_db)):
     return fetch_overall_satisfaction(db)
+
+# every widget of the office dashboard in one request
+@router.get("/offices/{office_id}/dashboard", response_model=OfficeDashboardSchema)
+async def get_office_dashboard(office_id: int, db: Session = Depends(get_read_db)):
+    """
+    Get the most reserved slots, today's count, the change from yesterday and the rating of each of the office's services.
+    """
+    return Response(await fetch_office_dashboard(office_id, db), media_type="application/json")
+
+@router.get("/timeseries", response_model=TimeSeriesSchema, response_class=FastJSONResponse)
+async def get_time_series(
+    metric: Literal["bookings", "utilisation", "ratings"],
+    bucket: Literal["hour", "day", "week", "month"] = "day",
+    service_id: Optional[int] = None,
+    office_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    window: Optional[int] = Query(None, ge=2, le=365),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get a metric of a service or an office per hour, day, week or month, with empty buckets
+    filled in and optionally a rolling average. The range defaults to the last 30 days.
+    """
+    if (service_id is None) == (office_id is None):
+        raise HTTPException(status_code=400, detail="Give exactly one of service_id and office_id")
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if bucket_count(bucket, start, end) > MAX_TIME_SERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"The range holds more than {MAX_TIME_SERIES_BUCKETS} {bucket} buckets")
+    return FastJSONResponse(fetch_time_series(metric, bucket, start, end, db, service_id, office_id, window))
+
+@router.get("/services/{service_id}/capacity_recommendations", response_model=List[CapacityRecommendationSchema], response_class=FastJSONResponse)
+async def get_capacity_recommendations(service_id: int, db: Session = Depends(get_read_db)):
+    """
+    Get the forecast demand and recommended slot capacity of a service for each weekday and hour it has had slots.
+    """
+    recommendations = fetch_capacity_recommendations(service_id, db)
+    if not recommendations:
+        raise HTTPException(status_code=404, detail="No capacity recommendations for this service")
+    return FastJSONResponse(recommendations)
+
+@router.get("/offices/{office_id}/attendance", response_model=OfficeAttendanceSchema, response_class=FastJSONResponse)
+async def get_office_attendance(
+    office_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get the utilisation, no-show rate and peak-hour heatmap of an office. The range defaults to the last 30 days.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if end < start or (end - start).days >= MAX_ATTENDANCE_DAYS:
+        raise HTTPException(status_code=400, detail=f"end must be within {MAX_ATTENDANCE_DAYS} days after start")
+    return FastJSONResponse(fetch_office_attendance(office_id, start, end, db))
@@ -1,30 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+from typing import FrozenSet, List, Optional
+from app.db.session import get_db, get_read_db
 from app.models.citizen_model import Citizen
-from app.schemas.reservation_schema import ReservationSlotSchema, ReservationSlotSchemaCreate, ReservedUser, ReservedUserCreate, ReservationSlotUpdate
+from app.schemas.reservation_schema import AvailableSlot, ReservationSlotSchema, ReservationSlotSchemaCreate, ReservedUser, ReservedUserCreate, ReservationSlotUpdate, SlotBatchRequest, ReservedUserBatchRequest, AttendanceUpdate
 from app.utils.auth import get_current_citizen, get_current_government_office
 from app.crud import appointment_crud
+from app.utils.responses import FastJSONResponse, sparse_fields
+from app.utils.pagination import PageParams, page_params, page_headers
 
 router = APIRouter(
     prefix="/api/v1/appointments", 
     tags=["Appointments"]
 )
 
-@router.get("/available_slots/{reservation_id}/{reservation_date}", response_model=List[ReservationSlotSchema])
-async def get_available_slots_by_date(reservation_id: int, reservation_date: str, db: Session = Depends(get_db)):
-    return await appointment_crud.get_available_slots_by_date(reservation_id, reservation_date, db)
-
-@router.get("/available_slots/{reservation_id}", response_model=List[ReservationSlotSchema])
-async def get_available_slots(reservation_id: int, db: Session = Depends(get_db)):
-    return await appointment_crud.get_available_slots(reservation_id, db)
+# longest date window the earliest slot search accepts
+MAX_SEARCH_DAYS = 92
+
+@router.get("/available_slots/{reservation_id}/{reservation_date}", response_model=List[ReservationSlotSchema], response_class=FastJSONResponse)
+async def get_available_slots_by_date(reservation_id: int, reservation_date: str, fields: Optional[FrozenSet[str]] = Depends(sparse_fields(ReservationSlotSchema)), db: Session = Depends(get_read_db)):
+    return FastJSONResponse(await appointment_crud.get_available_slots_by_date(reservation_id, reservation_date, db, fields))
+
+@router.get("/available_slots/{reservation_id}", response_model=List[ReservationSlotSchema], response_class=FastJSONResponse)
+async def get_available_slots(reservation_id: int, fields: Optional[FrozenSet[str]] = Depends(sparse_fields(ReservationSlotSchema)), db: Session = Depends(get_read_db)):
+    return FastJSONResponse(await appointment_crud.get_available_slots(reservation_id, db, fields))
+
+@router.get("/earliest_slots", response_model=List[AvailableSlot], response_class=FastJSONResponse)
+async def get_earliest_slots(
+    service_type: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    max_km: Optional[float] = Query(None, gt=0),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the soonest free slots of a service type across all offices, optionally only at
+    offices within max_km of a point. The window defaults to the next two weeks.
+    """
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=14)
+    if date_to < date_from or (date_to - date_from).days > MAX_SEARCH_DAYS:
+        raise HTTPException(status_code=400, detail=f"date_to must be within {MAX_SEARCH_DAYS} days after date_from")
+    if (latitude is None) != (longitude is None) or (max_km is not None and latitude is None):
+        raise HTTPException(status_code=400, detail="latitude and longitude must be given together, and max_km needs both")
+    slots = await appointment_crud.get_earliest_slots_for_service_type(
+        service_type, date_from, date_to, db, latitude, longitude, max_km, limit
+    )
+    if not slots:
+        raise HTTPException(status_code=404, detail="No free slots found")
+    return FastJSONResponse(slots)
 
 @router.post("/create_slot", response_model=List[ReservationSlotSchema])
 async def create_slot(slot_data: ReservationSlotSchemaCreate, db: Session = Depends(get_db)):
     return await appointment_crud.create_slot(slot_data, db)
 
 
+@router.post("/slots/batch", response_model=List[ReservationSlotSchema], response_class=FastJSONResponse)
+async def get_slots_batch(request: SlotBatchRequest, db: Session = Depends(get_db)):
+    """
+    Get several slots in one query; unknown slot ids are left out.
+    """
+    return FastJSONResponse(await appointment_crud.get_slots_by_ids(request.slot_ids, db))
+
 @router.get("/slot/{slot_id}", response_model=ReservationSlotSchema)
 async def get_slot(slot_id: int, db: Session = Depends(get_db)):
     return await appointment_crud.get_slot(slot_id, db)
@@ -42,25 +83,44 @@ async def delete_slot(slot_id: int, db: Session = Depends(get_db)):
     return await appointment_crud.delete_slot(slot_id, db)
 
 
-@router.get("/reserved_user/{reference_id}", response_model=ReservedUser)
+@router.get("/reserved_user/{reference_id}", response_model=ReservedUser, dependencies=[Depends(get_current_government_office)])
 async def get_reserved_user(reference_id: int, db: Session = Depends(get_db)):
     return await appointment_crud.get_reserved_user(reference_id, db)
 
+@router.post("/reserved_users/batch", response_model=List[ReservedUser], dependencies=[Depends(get_current_government_office)])
+async def get_reserved_users_batch(request: ReservedUserBatchRequest, db: Session = Depends(get_db)):
+    """
+    Get several reservations, with their citizens, by reference id, for government
+    offices; unknown ids are left out.
+    """
+    return await appointment_crud.get_reserved_users_by_ids(request.reference_ids, db)
+
 @router.post("/reserved_user", response_model=ReservedUser)
 async def add_reserved_user(user_data: ReservedUserCreate, db: Session = Depends(get_db)):
     return await appointment_crud.add_reserved_user(user_data, db)
 
+@router.patch("/reserved_user/{reference_id}/attendance", response_model=ReservedUser)
+async def set_attendance(reference_id: int, update: AttendanceUpdate, db: Session = Depends(get_db)):
+    """
+    Check a citizen in for their reservation, or mark it as a no-show.
+    """
+    return await appointment_crud.set_attendance(reference_id, update.attendance, db)
+
 @router.delete("/reserved_user/{reference_id}")
 async def delete_reserved_user(reference_id: int, db: Session = Depends(get_db)):
     return await appointment_crud.delete_reserved_user(reference_id, db)
 
-@router.get("/reserved_user/get_slots/{nic}", response_model=List[ReservationSlotSchema])
-async def get_reserved_slot_details(nic: str, db: Session = Depends(get_db)):
-    return await appointment_crud.get_reserved_slot_details(nic, db)
+@router.get("/reserved_user/get_slots/{nic}", response_model=List[ReservationSlotSchema], response_class=FastJSONResponse)
+async def get_reserved_slot_details(nic: str, fields: Optional[FrozenSet[str]] = Depends(sparse_fields(ReservationSlotSchema)), db: Session = Depends(get_db)):
+    return FastJSONResponse(await appointment_crud.get_reserved_slot_details(nic, db, fields))
 
 @router.get("/reserved_user/get_users/{slot_id}", response_model=List[ReservedUser])
-async def get_reserved_users(slot_id: int, db: Session = Depends(get_db)):
-    return await appointment_crud.get_reserved_users(slot_id, db)
+async def get_reserved_users(slot_id: int, response: Response, fields: Optional[FrozenSet[str]] = Depends(sparse_fields(ReservedUser)), page: PageParams = Depends(page_params), db: Session = Depends(get_read_db)):
+    users, next_cursor = await appointment_crud.get_reserved_users(slot_id, db, fields, page)
+    if fields:
+        return FastJSONResponse(users, headers=page_headers(next_cursor))
+    response.headers.update(page_headers(next_cursor))
+    return users
 
 @router.delete("/slot/delete/{slot_id}")
 async def delete_slot(slot_id: int, db: Session = Depends(get_db)):
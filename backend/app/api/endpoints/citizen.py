@@ -1,10 +1,14 @@
-from typing import List
+from typing import FrozenSet, List, Optional, Union
 from app.db.session import get_db
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from app.crud import citizen_crud
-from app.schemas import citizen_schema, registration_schema, response_schema
+from app.crud import citizen_crud, gov_node_services_crud
+from app.schemas import citizen_schema, registration_schema, response_schema, gov_node_services_schema
+from app.utils.i18n import get_language, language_headers
+from app.utils.responses import FastJSONResponse, sparse_fields
+from app.utils.pagination import PageParams, page_params, page_headers
+from app.utils.auth import get_current_citizen, get_current_government_office
 from app.utils.token import TokenWithUser, TokenWithCitizen
 from app.utils.token import create_access_token
 from datetime import timedelta
@@ -60,7 +64,7 @@ async def reset_password(
         raise HTTPException(status_code=400, detail="Citizen update failed")
     return db_citizen
 
-@router.put("/update/document_links", response_model=citizen_schema.CitizenResponse)
+@router.put("/update/document_links", response_model=citizen_schema.CitizenResponse, deprecated=True)
 async def update_citizen_document_links(
     citizen: citizen_schema.CitizenUpdateDocumentLinks,
     db: Session = Depends(get_db)
@@ -70,6 +74,92 @@ async def update_citizen_document_links(
         raise HTTPException(status_code=400, detail="Citizen document links update failed")
     return db_citizen
 
+@router.post("/batch", response_model=List[citizen_schema.CitizenResponse], dependencies=[Depends(get_current_government_office)])
+async def get_citizens_batch(
+    request: citizen_schema.CitizenBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Get several citizens in one query, for government offices; unknown NICs are left out.
+    """
+    return await citizen_crud.get_citizens_by_nics(request.nics, db)
+
+def _own_documents(nic: str, citizen: citizen_schema.CitizenResponse):
+    if citizen.nic != nic:
+        raise HTTPException(status_code=403, detail="Not allowed to access another citizen's documents")
+
+@router.post("/{nic}/readiness", response_model=List[citizen_schema.ServiceReadiness], response_class=FastJSONResponse)
+async def get_service_readiness(
+    nic: str,
+    request: citizen_schema.ReadinessRequest,
+    current_citizen: citizen_schema.CitizenResponse = Depends(get_current_citizen),
+    db: Session = Depends(get_db)
+):
+    """
+    Check which of several services the citizen has every required document for;
+    unknown service ids are left out.
+    """
+    _own_documents(nic, current_citizen)
+    document_types = await citizen_crud.get_citizen_document_type_ids(nic, db)
+    return FastJSONResponse(await gov_node_services_crud.get_service_readiness(document_types, request.service_ids, db))
+
+@router.get("/{nic}/ready_services", response_model=Union[List[gov_node_services_schema.GovNodeServiceResponse], List[gov_node_services_schema.GovNodeServiceLocalized]], response_class=FastJSONResponse)
+async def get_ready_services(
+    nic: str,
+    service_type: Optional[str] = None,
+    lang: Optional[str] = Depends(get_language),
+    fields: Optional[FrozenSet[str]] = Depends(sparse_fields(gov_node_services_schema.GovNodeServiceResponse, gov_node_services_schema.GovNodeServiceLocalized)),
+    page: PageParams = Depends(page_params),
+    current_citizen: citizen_schema.CitizenResponse = Depends(get_current_citizen),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a page of the active services the citizen can book now, i.e. has every required document for.
+    """
+    _own_documents(nic, current_citizen)
+    document_types = await citizen_crud.get_citizen_document_type_ids(nic, db)
+    services, next_cursor = await gov_node_services_crud.get_ready_services(document_types, db, service_type, lang, fields, page)
+    return FastJSONResponse(services, headers={**language_headers(lang), **page_headers(next_cursor)})
+
+@router.get("/{nic}/documents", response_model=List[citizen_schema.CitizenDocumentResponse])
+async def get_citizen_documents(
+    nic: str,
+    current_citizen: citizen_schema.CitizenResponse = Depends(get_current_citizen),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the citizen's documents; they are not part of the citizen profile.
+    """
+    _own_documents(nic, current_citizen)
+    return await citizen_crud.get_citizen_documents(nic, db)
+
+@router.put("/{nic}/documents/{document_type_id}", response_model=citizen_schema.CitizenDocumentResponse)
+async def put_citizen_document(
+    nic: str,
+    document_type_id: int,
+    document: citizen_schema.CitizenDocumentCreate,
+    current_citizen: citizen_schema.CitizenResponse = Depends(get_current_citizen),
+    db: Session = Depends(get_db)
+):
+    """
+    Add or replace the citizen's document of a type.
+    """
+    _own_documents(nic, current_citizen)
+    return await citizen_crud.put_citizen_document(nic, document_type_id, document, db)
+
+@router.delete("/{nic}/documents/{document_type_id}", response_model=response_schema.ResponseMsg)
+async def delete_citizen_document(
+    nic: str,
+    document_type_id: int,
+    current_citizen: citizen_schema.CitizenResponse = Depends(get_current_citizen),
+    db: Session = Depends(get_db)
+):
+    """
+    Delete the citizen's document of a type.
+    """
+    _own_documents(nic, current_citizen)
+    return await citizen_crud.delete_citizen_document(nic, document_type_id, db)
+
 @router.get("/{nic}", response_model=citizen_schema.CitizenResponse)
 async def get_citizen(
     nic: str,
@@ -1,8 +1,13 @@
+from typing import FrozenSet, Optional, Union
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.schemas.document_types_schema import DocumentTypeBase, DocumentTypeCreate
+from app.schemas.document_types_schema import DocumentTypeBase, DocumentTypeCreate, DocumentTypeLocalized
 from app.crud import document_crud
+from app.utils.i18n import get_language, language_headers
+from app.utils.responses import FastJSONResponse, sparse_fields
+from app.utils.etag import conditional_get
+from app.models.document_types_model import DocumentType
 
 router = APIRouter(
     prefix="/api/v1/documents",
@@ -13,10 +18,22 @@ router = APIRouter(
 async def add_document(document: DocumentTypeCreate, db: Session = Depends(get_db)):
     return await document_crud.create_document(document, db)
 
-@router.get("/{document_id}", response_model=DocumentTypeBase, summary="Get document type by id")
-async def get_document_by_id(document_id: int, db: Session = Depends(get_db)):
-    return await document_crud.get_document_by_id(document_id, db)
+@router.get("/{document_id}", response_model=Union[DocumentTypeBase, DocumentTypeLocalized], response_class=FastJSONResponse, summary="Get document type by id")
+async def get_document_by_id(
+    document_id: int,
+    lang: Optional[str] = Depends(get_language),
+    cache_headers: dict = Depends(conditional_get(DocumentType.__tablename__)),
+    db: Session = Depends(get_db),
+):
+    document = await document_crud.get_document_by_id(document_id, db, lang)
+    return FastJSONResponse(document, headers={**cache_headers, **language_headers(lang)})
 
-@router.get("/all/", response_model=list[DocumentTypeBase], summary="Get all document types")
-async def get_all_documents(db: Session = Depends(get_db)):
-    return await document_crud.get_all_documents(db)
\ No newline at end of file
+@router.get("/all/", response_model=Union[list[DocumentTypeBase], list[DocumentTypeLocalized]], response_class=FastJSONResponse, summary="Get all document types")
+async def get_all_documents(
+    lang: Optional[str] = Depends(get_language),
+    fields: Optional[FrozenSet[str]] = Depends(sparse_fields(DocumentTypeBase, DocumentTypeLocalized)),
+    cache_headers: dict = Depends(conditional_get(DocumentType.__tablename__)),
+    db: Session = Depends(get_db),
+):
+    documents = await document_crud.get_all_documents(db, lang, fields)
+    return FastJSONResponse(documents, headers={**cache_headers, **language_headers(lang)})
@@ -1,13 +1,18 @@
-from typing import List
+from typing import FrozenSet, List, Literal, Optional, Union
 from app.db.session import get_db
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from app.crud import gov_crud
-from app.schemas import gov_schema, response_schema, registration_schema
+from app.crud import gov_crud, directory_crud
+from app.schemas import gov_schema, response_schema, registration_schema, directory_schema
 from app.utils.token import TokenWithUser
 from app.utils.token import create_access_token
 from app.utils.auth import admin_required
+from app.utils.responses import FastJSONResponse, sparse_fields
+from app.utils.i18n import get_language, language_headers
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams, page_params, page_headers
+from app.models.gov_model import GovNode
 from datetime import timedelta
 from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 
@@ -16,16 +21,70 @@ router = APIRouter(
     tags=["Government Offices"],
 )
 
+directory_cache_headers = conditional_get(*directory_crud.DIRECTORY_TABLES)
+
 # this endpoint use to retrieve all the government offices with categories
-@router.get("/offices", response_model=List[gov_schema.GovNodeResponse])
-async def get_government_offices(category_id: int = None, db: Session = Depends(get_db)):
+@router.get("/offices", response_model=Union[List[gov_schema.GovNodeResponse], List[gov_schema.GovNodeLocalized]], response_class=FastJSONResponse)
+async def get_government_offices(
+    category_id: int = None,
+    lang: Optional[str] = Depends(get_language),
+    fields: Optional[FrozenSet[str]] = Depends(sparse_fields(gov_schema.GovNodeResponse, gov_schema.GovNodeLocalized)),
+    page: PageParams = Depends(page_params),
+    cache_headers: dict = Depends(conditional_get(GovNode.__tablename__)),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a page of the government offices in the specified category.
+    """
+    offices, next_cursor = await gov_crud.get_all_gov_offices(category_id, db, lang, fields, page)
+    if not offices:
+        raise HTTPException(status_code=404, detail="No government offices found")
+    return FastJSONResponse(offices, headers={**cache_headers, **language_headers(lang), **page_headers(next_cursor)})
+
+# whole category -> office -> service tree for the citizen home screen
+@router.get("/directory", response_model=Union[List[directory_schema.DirectoryCategory], List[directory_schema.DirectoryCategoryLocalized]], response_class=FastJSONResponse)
+async def get_service_directory(
+    request: Request,
+    response: Response,
+    with_slots: bool = False,
+    lang: Optional[str] = Depends(get_language),
+    db: Session = Depends(get_db),
+):
     """
-    Get a list of all government offices in the specified category.
+    Get every category with its offices and their active services, optionally with each service's next free slot.
     """
-    offices = await gov_crud.get_all_gov_offices(category_id, db)
+    # slots change without a catalog version bump, so only the plain tree gets an ETag
+    cache_headers = {} if with_slots else await directory_cache_headers(request, response, lang)
+    body = await directory_crud.get_directory(db, lang, with_slots)
+    return Response(body, media_type="application/json", headers={**cache_headers, **language_headers(lang)})
+
+# nearest offices to the citizen, optionally only those offering a service type
+@router.get("/offices/nearest", response_model=Union[List[gov_schema.NearestGovNode], List[gov_schema.NearestGovNodeLocalized]], response_class=FastJSONResponse)
+async def get_nearest_government_offices(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    service_type: Optional[str] = None,
+    k: int = Query(5, ge=1, le=50),
+    max_km: Optional[float] = Query(None, gt=0),
+    rank_by: Literal["distance", "earliest_slot"] = "distance",
+    lang: Optional[str] = Depends(get_language),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the k government offices nearest to a point, ranked by distance or by their earliest free slot.
+    """
+    offices = await gov_crud.get_nearest_gov_offices(latitude, longitude, db, service_type, k, max_km, rank_by, lang)
     if not offices:
         raise HTTPException(status_code=404, detail="No government offices found")
-    return offices
+    return FastJSONResponse(offices, headers=language_headers(lang))
+
+# admin sets the coordinates used by the nearest office search
+@router.put("/offices/{office_id}/coordinates", response_model=gov_schema.GovNodeResponse, dependencies=[Depends(admin_required)])
+async def update_office_coordinates(office_id: int, coordinates: gov_schema.GovNodeCoordinates, db: Session = Depends(get_db)):
+    """
+    Update the coordinates of a government office.
+    """
+    return await gov_crud.update_gov_office_coordinates(office_id, coordinates, db)
 
 # this endpoint can only accessed by admin govNodes for activate user account
 @router.get("/user/activate", response_model=response_schema.ResponseMsg, dependencies=[Depends(admin_required)])
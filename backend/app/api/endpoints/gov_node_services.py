@@ -1,10 +1,15 @@
-from typing import List
+from typing import FrozenSet, List, Optional, Union
 from app.db.session import get_db
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, HTTPException, Depends
 from app.crud import gov_node_services_crud
 from app.schemas import gov_node_services_schema
 from app.utils.auth import get_current_citizen, get_current_government_office
+from app.utils.i18n import get_language, language_headers
+from app.utils.responses import FastJSONResponse, sparse_fields
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams, page_params, page_headers
+from app.models.gov_node_services_model import GovNodeService
 
 router = APIRouter(
     prefix="/api/v1/gov/services",
@@ -18,12 +23,19 @@ async def create_gov_node_service(service: gov_node_services_schema.GovNodeServi
         raise HTTPException(status_code=400, detail="Service creation failed")
     return db_service
 
-@router.get("/{gov_node_id}", response_model=List[gov_node_services_schema.GovNodeServiceResponse])
-async def get_gov_node_services(gov_node_id: int, db: Session = Depends(get_db)):
-    db_services = await gov_node_services_crud.get_gov_node_services(db, gov_node_id)
+@router.get("/{gov_node_id}", response_model=Union[List[gov_node_services_schema.GovNodeServiceResponse], List[gov_node_services_schema.GovNodeServiceLocalized]], response_class=FastJSONResponse)
+async def get_gov_node_services(
+    gov_node_id: int,
+    lang: Optional[str] = Depends(get_language),
+    fields: Optional[FrozenSet[str]] = Depends(sparse_fields(gov_node_services_schema.GovNodeServiceResponse, gov_node_services_schema.GovNodeServiceLocalized)),
+    page: PageParams = Depends(page_params),
+    cache_headers: dict = Depends(conditional_get(GovNodeService.__tablename__)),
+    db: Session = Depends(get_db),
+):
+    db_services, next_cursor = await gov_node_services_crud.get_gov_node_services(db, gov_node_id, lang, fields, page)
     if not db_services:
         raise HTTPException(status_code=404, detail="No services found")
-    return db_services
+    return FastJSONResponse(db_services, headers={**cache_headers, **language_headers(lang), **page_headers(next_cursor)})
 
 @router.put("/{service_id}", response_model=gov_node_services_schema.GovNodeServiceResponse, dependencies=[Depends(get_current_government_office)])
 async def update_gov_node_service(service_id: int, service: gov_node_services_schema.GovNodeServiceUpdate, db: Session = Depends(get_db)):
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import FrozenSet, List, Optional
 from app.db.session import get_db
 from app.schemas.notification_schema import NotificationRequest, NotificationCreate, NotificationResponse, NotificationUpdate
 from app.crud import notification_crud
+from app.utils.responses import FastJSONResponse, sparse_fields
 
 router = APIRouter(
     prefix="/api/v1/notifications",
@@ -14,9 +15,9 @@ router = APIRouter(
 async def create_notifications(notification: NotificationCreate, db: Session = Depends(get_db)):
     return await notification_crud.create_notification(notification, db)
 
-@router.post("/get", response_model=List[NotificationResponse])
-async def get_notifications(request: NotificationRequest, db: Session = Depends(get_db)):
-    return await notification_crud.get_all_notifications(request, db)
+@router.post("/get", response_model=List[NotificationResponse], response_class=FastJSONResponse)
+async def get_notifications(request: NotificationRequest, fields: Optional[FrozenSet[str]] = Depends(sparse_fields(NotificationResponse)), db: Session = Depends(get_db)):
+    return FastJSONResponse(await notification_crud.get_all_notifications(request, db, fields))
 
 @router.delete("/delete/{notification_id}", response_model=dict)
 async def delete_notifications(notification_id: int, db: Session = Depends(get_db)):
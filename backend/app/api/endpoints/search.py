@@ -0,0 +1,50 @@
+from typing import List, Literal, Optional, Union
+from app.db.session import get_db
+from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
+from app.crud import search_crud
+from app.core.typeahead import MAX_SUGGESTIONS, Suggestion, typeahead
+from app.schemas import search_schema
+from app.utils.i18n import get_language, language_headers
+from app.utils.responses import FastJSONResponse, rows_to_dicts
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams, page_params, page_headers
+from app.models.gov_model import GovNode
+from app.models.gov_node_services_model import GovNodeService
+from app.models.document_types_model import DocumentType
+
+router = APIRouter(
+    prefix="/api/v1/search",
+    tags=["Search"]
+)
+
+@router.get("/", response_model=Union[List[search_schema.SearchResult], List[search_schema.SearchResultLocalized]], response_class=FastJSONResponse)
+async def search(
+    q: str = Query(..., min_length=2, max_length=100, description="Words or word prefixes, in any of the three languages"),
+    kind: Optional[Literal["service", "office"]] = Query(None, description="Only return services or only offices"),
+    lang: Optional[str] = Depends(get_language),
+    page: PageParams = Depends(page_params),
+    cache_headers: dict = Depends(conditional_get(GovNodeService.__tablename__, GovNode.__tablename__)),
+    db: Session = Depends(get_db),
+):
+    """
+    Search services and government offices by name, description and location, best match first.
+    """
+    hits, next_cursor = await search_crud.search_catalog(q, db, kind, lang, page)
+    return FastJSONResponse(hits, headers={**cache_headers, **language_headers(lang), **page_headers(next_cursor)})
+
+@router.get("/suggest", response_model=List[search_schema.SearchSuggestion], response_class=FastJSONResponse)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    kind: Optional[Literal["service", "office", "document"]] = Query(None, description="Only suggest names of this kind"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    lang: Optional[str] = Depends(get_language),
+    cache_headers: dict = Depends(conditional_get(GovNodeService.__tablename__, GovNode.__tablename__, DocumentType.__tablename__)),
+    db: Session = Depends(get_db),
+):
+    """
+    Typeahead: service, office and document type names containing a word that starts with `q`,
+    served from memory. Without `lang`, names in all three languages are suggested.
+    """
+    suggestions = await typeahead.suggest(db, q, lang, kind, limit)
+    return FastJSONResponse(rows_to_dicts(suggestions, Suggestion._fields), headers={**cache_headers, **language_headers(lang)})
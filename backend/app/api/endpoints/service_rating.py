@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
-from app.schemas.service_rating_schema import ServiceRatingCreate, ServiceRatingUpdate, ServiceRatingResponse
+from typing import FrozenSet, List, Optional
+from app.db.session import get_db, get_read_db
+from app.schemas.service_rating_schema import ServiceRatingCreate, ServiceRatingUpdate, ServiceRatingResponse, RatingSummary
 from app.crud import service_rating_crud
+from app.utils.responses import FastJSONResponse, sparse_fields
+from app.utils.pagination import PageParams, page_params, page_headers
 
 router = APIRouter(
     prefix="/api/v1/gov_service_ratings",
@@ -18,14 +20,24 @@ async def create_service_rating(rating_data: ServiceRatingCreate, db: Session =
 async def update_service_rating(rating_id: int, update_data: ServiceRatingUpdate, db: Session = Depends(get_db)):
     return await service_rating_crud.update_service_rating(rating_id, update_data, db)
 
+@router.get("/service/{service_id}/summary", response_model=RatingSummary)
+async def get_service_rating_summary(service_id: int, db: Session = Depends(get_read_db)):
+    return await service_rating_crud.get_service_rating_summary(service_id, db)
+
+@router.get("/service_node/{service_node_id}/summary", response_model=RatingSummary)
+async def get_office_rating_summary(service_node_id: int, db: Session = Depends(get_read_db)):
+    return await service_rating_crud.get_office_rating_summary(service_node_id, db)
+
 @router.get("/{rating_id}", response_model=ServiceRatingResponse)
 async def get_service_rating(rating_id: int, db: Session = Depends(get_db)):
     return await service_rating_crud.get_service_rating(rating_id, db)
 
-@router.get("/service/{service_id}", response_model=List[ServiceRatingResponse])
-async def list_service_ratings(service_id: int, db: Session = Depends(get_db)):
-    return await service_rating_crud.list_service_ratings(service_id, db)
+@router.get("/service/{service_id}", response_model=List[ServiceRatingResponse], response_class=FastJSONResponse)
+async def list_service_ratings(service_id: int, fields: Optional[FrozenSet[str]] = Depends(sparse_fields(ServiceRatingResponse)), page: PageParams = Depends(page_params), db: Session = Depends(get_read_db)):
+    ratings, next_cursor = await service_rating_crud.list_service_ratings(service_id, db, fields, page)
+    return FastJSONResponse(ratings, headers=page_headers(next_cursor))
 
-@router.get("/service_node/{service_node_id}", response_model=List[ServiceRatingResponse])
-async def list_service_ratings_by_node(service_node_id: int, db: Session = Depends(get_db)):
-    return await service_rating_crud.list_service_ratings_by_node(service_node_id, db)
\ No newline at end of file
+@router.get("/service_node/{service_node_id}", response_model=List[ServiceRatingResponse], response_class=FastJSONResponse)
+async def list_service_ratings_by_node(service_node_id: int, fields: Optional[FrozenSet[str]] = Depends(sparse_fields(ServiceRatingResponse)), page: PageParams = Depends(page_params), db: Session = Depends(get_read_db)):
+    ratings, next_cursor = await service_rating_crud.list_service_ratings_by_node(service_node_id, db, fields, page)
+    return FastJSONResponse(ratings, headers=page_headers(next_cursor))
\ No newline at end of file
@@ -1,20 +1,31 @@
-from typing import List
+from typing import FrozenSet, List, Optional, Union
 from app.db.session import get_db
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, HTTPException, Depends
 from app.crud import service_crud
 from app.schemas import services_schema
 from app.utils.auth import get_current_citizen
+from app.utils.i18n import get_language, language_headers
+from app.utils.responses import FastJSONResponse, sparse_fields
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams, page_params, page_headers
+from app.models.services_model import GovServiceCategory
 
 router = APIRouter(
     prefix="/api/v1/gov/services",
     tags=["Government Services"]
 )
 
-@router.get("/", response_model=List[services_schema.ServiceResponse])
-async def get_services(db: Session = Depends(get_db)):
-    services = await service_crud.get_all_services(db)
-    return services
+@router.get("/", response_model=Union[List[services_schema.ServiceResponse], List[services_schema.ServiceLocalized]], response_class=FastJSONResponse)
+async def get_services(
+    lang: Optional[str] = Depends(get_language),
+    fields: Optional[FrozenSet[str]] = Depends(sparse_fields(services_schema.ServiceResponse, services_schema.ServiceLocalized)),
+    page: PageParams = Depends(page_params),
+    cache_headers: dict = Depends(conditional_get(GovServiceCategory.__tablename__)),
+    db: Session = Depends(get_db),
+):
+    services, next_cursor = await service_crud.get_all_services(db, lang, fields, page)
+    return FastJSONResponse(services, headers={**cache_headers, **language_headers(lang), **page_headers(next_cursor)})
 
 @router.post("/register", response_model=services_schema.ServiceResponse)
 async def create_service(service: services_schema.ServiceCreate, db: Session = Depends(get_db)):
@@ -0,0 +1,187 @@
+"""
+In-memory snapshot of the read-mostly catalog: service categories, government offices,
+their node services and document types.
+
+Each table is held in an immutable section of row tuples with a per-id index and a
+per-group index (offices by category, services by office), so catalog reads are dict
+lookups instead of Postgres queries. Sections carry the table version they were built
+from (see `app.utils.etag`); a read that finds a newer version in the state backend
+reloads only that section and swaps in a new snapshot, so an admin write on any worker
+is picked up on the next read everywhere. Sections older than `max_age` are reloaded
+as well, for writes made outside the API.
+"""
+import asyncio
+import time
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple, Type
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.models.document_types_model import DocumentType
+from app.models.gov_model import GovNode
+from app.models.gov_node_services_model import GovNodeService
+from app.models.services_model import GovServiceCategory
+from app.schemas.document_types_schema import DocumentTypeBase
+from app.schemas.gov_node_services_schema import GovNodeServiceResponse
+from app.schemas.gov_schema import GovNodeResponse
+from app.schemas.services_schema import ServiceResponse
+from app.utils.etag import table_version
+from app.utils.logger import logger
+from app.utils.responses import check_projection
+
+
+class SectionSpec(NamedTuple):
+    model: type
+    schema: Type[BaseModel]
+    key: str
+    group: Optional[str] = None
+    # schema field -> model column, for fields stored under another name
+    sources: Tuple[Tuple[str, str], ...] = ()
+
+
+SECTIONS: Dict[str, SectionSpec] = {
+    GovServiceCategory.__tablename__: SectionSpec(GovServiceCategory, ServiceResponse, "id"),
+    GovNode.__tablename__: SectionSpec(GovNode, GovNodeResponse, "id", group="category_id"),
+    GovNodeService.__tablename__: SectionSpec(GovNodeService, GovNodeServiceResponse, "service_id", group="gov_node_id"),
+    DocumentType.__tablename__: SectionSpec(
+        DocumentType, DocumentTypeBase, "id",
+        sources=(("name_si", "type_si"), ("name_en", "type_en"), ("name_ta", "type_ta")),
+    ),
+}
+
+
+class CatalogSection:
+    """
+    Immutable rows of one catalog table, stored as tuples in `fields` order.
+    """
+
+    __slots__ = ("version", "loaded_at", "fields", "rows", "ids", "groups")
+
+    def __init__(self, version: int, fields: Tuple[str, ...], rows: Mapping[int, tuple], ids: Tuple[int, ...], groups: Mapping):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.fields = fields
+        self.rows = rows
+        self.ids = ids
+        self.groups = groups
+
+    @classmethod
+    def load(cls, spec: SectionSpec, version: int, db: Session) -> "CatalogSection":
+        sources = dict(spec.sources)
+        fields = tuple(spec.schema.model_fields)
+        columns = [getattr(spec.model, sources.get(field, field)).label(field) for field in fields]
+        key = fields.index(spec.key)
+        rows = {}
+        groups: Dict[object, List[int]] = {}
+        group = fields.index(spec.group) if spec.group else None
+        for row in db.query(*columns).order_by(getattr(spec.model, spec.key)).all():
+            # lists become tuples so nothing reachable from the snapshot is mutable
+            values = tuple(tuple(value) if isinstance(value, list) else value for value in row)
+            rows[values[key]] = values
+            if group is not None:
+                groups.setdefault(values[group], []).append(values[key])
+        return cls(
+            version,
+            fields,
+            MappingProxyType(rows),
+            tuple(rows),
+            MappingProxyType({value: tuple(ids) for value, ids in groups.items()}),
+        )
+
+    def group_ids(self, value) -> Tuple[int, ...]:
+        return self.groups.get(value, ())
+
+    def project(self, ids, lang: Optional[str] = None, fields: Optional[FrozenSet[str]] = None, schema: Optional[Type[BaseModel]] = None) -> List[dict]:
+        """
+        Rows `ids` as dicts of `schema` (the section's full shape by default).
+
+        With `lang`, `<field>_<lang>` is returned as `<field>` for the single-language
+        schemas of `app.utils.i18n`; with `fields`, only those fields are returned.
+        """
+        keys, getter = _projector(self.fields, schema, lang, fields)
+        check_projection(keys)
+        rows = self.rows
+        return [dict(zip(keys, getter(rows[i]))) for i in ids if i in rows]
+
+
+@lru_cache(maxsize=1024)
+def _projector(stored: Tuple[str, ...], schema: Optional[Type[BaseModel]], lang: Optional[str], fields: Optional[FrozenSet[str]]):
+    names = tuple(schema.model_fields) if schema is not None else stored
+    keys, positions = [], []
+    for name in names:
+        if fields is not None and name not in fields:
+            continue
+        source = f"{name}_{lang}" if lang and f"{name}_{lang}" in stored else name
+        if source in stored:
+            keys.append(name)
+            positions.append(stored.index(source))
+    if not positions:
+        return (), None
+    if len(positions) == 1:
+        single = positions[0]
+        return tuple(keys), lambda row: (row[single],)
+    return tuple(keys), itemgetter(*positions)
+
+
+class CatalogSnapshot:
+    """
+    Immutable set of catalog sections; `version` increases with every rebuild.
+    """
+
+    __slots__ = ("version", "sections")
+
+    def __init__(self, version: int, sections: Mapping[str, CatalogSection]):
+        self.version = version
+        self.sections = sections
+
+    def __getitem__(self, table: str) -> CatalogSection:
+        return self.sections[table]
+
+
+class Catalog:
+    """
+    Holder of the current `CatalogSnapshot`, rebuilding stale sections on read.
+    """
+
+    def __init__(self, specs: Mapping[str, SectionSpec] = SECTIONS, max_age: float = 300.0):
+        self.specs = specs
+        self.max_age = max_age
+        self._snapshot = CatalogSnapshot(0, MappingProxyType({}))
+        self._lock = asyncio.Lock()
+
+    def _stale(self, snapshot: CatalogSnapshot, versions: Dict[str, int]) -> List[str]:
+        now = time.monotonic()
+        stale = []
+        for table, version in versions.items():
+            section = snapshot.sections.get(table)
+            if section is None or section.version != version or now - section.loaded_at > self.max_age:
+                stale.append(table)
+        return stale
+
+    async def snapshot(self, db: Session, *tables: str) -> CatalogSnapshot:
+        """
+        Current snapshot, with the sections of `tables` (all by default) up to date.
+        """
+        versions = {table: await table_version(table) for table in (tables or self.specs)}
+        snapshot = self._snapshot
+        if not self._stale(snapshot, versions):
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            stale = self._stale(snapshot, versions)
+            if not stale:
+                return snapshot
+            sections = dict(snapshot.sections)
+            for table in stale:
+                # the load is a blocking query and row copy, keep it off the event loop
+                sections[table] = await run_in_threadpool(CatalogSection.load, self.specs[table], versions[table], db)
+            snapshot = CatalogSnapshot(snapshot.version + 1, MappingProxyType(sections))
+            self._snapshot = snapshot
+            logger.info(f"Catalog snapshot {snapshot.version} rebuilt: {', '.join(stale)}")
+            return snapshot
+
+
+catalog = Catalog()
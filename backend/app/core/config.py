@@ -11,10 +11,32 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_USER = os.getenv("DB_USER")
 DB_NAME = os.getenv("DB_NAME")
 
+# read-only replica for analytics and listing reads; unset sends them to the primary
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+
+# seconds a client's replica reads go to the primary after it wrote, so it reads its own writes
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
 # mailjet API keys
 MJ_APIKEY_PUBLIC = os.getenv("MJ_APIKEY_PUBLIC")
 MJ_APIKEY_PRIVATE = os.getenv("MJ_APIKEY_PRIVATE")
 
+# shared rate limit and cache state, in-memory per process when unset
+REDIS_URL = os.getenv("REDIS_URL")
+
+# requests a client address may make per RATE_LIMIT_WINDOW seconds, across all workers
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "20"))
+RATE_LIMIT_WINDOW = float(os.getenv("RATE_LIMIT_WINDOW", "1"))
+
+# seconds browsers and CDNs may reuse catalog responses before revalidating their ETag
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "300"))
+
+# seconds the service directory with next free slots is served from cache
+DIRECTORY_SLOT_CACHE_TTL = int(os.getenv("DIRECTORY_SLOT_CACHE_TTL", "30"))
+
+# seconds an office dashboard is served from cache
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+
 # Secret key for signing the JWT
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
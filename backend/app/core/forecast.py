@@ -0,0 +1,160 @@
+"""
+Weekly-seasonality demand forecasts and the slot capacities they recommend.
+
+Demand of a service is modelled per weekday and start hour: the places reserved in
+that hour's slots over the last HISTORY_WEEKS weeks, read from the reservation
+rollups, form a matrix with a row per service, weekday and hour that had slots and a
+column per week. Hours that sold out only show a lower bound on demand, so their
+reserved count is raised by SOLD_OUT_UPLIFT. The forecast of each row is the mean of
+its weeks, weighted by DECAY ** weeks_ago so recent weeks count most, and the
+recommended capacity covers that mean plus SERVICE_LEVEL_Z weighted standard
+deviations. Every service is fitted at once with matrix-vector products, on the CPU.
+
+The job replaces the capacity_recommendations table in one transaction; run it from
+the backend directory, or print a backtest over the last weeks instead, with
+
+    python -m app.core.forecast [--backtest WEEKS]
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+import numpy as np
+from sqlalchemy import insert, text
+from app.models.reservation_services_model import CapacityRecommendation
+
+HISTORY_WEEKS = 26
+DECAY = 0.85
+MIN_WEEKS = 3
+SERVICE_LEVEL_Z = 1.2816  # one-sided 90%
+SOLD_OUT_UPLIFT = 1.25
+HOURS = 24
+
+HISTORY_SQL = text("""
+    SELECT service_id, booking_date - :origin AS day, hour, reserved, capacity
+    FROM reservation_rollups
+    WHERE booking_date >= :origin AND booking_date < :until AND capacity > 0
+""")
+
+
+def demand_matrix(rows: np.ndarray, weeks: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The (service_id, weekday, hour) cells of `rows`, an integer array of (service_id,
+    day, hour, reserved, capacity) with day 0 a Monday, and their cells x weeks demand;
+    NaN in the weeks a cell had no slot.
+    """
+    if not len(rows):
+        return np.empty((0, 3), dtype=np.int64), np.full((0, weeks), np.nan)
+    service_id, day, hour, reserved, capacity = rows.T
+    keys, cell = np.unique((service_id * 7 + day % 7) * HOURS + hour, return_inverse=True)
+    cells = np.stack([keys // (7 * HOURS), keys // HOURS % 7, keys % HOURS], axis=1)
+    matrix = np.full((len(keys), weeks), np.nan)
+    matrix[cell, day // 7] = np.where(reserved >= capacity, reserved * SOLD_OUT_UPLIFT, reserved)
+    return cells, matrix
+
+
+def fit_weekly(matrix: np.ndarray, decay: float = DECAY) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decay-weighted mean and standard deviation of each row (cell) of `matrix` over its
+    weeks, and the number of weeks observed; NaN where no week was.
+    """
+    valid = ~np.isnan(matrix)
+    values = np.where(valid, matrix, 0.0)
+    weights = decay ** np.arange(matrix.shape[1] - 1, -1, -1)
+    total = valid @ weights
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = values @ weights / total
+        variance = (values ** 2) @ weights / total - mean ** 2
+    return mean, np.sqrt(np.maximum(variance, 0.0)), valid.sum(axis=1)
+
+
+def recommend(mean: np.ndarray, std: np.ndarray, z: float = SERVICE_LEVEL_Z) -> np.ndarray:
+    """
+    Capacity covering the forecast demand at the service level of `z`; at least 1.
+    """
+    return np.maximum(np.ceil(np.nan_to_num(mean + z * std)), 1).astype(int)
+
+
+def backtest(matrix: np.ndarray, holdout_weeks: int, decay: float = DECAY, z: float = SERVICE_LEVEL_Z) -> Dict[str, float]:
+    """
+    Fit on all but the last `holdout_weeks` weeks and score the forecast of the rest,
+    next to a seasonal naive forecast (the same hour of the last observed week).
+    """
+    train, test = matrix[:, :-holdout_weeks], matrix[:, -holdout_weeks:]
+    start = time.perf_counter()
+    mean, std, observed = fit_weekly(train, decay)
+    capacity = recommend(mean, std, z)
+    fit_seconds = time.perf_counter() - start
+
+    # the last observed week of each cell
+    latest = np.where(~np.isnan(train), np.arange(train.shape[1]), -1).max(axis=1)
+    naive = np.where(latest >= 0, train[np.arange(len(train)), np.maximum(latest, 0)], np.nan)
+
+    scored = ~np.isnan(test) & (observed >= MIN_WEEKS)[:, None]
+    errors = (test - mean[:, None])[scored]
+    naive_errors = (test - naive[:, None])[scored & ~np.isnan(naive)[:, None]]
+    return {
+        "cells": len(matrix),
+        "scored_hours": int(scored.sum()),
+        "mae": float(np.abs(errors).mean()) if errors.size else float("nan"),
+        "rmse": float(np.sqrt((errors ** 2).mean())) if errors.size else float("nan"),
+        "naive_mae": float(np.abs(naive_errors).mean()) if naive_errors.size else float("nan"),
+        "coverage": float((test <= capacity[:, None])[scored].mean()) if errors.size else float("nan"),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def load_history(connection, until: Optional[date] = None, weeks: int = HISTORY_WEEKS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cells and demand matrix of the `weeks` whole weeks before the week of `until`
+    (today), plus that week's days before `until`.
+    """
+    until = until or date.today()
+    origin = until - timedelta(days=until.weekday()) - timedelta(weeks=weeks)
+    rows = connection.execute(HISTORY_SQL, {"origin": origin, "until": until}).all()
+    return demand_matrix(np.array(rows, dtype=np.int64).reshape(-1, 5), weeks + 1)
+
+
+def publish_recommendations(connection, until: Optional[date] = None) -> int:
+    """
+    Fit every service and replace the published recommendations; the number of
+    weekday-hours published.
+    """
+    cells, matrix = load_history(connection, until)
+    mean, std, observed = fit_weekly(matrix)
+    capacity = recommend(mean, std)
+    published = observed >= MIN_WEEKS
+    fitted_at = datetime.now()
+    rows = [
+        {
+            "service_id": service_id, "weekday": weekday, "hour": hour, "forecast_demand": demand,
+            "demand_std": spread, "recommended_capacity": recommended, "observed_weeks": weeks, "fitted_at": fitted_at,
+        }
+        for (service_id, weekday, hour), demand, spread, recommended, weeks in zip(
+            cells[published].tolist(), mean[published].tolist(), std[published].tolist(),
+            capacity[published].tolist(), observed[published].tolist(),
+        )
+    ]
+    connection.execute(text("DELETE FROM capacity_recommendations"))
+    if rows:
+        connection.execute(insert(CapacityRecommendation), rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.db.session import engine
+    from app.utils.logger import logger
+
+    parser = argparse.ArgumentParser(description="Publish slot capacity recommendations")
+    parser.add_argument("--backtest", type=int, metavar="WEEKS", help="score the last WEEKS weeks instead of publishing")
+    args = parser.parse_args()
+
+    if args.backtest:
+        with engine.connect() as connection:
+            _, matrix = load_history(connection, weeks=HISTORY_WEEKS + args.backtest)
+        # the current week is not over, leave it out
+        logger.info(f"Backtest over {args.backtest} weeks: {backtest(matrix[:, :-1], args.backtest)}")
+    else:
+        with engine.begin() as connection:
+            published = publish_recommendations(connection)
+        logger.info(f"Published capacity recommendations for {published} weekday-hours")
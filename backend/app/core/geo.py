@@ -0,0 +1,235 @@
+"""
+Nearest-office lookups over the office coordinates held in the catalog snapshot.
+
+Offices with coordinates are bucketed into a grid of square cells, sized so that an
+average cell over the box around most offices holds about POINTS_PER_CELL of them. A
+k-nearest query visits rings of cells around the query point, nearest ring first, and
+stops once the closest a point in the next ring could be is farther than the k-th
+office found, so it only measures the offices around the query point. Distances are
+great-circle (haversine). The grid does not wrap at the antimeridian, which no office
+is near.
+
+Like the typeahead indexes, the grid and the service type -> offices map are rebuilt
+only when the office or node service section of the catalog snapshot changes.
+"""
+import heapq
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.catalog import CatalogSection, CatalogSnapshot, catalog
+from app.models.gov_model import GovNode
+from app.models.gov_node_services_model import GovNodeService
+
+EARTH_RADIUS_KM = 6371.0088
+POINTS_PER_CELL = 4
+MIN_CELL_DEGREES = 0.01
+MAX_CELL_DEGREES = 1.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGrid:
+    """
+    Points `(id, latitude, longitude)` bucketed by grid cell.
+    """
+
+    __slots__ = ("cell_degrees", "cells", "bounds")
+
+    def __init__(self, points: Iterable[Tuple[int, float, float]], cell_degrees: Optional[float] = None):
+        points = list(points)
+        self.cell_degrees = cell_degrees or self._cell_size(points)
+        cells: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = {}
+        for point in points:
+            cells.setdefault(self._cell(point[1], point[2]), []).append(point)
+        self.cells = {cell: tuple(points) for cell, points in cells.items()}
+        rows = [row for row, _ in self.cells] or [0]
+        columns = [column for _, column in self.cells] or [0]
+        self.bounds = (min(rows), max(rows), min(columns), max(columns))
+
+    @staticmethod
+    def _cell_size(points: List[Tuple[int, float, float]]) -> float:
+        if len(points) < 2:
+            return MAX_CELL_DEGREES
+        # the box holding the middle 90% of the offices, so a few remote ones don't inflate it
+        latitudes = sorted(point[1] for point in points)
+        longitudes = sorted(point[2] for point in points)
+        low, high = len(points) // 20, len(points) - 1 - len(points) // 20
+        height = latitudes[high] - latitudes[low]
+        width = longitudes[high] - longitudes[low]
+        size = math.sqrt(max(height * width, height ** 2, width ** 2) * POINTS_PER_CELL / (high - low + 1))
+        return min(MAX_CELL_DEGREES, max(MIN_CELL_DEGREES, size))
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def _ring(self, row: int, column: int, radius: int):
+        """
+        Cells `radius` rings around `(row, column)`, clipped to the occupied bounds.
+        """
+        min_row, max_row, min_column, max_column = self.bounds
+        first_column, last_column = max(column - radius, min_column), min(column + radius, max_column)
+        for r in range(max(row - radius, min_row), min(row + radius, max_row) + 1):
+            if r in (row - radius, row + radius):
+                for c in range(first_column, last_column + 1):
+                    yield r, c
+            else:
+                for c in {column - radius, column + radius}:
+                    if min_column <= c <= max_column:
+                        yield r, c
+
+    def _min_km(self, latitude: float, edge: float, radius: int) -> float:
+        """
+        Lower bound of the distance from a point `edge` degrees inside its cell to any
+        cell `radius` rings away.
+        """
+        if radius <= 0:
+            return 0.0
+        degrees = (radius - 1) * self.cell_degrees + edge
+        # a longitude gap is shortest at the highest latitude the ring reaches, and
+        # never longer than the same gap in latitude
+        widest = min(90.0, abs(latitude) + (radius + 1) * self.cell_degrees)
+        half_gap = math.sin(math.radians(min(degrees, 180.0)) / 2)
+        return 2 * EARTH_RADIUS_KM * math.asin(max(math.cos(math.radians(widest)), 0.0) * half_gap)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        accept: Optional[Callable[[int], bool]] = None,
+        max_km: Optional[float] = None,
+    ) -> List[Tuple[float, int]]:
+        """
+        Up to `k` `(distance_km, id)` pairs, nearest first, of the points passing `accept`.
+        """
+        if not self.cells:
+            return []
+        row, column = self._cell(latitude, longitude)
+        size = self.cell_degrees
+        edge = min(latitude - row * size, (row + 1) * size - latitude, longitude - column * size, (column + 1) * size - longitude)
+        min_row, max_row, min_column, max_column = self.bounds
+        # rings closer than the occupied bounds are empty
+        first_ring = max(0, min_row - row, row - max_row, min_column - column, column - max_column)
+        last_ring = max(row - min_row, max_row - row, column - min_column, max_column - column)
+        best: List[Tuple[float, int]] = []  # max-heap of the k nearest, as (-distance, -id)
+        for radius in range(first_ring, last_ring + 1):
+            bound = self._min_km(latitude, edge, radius)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            if max_km is not None and bound > max_km:
+                break
+            if 8 * radius > len(self.cells):
+                # far from every office: visit the remaining occupied cells instead of empty rings
+                cells = [cell for cell in self.cells if max(abs(cell[0] - row), abs(cell[1] - column)) >= radius]
+                last = True
+            else:
+                cells, last = self._ring(row, column, radius), False
+            for cell in cells:
+                for point_id, point_latitude, point_longitude in self.cells.get(cell, ()):
+                    if accept is not None and not accept(point_id):
+                        continue
+                    distance = haversine_km(latitude, longitude, point_latitude, point_longitude)
+                    if max_km is not None and distance > max_km:
+                        continue
+                    item = (-distance, -point_id)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            if last:
+                break
+        return sorted((-distance, -point_id) for distance, point_id in best)
+
+
+class OfficeLocator:
+    """
+    Office grid and per service type office map, kept in step with the catalog snapshot.
+    """
+
+    def __init__(self):
+        self._grid: Optional[Tuple[CatalogSection, GeoGrid]] = None
+        # service type -> office id -> active service ids of that type
+        self._services: Optional[Tuple[CatalogSection, Dict[str, Dict[int, Tuple[int, ...]]]]] = None
+
+    def _office_grid(self, section: CatalogSection) -> GeoGrid:
+        if self._grid is None or self._grid[0] is not section:
+            rows = section.project(section.ids, fields=frozenset({"id", "latitude", "longitude"}))
+            grid = GeoGrid(
+                (row["id"], row["latitude"], row["longitude"])
+                for row in rows if row["latitude"] is not None and row["longitude"] is not None
+            )
+            self._grid = (section, grid)
+        return self._grid[1]
+
+    def _services_by_type(self, section: CatalogSection) -> Dict[str, Dict[int, Tuple[int, ...]]]:
+        if self._services is None or self._services[0] is not section:
+            by_type: Dict[str, Dict[int, List[int]]] = {}
+            fields = frozenset({"service_id", "gov_node_id", "service_type", "is_active"})
+            for row in section.project(section.ids, fields=fields):
+                if row["is_active"] is False:
+                    continue
+                by_type.setdefault(row["service_type"], {}).setdefault(row["gov_node_id"], []).append(row["service_id"])
+            self._services = (section, {
+                service_type: {office: tuple(ids) for office, ids in offices.items()}
+                for service_type, offices in by_type.items()
+            })
+        return self._services[1]
+
+    async def nearest(
+        self,
+        db: Session,
+        latitude: float,
+        longitude: float,
+        k: int,
+        service_type: Optional[str] = None,
+        max_km: Optional[float] = None,
+        snapshot: Optional[CatalogSnapshot] = None,
+    ) -> List[Tuple[float, int, Tuple[int, ...]]]:
+        """
+        `(distance_km, office_id, service_ids)` of the `k` nearest offices, nearest first.
+        With `service_type`, only offices with an active service of that type are
+        considered and `service_ids` are those services; otherwise all their active services.
+        Pass the `snapshot` the caller reads the offices from, so both agree.
+        """
+        snapshot = snapshot or await catalog.snapshot(db, GovNode.__tablename__, GovNodeService.__tablename__)
+        grid = self._office_grid(snapshot[GovNode.__tablename__])
+        services = self._services_by_type(snapshot[GovNodeService.__tablename__])
+
+        if service_type is not None:
+            offices = services.get(service_type, {})
+        else:
+            offices = {}
+            for by_office in services.values():
+                for office, ids in by_office.items():
+                    offices[office] = offices.get(office, ()) + ids
+        hits = grid.nearest(latitude, longitude, k, accept=offices.__contains__ if service_type is not None else None, max_km=max_km)
+        return [(distance, office, tuple(sorted(offices.get(office, ())))) for distance, office in hits]
+
+    async def offering(
+        self,
+        db: Session,
+        service_type: str,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        max_km: Optional[float] = None,
+    ) -> Dict[int, Tuple[Optional[float], Tuple[int, ...]]]:
+        """
+        Offices with an active service of `service_type` -> (distance_km, service ids).
+        With a point and `max_km`, only the offices within `max_km` of it, otherwise
+        every one of them with no distance.
+        """
+        snapshot = await catalog.snapshot(db, GovNode.__tablename__, GovNodeService.__tablename__)
+        offices = self._services_by_type(snapshot[GovNodeService.__tablename__]).get(service_type, {})
+        if latitude is None or longitude is None or not offices:
+            return {office: (None, ids) for office, ids in offices.items()}
+        grid = self._office_grid(snapshot[GovNode.__tablename__])
+        hits = grid.nearest(latitude, longitude, len(offices), accept=offices.__contains__, max_km=max_km)
+        return {office: (distance, offices[office]) for distance, office in hits}
+
+
+office_locator = OfficeLocator()
@@ -0,0 +1,196 @@
+"""
+In-process prefix index for keystroke-level typeahead over catalog names.
+
+Names come from the catalog snapshot (see `app.core.catalog`), so suggestions never
+query Postgres. Each (table, language) pair gets two `PrefixIndex`es over its distinct
+names: one keyed by the whole name and one by the rest of the name from each later
+word, so "ren" finds "Driving licence renewal" after the names starting with "ren".
+Keys are sorted and searched with bisect, and cut to KEY_LENGTH characters, so memory
+grows with the number of distinct words rather than the length of the names.
+
+Names are stored best first (most common, then shortest), so a smaller position is a
+better suggestion. One- and two-character prefixes are answered from a precomputed
+table; longer ones rank the matching key range when it is short and otherwise walk the
+keys sharing the first BUCKET_LENGTH characters in rank order, so every query touches
+a bounded number of entries.
+
+The indexes of a table are rebuilt only when its catalog section is, i.e. after a
+write to that table; the other tables keep theirs.
+"""
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.catalog import CatalogSection, catalog
+from app.models.document_types_model import DocumentType
+from app.models.gov_model import GovNode
+from app.models.gov_node_services_model import GovNodeService
+from app.utils.i18n import SUPPORTED_LANGUAGES
+
+KEY_LENGTH = 32
+BUCKET_LENGTH = 3
+# key ranges up to this size are ranked directly instead of walking their bucket
+SCAN_LIMIT = 128
+MAX_SUGGESTIONS = 20
+
+# table -> (kind, name column prefix, flag a row must have set to be suggested)
+SOURCES: Dict[str, Tuple[str, str, Optional[str]]] = {
+    GovNodeService.__tablename__: ("service", "service_name", "is_active"),
+    GovNode.__tablename__: ("office", "name", None),
+    DocumentType.__tablename__: ("document", "name", None),
+}
+
+# zero-width joiners are optional when typing Sinhala conjuncts
+_IGNORED = dict.fromkeys(map(ord, "\u200c\u200d"), None)
+_WORD = re.compile(r"\S+")
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", text).translate(_IGNORED).casefold()
+
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: str
+    lang: str
+    count: int
+
+
+def _rank(name: Suggestion) -> tuple:
+    return (-name.count, len(name.text), name.text)
+
+
+class PrefixIndex:
+    """
+    Sorted keys of a set of distinct names, each pointing at its name's position.
+
+    :param whole_names: Key each name by its start; otherwise by every later word.
+    """
+
+    __slots__ = ("names", "keys", "entries", "top", "buckets")
+
+    def __init__(self, names: Iterable[Suggestion], whole_names: bool = True):
+        self.names = tuple(sorted(names, key=_rank))
+        pairs = []
+        for position, name in enumerate(self.names):
+            normalized = normalize(name.text)
+            starts = [word.start() for word in _WORD.finditer(normalized)]
+            for start in (starts[:1] if whole_names else starts[1:]):
+                pairs.append((normalized[start:start + KEY_LENGTH], position))
+        pairs.sort()
+        self.keys = tuple(key for key, _ in pairs)
+        self.entries = tuple(position for _, position in pairs)
+
+        top: Dict[str, List[int]] = {}
+        buckets: Dict[str, List[int]] = {}
+        # in rank order, so every list below is best first
+        for index in sorted(range(len(pairs)), key=self.entries.__getitem__):
+            key, position = pairs[index]
+            for length in range(1, min(BUCKET_LENGTH - 1, len(key)) + 1):
+                best = top.setdefault(key[:length], [])
+                if len(best) < MAX_SUGGESTIONS and position not in best:
+                    best.append(position)
+            buckets.setdefault(key[:BUCKET_LENGTH], []).append(index)
+        self.top = {prefix: tuple(positions) for prefix, positions in top.items()}
+        self.buckets = {prefix: tuple(indices) for prefix, indices in buckets.items()}
+
+    def _positions(self, prefix: str, limit: int) -> List[int]:
+        if len(prefix) < BUCKET_LENGTH:
+            return list(self.top.get(prefix, ())[:limit])
+
+        key = prefix[:KEY_LENGTH]
+        start = bisect_left(self.keys, key)
+        end = bisect_right(self.keys, key + "\U0010ffff", start)
+        if end - start <= SCAN_LIMIT:
+            positions = sorted(set(self.entries[start:end]))
+        else:
+            positions = []
+            for index in self.buckets.get(key[:BUCKET_LENGTH], ()):
+                if self.keys[index].startswith(key):
+                    position = self.entries[index]
+                    if position not in positions:
+                        positions.append(position)
+                        if len(positions) == limit and len(prefix) <= KEY_LENGTH:
+                            break
+        if len(prefix) > KEY_LENGTH:
+            positions = [position for position in positions if prefix in normalize(self.names[position].text)]
+        return positions[:limit]
+
+    def search(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """
+        Best `limit` names with a key starting with the normalized `prefix`.
+        """
+        if not prefix:
+            return []
+        return [self.names[position] for position in self._positions(prefix, limit)]
+
+
+def build_indexes(
+    section: CatalogSection, kind: str, column: str, lang: str, active: Optional[str] = None
+) -> Tuple[PrefixIndex, PrefixIndex]:
+    """
+    Whole-name and later-word indexes of the distinct `<column>_<lang>` names of a catalog
+    section, skipping the rows whose `active` flag is not set.
+    """
+    counts: Dict[str, int] = {}
+    fields = {f"{column}_{lang}", active} if active else {f"{column}_{lang}"}
+    for row in section.project(section.ids, fields=frozenset(fields)):
+        if active and not row[active]:
+            continue
+        text = (row[f"{column}_{lang}"] or "").strip()
+        if text:
+            counts[text] = counts.get(text, 0) + 1
+    names = [Suggestion(text, kind, lang, count) for text, count in counts.items()]
+    return PrefixIndex(names), PrefixIndex(names, whole_names=False)
+
+
+class Typeahead:
+    """
+    Prefix indexes of the catalog names, kept in step with the catalog snapshot.
+    """
+
+    def __init__(self, sources: Dict[str, Tuple[str, str, Optional[str]]] = SOURCES):
+        self.sources = sources
+        # table -> (section the indexes were built from, indexes by language)
+        self._indexes: Dict[str, Tuple[CatalogSection, Dict[str, Tuple[PrefixIndex, PrefixIndex]]]] = {}
+
+    def _table_indexes(self, table: str, section: CatalogSection) -> Dict[str, Tuple[PrefixIndex, PrefixIndex]]:
+        built = self._indexes.get(table)
+        if built is None or built[0] is not section:
+            kind, column, active = self.sources[table]
+            indexes = {lang: build_indexes(section, kind, column, lang, active) for lang in SUPPORTED_LANGUAGES}
+            self._indexes[table] = built = (section, indexes)
+        return built[1]
+
+    async def refresh(self, db: Session, *tables: str) -> Dict[str, Dict[str, Tuple[PrefixIndex, PrefixIndex]]]:
+        """
+        Indexes of `tables` (all by default), rebuilt where their catalog section changed.
+        """
+        tables = tables or tuple(self.sources)
+        snapshot = await catalog.snapshot(db, *tables)
+        return {table: self._table_indexes(table, snapshot[table]) for table in tables}
+
+    async def suggest(self, db: Session, prefix: str, lang: Optional[str] = None, kind: Optional[str] = None, limit: int = 10) -> List[Suggestion]:
+        """
+        Names starting with `prefix` first, then names with a later word starting with it.
+        """
+        tables = [table for table, (source_kind, *_) in self.sources.items() if kind in (None, source_kind)]
+        prefix = normalize(prefix).strip()
+        ranked = []
+        for indexes in (await self.refresh(db, *tables)).values():
+            for language in ((lang,) if lang else SUPPORTED_LANGUAGES):
+                for tier, index in enumerate(indexes[language]):
+                    ranked.extend((tier, *_rank(name), name) for name in index.search(prefix, limit))
+        ranked.sort(key=lambda item: item[:-1])
+        suggestions = []
+        for *_, name in ranked:
+            # a name matching at its start and at a later word is suggested once
+            if name not in suggestions:
+                suggestions.append(name)
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+
+typeahead = Typeahead()
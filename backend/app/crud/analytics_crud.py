@@ -1,39 +1,272 @@
+from datetime import date, timedelta
+from typing import Optional
+import numpy as np
+from sqlalchemy import literal_column, text
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
-from sqlalchemy.types import String
+from sqlalchemy.types import Float, String
+from fastapi import HTTPException
+from app.core.config import DASHBOARD_CACHE_TTL
+from app.core.state import get_state_backend
+from app.utils.logger import logger
+from app.utils.responses import FastJSONResponse, model_columns, column_keys, rows_to_dicts
+from app.utils.timeseries import bucket_starts, fill_gaps, nullable, rolling_mean, rolling_ratio
 from app.models.services_model import GovServiceCategory
-from app.models.service_ratings_model import ServiceRating
-from app.models.reservation_services_model import ReservationSlots
+from app.models.gov_model import GovNode
+from app.models.gov_node_services_model import GovNodeService
+from app.models.service_ratings_model import ServiceRating, ServiceRatingAggregate
+from app.models.reservation_services_model import ReservationRollup, CapacityRecommendation
+from app.schemas.analytics_schema import CapacityRecommendationSchema
+
+# every dashboard widget for every service of an office; no rows when the office does not exist
+OFFICE_DASHBOARD_SQL = text("""
+    WITH services AS (
+        SELECT service_id, service_type, service_name_en
+        FROM gov_node_services
+        WHERE gov_node_id = :office_id
+    ),
+    reservations AS (
+        SELECT r.service_id,
+               SUM(r.slots) FILTER (WHERE r.booking_date = CURRENT_DATE) AS today_count,
+               SUM(r.slots) FILTER (WHERE r.booking_date = CURRENT_DATE - 1) AS yesterday_count,
+               json_agg(json_build_object(
+                   'booking_date', r.booking_date::text,
+                   'max_reserved', r.reserved,
+                   'start_time', to_char(make_time(r.hour, 0, 0), 'HH24:MI:SS')
+               ) ORDER BY r.booking_date, r.hour) FILTER (WHERE r.slots > 0) AS most_reserved_slots
+        FROM reservation_rollups r
+        JOIN services USING (service_id)
+        GROUP BY r.service_id
+    )
+    SELECT s.service_id, s.service_type, s.service_name_en,
+           COALESCE(res.today_count, 0) AS today_count,
+           COALESCE(res.yesterday_count, 0) AS yesterday_count,
+           res.most_reserved_slots,
+           rt.rating_sum::float / NULLIF(rt.rating_count, 0) AS avg_rating,
+           COALESCE(rt.rating_count, 0) AS rating_count
+    FROM gov_nodes n
+    LEFT JOIN services s ON TRUE
+    LEFT JOIN reservations res ON res.service_id = s.service_id
+    LEFT JOIN service_rating_aggregates rt ON rt.service_id = s.service_id
+    WHERE n.id = :office_id
+    ORDER BY s.service_id
+""")
 
 def fetch_most_reserved_slots(reservation_id: int, db: Session):
+    # per booking date and start hour, from the rollups rather than every slot
     return db.query(
-        func.cast(ReservationSlots.booking_date, String).label("booking_date"),
-        func.max(ReservationSlots.reserved_count).label("max_reserved"),
-        func.cast(ReservationSlots.start_time, String).label("start_time")
-    ).filter(ReservationSlots.reservation_id == reservation_id) \
-    .group_by(ReservationSlots.booking_date, ReservationSlots.start_time) \
-    .order_by(ReservationSlots.booking_date).all()
+        func.cast(ReservationRollup.booking_date, String).label("booking_date"),
+        ReservationRollup.reserved.label("max_reserved"),
+        func.to_char(func.make_time(ReservationRollup.hour, 0, 0), "HH24:MI:SS").label("start_time")
+    ).filter(ReservationRollup.service_id == reservation_id, ReservationRollup.slots > 0) \
+    .order_by(ReservationRollup.booking_date, ReservationRollup.hour).all()
 
 def fetch_appointment_percentage_change(reservation_id: int, db: Session):
-    today_count = db.query(func.count(ReservationSlots.slot_id)).filter(
-        func.date(ReservationSlots.booking_date) == func.current_date(),
-        ReservationSlots.reservation_id == reservation_id
-    ).scalar()
-    yesterday_count = db.query(func.count(ReservationSlots.slot_id)).filter(
-        func.date(ReservationSlots.booking_date) == func.current_date() - 1,
-        ReservationSlots.reservation_id == reservation_id
-    ).scalar()
+    today_count, yesterday_count = db.query(
+        func.coalesce(func.sum(ReservationRollup.slots).filter(ReservationRollup.booking_date == func.current_date()), 0),
+        func.coalesce(func.sum(ReservationRollup.slots).filter(ReservationRollup.booking_date == func.current_date() - 1), 0)
+    ).filter(
+        ReservationRollup.service_id == reservation_id,
+        ReservationRollup.booking_date.between(func.current_date() - 1, func.current_date())
+    ).one()
     percentage_change = ((today_count - yesterday_count) / yesterday_count * 100) if yesterday_count > 0 else None
     return percentage_change
 
 def fetch_today_appointment_count(reservation_id: int, db: Session):
-    return db.query(func.count(ReservationSlots.slot_id)).filter(
-        func.date(ReservationSlots.booking_date) == func.current_date(),
-        ReservationSlots.reservation_id == reservation_id
+    return db.query(func.coalesce(func.sum(ReservationRollup.slots), 0)).filter(
+        ReservationRollup.booking_date == func.current_date(),
+        ReservationRollup.service_id == reservation_id
     ).scalar()
 
 def fetch_overall_satisfaction(db: Session):
+    # ratings reach their category through the service's office
     return db.query(
         GovServiceCategory.category_en,
-        func.avg(ServiceRating.rating).label("avg_rating")
-    ).join(ServiceRating, GovServiceCategory.id == ServiceRating.service_id).group_by(GovServiceCategory.category_en).all()
+        (func.cast(func.sum(ServiceRatingAggregate.rating_sum), Float) / func.nullif(func.sum(ServiceRatingAggregate.rating_count), 0)).label("avg_rating")
+    ).join(GovNode, GovNode.category_id == GovServiceCategory.id) \
+    .join(GovNodeService, GovNodeService.gov_node_id == GovNode.id) \
+    .join(ServiceRatingAggregate, ServiceRatingAggregate.service_id == GovNodeService.service_id) \
+    .filter(ServiceRatingAggregate.rating_count > 0) \
+    .group_by(GovServiceCategory.category_en).all()
+
+async def fetch_office_dashboard(office_id: int, db: Session) -> bytes:
+    """
+    The serialized dashboard of an office, with the analytics widgets of each of its
+    services from a single query; cached for DASHBOARD_CACHE_TTL seconds.
+    """
+    try:
+        key = f"dashboard:{office_id}"
+        backend = get_state_backend()
+        cached = await backend.cache_get(key)
+        if cached is not None:
+            return cached[1]
+
+        rows = db.execute(OFFICE_DASHBOARD_SQL, {"office_id": office_id}).mappings().all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Government office not found")
+
+        services = []
+        for row in rows:
+            if row["service_id"] is None:
+                continue
+            today_count, yesterday_count = int(row["today_count"]), int(row["yesterday_count"])
+            services.append({
+                "service_id": row["service_id"],
+                "service_type": row["service_type"],
+                "service_name_en": row["service_name_en"],
+                "most_reserved_slots": row["most_reserved_slots"] or [],
+                "today_count": today_count,
+                "percentage_change": (today_count - yesterday_count) / yesterday_count * 100 if yesterday_count > 0 else None,
+                "avg_rating": float(row["avg_rating"]) if row["avg_rating"] is not None else None,
+                "rating_count": row["rating_count"],
+            })
+        body = FastJSONResponse({"office_id": office_id, "services": services}).body
+        await backend.cache_set(key, body, DASHBOARD_CACHE_TTL)
+        return body
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        logger.error(f"Error building dashboard of office {office_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+def _bucketed_rows(metric: str, bucket: str, start: date, end: date, db: Session, service_id: Optional[int], office_id: Optional[int]) -> list:
+    # bucket is one of timeseries.BUCKETS; inlined so the select and GROUP BY expressions match
+    unit = literal_column(f"'{bucket}'")
+    if metric == "ratings":
+        key = func.date_trunc(unit, ServiceRating.created_at)
+        query = db.query(key, func.sum(ServiceRating.rating), func.count(ServiceRating.rating_id)).filter(
+            ServiceRating.created_at >= start, ServiceRating.created_at < end + timedelta(days=1)
+        )
+        if service_id is not None:
+            query = query.filter(ServiceRating.service_id == service_id)
+        else:
+            query = query.filter(ServiceRating.service_node_id == office_id)
+    else:
+        key = func.date_trunc(unit, ReservationRollup.booking_date + func.make_interval(0, 0, 0, 0, ReservationRollup.hour))
+        query = db.query(
+            key, func.sum(ReservationRollup.reserved), func.sum(ReservationRollup.capacity), func.sum(ReservationRollup.slots)
+        ).filter(ReservationRollup.booking_date.between(start, end))
+        if service_id is not None:
+            query = query.filter(ReservationRollup.service_id == service_id)
+        else:
+            query = query.join(GovNodeService, GovNodeService.service_id == ReservationRollup.service_id) \
+                .filter(GovNodeService.gov_node_id == office_id)
+    return query.group_by(key).order_by(key).all()
+
+def fetch_time_series(
+    metric: str,
+    bucket: str,
+    start: date,
+    end: date,
+    db: Session,
+    service_id: Optional[int] = None,
+    office_id: Optional[int] = None,
+    window: Optional[int] = None,
+) -> dict:
+    """
+    A metric of a service or office per bucket from `start` to `end`, as columns:
+    - bookings: places reserved in the bucket's slots
+    - utilisation: reserved places over offered capacity
+    - ratings: average rating of the ratings given in the bucket
+    `counts` holds the slots or ratings behind each value, and with `window` the
+    rolling average over that many buckets is added (weighted by capacity or ratings).
+    """
+    try:
+        rows = _bucketed_rows(metric, bucket, start, end, db, service_id, office_id)
+        buckets, *columns = list(zip(*rows)) or [()] * (3 if metric == "ratings" else 4)
+        starts = bucket_starts(bucket, start, end)
+
+        if metric == "ratings":
+            totals, counts = fill_gaps(starts, buckets, *columns)
+            numerators, denominators = totals, counts
+        else:
+            reserved, capacity, counts = fill_gaps(starts, buckets, *columns)
+            numerators, denominators = (reserved, np.ones(len(starts))) if metric == "bookings" else (reserved, capacity)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = np.where(denominators > 0, numerators / denominators, np.nan)
+
+        rolling = None
+        if window:
+            rolling = nullable(rolling_mean(values, window) if metric == "bookings" else rolling_ratio(numerators, denominators, window))
+        return {
+            "metric": metric,
+            "bucket": bucket,
+            "service_id": service_id,
+            "office_id": office_id,
+            "start": start,
+            "end": end,
+            "window": window,
+            "buckets": starts.astype("datetime64[s]").tolist(),
+            "values": nullable(values),
+            "counts": counts.astype(int).tolist(),
+            "rolling_average": rolling,
+        }
+
+    except Exception as e:
+        logger.error(f"Error building {metric} time series: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+def fetch_capacity_recommendations(service_id: int, db: Session) -> list[dict]:
+    """
+    The published capacity recommendations of a service, by weekday and hour.
+    """
+    columns = model_columns(CapacityRecommendation, CapacityRecommendationSchema)
+    rows = db.query(*columns).filter(CapacityRecommendation.service_id == service_id) \
+        .order_by(CapacityRecommendation.weekday, CapacityRecommendation.hour).all()
+    return rows_to_dicts(rows, column_keys(columns))
+
+def _rate(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+def fetch_office_attendance(office_id: int, start: date, end: date, db: Session) -> dict:
+    """
+    Utilisation, check-in and no-show counts and rates of an office's services from
+    `start` to `end`, with weekday x hour heatmaps of the reserved places and of the
+    utilisation (0 is Monday); read from the reservation rollups.
+    """
+    try:
+        if not db.query(GovNode.id).filter(GovNode.id == office_id).first():
+            raise HTTPException(status_code=404, detail="Government office not found")
+
+        isodow = func.extract("isodow", ReservationRollup.booking_date)
+        rows = db.query(
+            isodow, ReservationRollup.hour,
+            func.sum(ReservationRollup.capacity), func.sum(ReservationRollup.reserved),
+            func.sum(ReservationRollup.checked_in), func.sum(ReservationRollup.no_shows)
+        ).join(GovNodeService, GovNodeService.service_id == ReservationRollup.service_id) \
+        .filter(GovNodeService.gov_node_id == office_id, ReservationRollup.booking_date.between(start, end)) \
+        .group_by(isodow, ReservationRollup.hour).all()
+
+        columns = np.array(rows, dtype=float).reshape(-1, 6)
+        weekday, hour = columns[:, 0].astype(int) - 1, columns[:, 1].astype(int)
+        capacity, reserved = np.zeros((7, 24)), np.zeros((7, 24))
+        capacity[weekday, hour], reserved[weekday, hour] = columns[:, 2], columns[:, 3]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            utilisation = np.where(capacity > 0, reserved / capacity, np.nan)
+
+        total_capacity, total_reserved, checked_in, no_shows = (int(total) for total in columns[:, 2:].sum(axis=0))
+        marked = checked_in + no_shows
+        return {
+            "office_id": office_id,
+            "start": start,
+            "end": end,
+            "capacity": total_capacity,
+            "reserved": total_reserved,
+            "checked_in": checked_in,
+            "no_shows": no_shows,
+            "unmarked": total_reserved - marked,
+            "utilisation": _rate(total_reserved, total_capacity),
+            "attendance_rate": _rate(checked_in, marked),
+            "no_show_rate": _rate(no_shows, marked),
+            "heatmap": reserved.astype(int).tolist(),
+            "utilisation_heatmap": [nullable(row) for row in utilisation],
+        }
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        logger.error(f"Error building attendance of office {office_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,19 +1,27 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, text, tuple_
+from datetime import date, datetime, timedelta
+from typing import Optional, FrozenSet, Tuple
 from app.models import reservation_services_model, notification_model
 from app.schemas import reservation_schema
 from fastapi import HTTPException
+from app.utils.mapper import to_schema, to_schemas
+from app.utils.dataloader import DataLoader
+from app.utils.pagination import PageParams, paginate
+from app.core.geo import office_locator
+from app.db.rollups import apply_rollup_deltas, slot_totals, reservation_change, attendance_change
+from app.utils.responses import model_columns, column_keys, rows_to_dicts, check_projection
 from app.schemas.reservation_schema import ReservationSlotSchema, ReservationSlotSchemaCreate, ReservedUser, ReservedUserCreate, ReservationSlotUpdate, CitizenResponse
 
-async def get_available_slots_by_date(reservation_id: int, reservation_date: str, db: Session) -> list[reservation_schema.ReservationSlotSchema]:
+async def get_available_slots_by_date(reservation_id: int, reservation_date: str, db: Session, fields: Optional[FrozenSet[str]] = None) -> list[dict]:
     """
     Get all available slots for a specific reservation date
     where available capacity > 0
     """
     
     try:
-        slots = db.query(reservation_services_model.ReservationSlots).filter(
+        columns = check_projection(model_columns(reservation_services_model.ReservationSlots, reservation_schema.ReservationSlotSchema, fields))
+        slots = db.query(*columns).filter(
             reservation_services_model.ReservationSlots.reservation_id == reservation_id,
             reservation_services_model.ReservationSlots.booking_date == reservation_date
         ).all()
@@ -21,17 +29,7 @@ async def get_available_slots_by_date(reservation_id: int, reservation_date: str
         if not slots:
             raise HTTPException(status_code=404, detail="No available slots found")
 
-        return [reservation_schema.ReservationSlotSchema(
-            slot_id=slot.slot_id,
-            reservation_id=slot.reservation_id,
-            start_time=slot.start_time,
-            end_time=slot.end_time,
-            max_capacity=slot.max_capacity,
-            reserved_count=slot.reserved_count,
-            status=slot.status,
-            booking_date=slot.booking_date,
-            recurrent_count=slot.recurrent_count
-        ) for slot in slots]
+        return rows_to_dicts(slots, column_keys(columns))
     
     except HTTPException as error:
         raise error
@@ -39,34 +37,25 @@ async def get_available_slots_by_date(reservation_id: int, reservation_date: str
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching available slots: {str(e)}")
 
-async def get_available_slots(service_id: int, db: Session) -> list[reservation_schema.ReservationSlotSchema]:
+async def get_available_slots(service_id: int, db: Session, fields: Optional[FrozenSet[str]] = None) -> list[dict]:
     """
     Get all available slots for a specific service
     where available capacity > 0
     """
     
     try:
-        slots = db.query(reservation_services_model.ReservationSlots).filter(reservation_services_model.ReservationSlots.reservation_id == service_id).all()
+        columns = check_projection(model_columns(reservation_services_model.ReservationSlots, reservation_schema.ReservationSlotSchema, fields))
+        slots = db.query(*columns).filter(reservation_services_model.ReservationSlots.reservation_id == service_id).all()
         if slots is None:
             raise HTTPException(status_code=404, detail="No slots found for this service")
 
-        return [reservation_schema.ReservationSlotSchema(
-            slot_id=slot.slot_id,
-            reservation_id=slot.reservation_id,
-            start_time=slot.start_time,
-            end_time=slot.end_time,
-            max_capacity=slot.max_capacity,
-            reserved_count=slot.reserved_count,
-            status=slot.status,
-            booking_date=slot.booking_date,
-            recurrent_count=slot.recurrent_count
-        ) for slot in slots]
+        return rows_to_dicts(slots, column_keys(columns))
     
     except HTTPException as error:
         raise error
 
     except Exception as e:
-        HTTPException(status_code=500, detail=f"Error fetching slots: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching slots: {str(e)}")
 
 async def create_slot(slot_data: reservation_schema.ReservationSlotSchemaCreate, db: Session) -> list[reservation_schema.ReservationSlotSchema]:
     """
@@ -98,26 +87,14 @@ async def create_slot(slot_data: reservation_schema.ReservationSlotSchemaCreate,
 
         # Bulk add and commit in a single transaction
         db.add_all(slots_to_create)
+        apply_rollup_deltas(db, [slot_totals(slot) for slot in slots_to_create])
         db.commit()
 
         # Refresh to populate autogenerated fields (slot_id)
         for s in slots_to_create:
             db.refresh(s)
 
-        # Convert to response schemas
-        created = [reservation_schema.ReservationSlotSchema(
-            slot_id=s.slot_id,
-            reservation_id=s.reservation_id,
-            start_time=s.start_time,
-            end_time=s.end_time,
-            max_capacity=s.max_capacity,
-            reserved_count=s.reserved_count,
-            status=s.status,
-            booking_date=s.booking_date,
-            recurrent_count=s.recurrent_count
-        ) for s in slots_to_create]
-
-        return created
+        return to_schemas(slots_to_create, reservation_schema.ReservationSlotSchema)
 
     except Exception as e:
         # Rollback in case of error and surface as HTTPException
@@ -129,25 +106,129 @@ async def create_slot(slot_data: reservation_schema.ReservationSlotSchemaCreate,
 
 
 
+def _slots_by_id(slot_ids: list[int], db: Session) -> dict:
+    columns = model_columns(reservation_services_model.ReservationSlots, ReservationSlotSchema)
+    rows = db.query(*columns).filter(
+        reservation_services_model.ReservationSlots.slot_id.in_(set(slot_ids))
+    ).all()
+    return {slot["slot_id"]: slot for slot in rows_to_dicts(rows, column_keys(columns))}
+
+async def get_slots_by_ids(slot_ids: list[int], db: Session) -> list[dict]:
+    """
+    Get the slots with the given ids in one query, in the order of `slot_ids`.
+    Unknown ids are left out.
+    """
+    try:
+        by_id = _slots_by_id(slot_ids, db)
+        return [by_id[slot_id] for slot_id in dict.fromkeys(slot_ids) if slot_id in by_id]
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching slots: {str(e)}")
+
+async def get_earliest_free_slots(service_ids: list[int], db: Session) -> dict:
+    """
+    The earliest upcoming slot with free capacity of each of `service_ids`, in one
+    DISTINCT ON query, as service id -> slot dict. Services without one are left out.
+    """
+    try:
+        if not service_ids:
+            return {}
+        slots = reservation_services_model.ReservationSlots
+        now = datetime.now().replace(microsecond=0)
+        rows = db.query(
+            slots.slot_id, slots.reservation_id, slots.booking_date, slots.start_time, slots.end_time,
+        ).filter(
+            slots.reservation_id.in_(set(service_ids)),
+            slots.reserved_count < slots.max_capacity,
+            tuple_(slots.booking_date, slots.start_time) >= (now.date(), now.time()),
+        ).distinct(slots.reservation_id).order_by(
+            slots.reservation_id, slots.booking_date, slots.start_time,
+        ).all()
+        keys = ("slot_id", "service_id", "booking_date", "start_time", "end_time")
+        return {slot["service_id"]: slot for slot in rows_to_dicts(rows, keys)}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching free slots: {str(e)}")
+
+# the first :limit free slots of each service walk the (reservation_id, booking_date,
+# start_time) index and stop early; only those few per service are sorted at the end
+EARLIEST_FREE_SLOTS_SQL = text("""
+    SELECT slot.slot_id, slot.reservation_id, slot.booking_date, slot.start_time, slot.end_time, slot.free_capacity
+    FROM unnest(CAST(:service_ids AS integer[])) AS service(id)
+    CROSS JOIN LATERAL (
+        SELECT slot_id, reservation_id, booking_date, start_time, end_time,
+               max_capacity - reserved_count AS free_capacity
+        FROM reservation_slots
+        WHERE reservation_id = service.id
+          AND booking_date BETWEEN :date_from AND :date_to
+          AND (booking_date, start_time) >= (:today, :now)
+          AND reserved_count < max_capacity
+        ORDER BY booking_date, start_time
+        LIMIT :limit
+    ) AS slot
+    ORDER BY slot.booking_date, slot.start_time, slot.slot_id
+    LIMIT :limit
+""")
+
+async def get_earliest_slots_for_service_type(
+    service_type: str,
+    date_from: date,
+    date_to: date,
+    db: Session,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    max_km: Optional[float] = None,
+    limit: int = 10,
+) -> list[dict]:
+    """
+    The soonest upcoming slots with free capacity between `date_from` and `date_to`
+    across every active service of `service_type`, optionally only at offices within
+    `max_km` of a point.
+
+    The services are resolved from the catalog snapshot; the slots come from one
+    query that takes at most `limit` slots per service in index order (see
+    EARLIEST_FREE_SLOTS_SQL) and keeps the soonest of those.
+    """
+    try:
+        offices = await office_locator.offering(db, service_type, latitude, longitude, max_km)
+        services = {service: (office, distance) for office, (distance, ids) in offices.items() for service in ids}
+        if not services:
+            return []
+        now = datetime.now().replace(microsecond=0)
+        rows = db.execute(EARLIEST_FREE_SLOTS_SQL, {
+            "service_ids": list(services), "date_from": date_from, "date_to": date_to,
+            "today": now.date(), "now": now.time(), "limit": limit,
+        }).all()
+
+        result = rows_to_dicts(rows, ("slot_id", "reservation_id", "booking_date", "start_time", "end_time", "free_capacity"))
+        for slot in result:
+            office, distance = services[slot["reservation_id"]]
+            slot["gov_node_id"] = office
+            slot["distance_km"] = round(distance, 3) if distance is not None else None
+        return result
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching earliest slots: {str(e)}")
+
+def _load_slots(slot_ids: list[int], bind) -> dict:
+    with Session(bind=bind) as db:
+        return _slots_by_id(slot_ids, db)
+
+slot_loader = DataLoader(_load_slots)
+
 async def get_slot(slot_id: int, db: Session) -> ReservationSlotSchema:
     """
-    Get a slot by slot_id
+    Get a slot by slot_id. Concurrent lookups on the same engine as `db` are
+    batched by `slot_loader`.
     """
     try:
-        slot = db.query(reservation_services_model.ReservationSlots).filter_by(slot_id=slot_id).first()
+        slot = await slot_loader.load(slot_id, db.get_bind())
         if not slot:
             raise HTTPException(status_code=404, detail="Slot not found")
-        return ReservationSlotSchema(
-            slot_id=slot.slot_id,
-            reservation_id=slot.reservation_id,
-            start_time=slot.start_time,
-            end_time=slot.end_time,
-            max_capacity=slot.max_capacity,
-            reserved_count=slot.reserved_count,
-            status=slot.status,
-            booking_date=slot.booking_date,
-            recurrent_count=slot.recurrent_count
-        )
+        return ReservationSlotSchema.model_validate(slot)
     
     except HTTPException as error:
         raise error
@@ -163,22 +244,14 @@ async def update_slot(slot_id: int, slot_data: ReservationSlotUpdate, db: Sessio
         slot = db.query(reservation_services_model.ReservationSlots).filter_by(slot_id=slot_id).first()
         if not slot:
             raise HTTPException(status_code=404, detail="Slot not found")
+        before = slot_totals(slot, -1)
         for field in ["start_time", "end_time", "max_capacity", "reserved_count", "status"]:
             if hasattr(slot_data, field):
                 setattr(slot, field, getattr(slot_data, field))
+        apply_rollup_deltas(db, [before, slot_totals(slot)])
         db.commit()
         db.refresh(slot)
-        return ReservationSlotSchema(
-            slot_id=slot.slot_id,
-            reservation_id=slot.reservation_id,
-            start_time=slot.start_time,
-            end_time=slot.end_time,
-            max_capacity=slot.max_capacity,
-            reserved_count=slot.reserved_count,
-            status=slot.status,
-            booking_date=slot.booking_date,
-            recurrent_count=slot.recurrent_count
-        )
+        return to_schema(slot, ReservationSlotSchema)
 
     except HTTPException as error:
         raise error
@@ -207,6 +280,7 @@ async def modify_reserved_count(slot_id: int, action: str, db: Session):
                 raise HTTPException(status_code=400, detail="Reserved count already zero")
         else:
             raise HTTPException(status_code=400, detail="Invalid action")
+        apply_rollup_deltas(db, [reservation_change(slot, booked=action == "add")])
         db.commit()
         db.refresh(slot)
         return {"slot_id": slot.slot_id, "reserved_count": slot.reserved_count}
@@ -225,6 +299,7 @@ async def delete_slot(slot_id: int, db: Session):
         slot = db.query(reservation_services_model.ReservationSlots).filter_by(slot_id=slot_id).first()
         if not slot:
             raise HTTPException(status_code=404, detail="Slot not found")
+        apply_rollup_deltas(db, [slot_totals(slot, -1)])
         db.delete(slot)
         db.commit()
         return {"detail": "Slot deleted successfully"}
@@ -254,12 +329,7 @@ async def get_reserved_user(reference_id: int, db: Session) -> ReservedUser:
         db.add(notification)
         db.commit()
 
-        return ReservedUser(
-            reference_id=user.reference_id,
-            slot_id=user.slot_id,
-            citizen_nic=user.citizen_nic,
-            citizen=None # Optionally fetch and serialize citizen details
-        )
+        return to_schema(user, ReservedUser)
 
     except HTTPException as error:
         raise error
@@ -284,17 +354,12 @@ async def add_reserved_user(user_data: ReservedUserCreate, db: Session) -> Reser
         
         slot.reserved_count += 1
         db.add(new_user)
+        apply_rollup_deltas(db, [reservation_change(slot, booked=True)])
         db.commit()
         db.refresh(new_user)
 
-        citizen_obj = new_user.citizen
-        document_links = []
-        if citizen_obj and citizen_obj.document_links:
-            # citizen_obj.document_links is JSON, so it's already a list of dicts
-            document_links = citizen_obj.document_links
-
         notification = notification_model.Notification(
-            nic=citizen_obj.nic,
+            nic=new_user.citizen_nic,
             message="You have successfully reserved a slot.",
             status="approved",
             created_at=datetime.now()
@@ -302,23 +367,7 @@ async def add_reserved_user(user_data: ReservedUserCreate, db: Session) -> Reser
         db.add(notification)
         db.commit()
 
-        return ReservedUser(
-            reference_id=new_user.reference_id,
-            slot_id=new_user.slot_id,
-            citizen_nic=new_user.citizen_nic,
-            citizen=CitizenResponse(
-                id=citizen_obj.id if citizen_obj else None,
-                nic=citizen_obj.nic if citizen_obj else None,
-                first_name=citizen_obj.first_name if citizen_obj else None,
-                last_name=citizen_obj.last_name if citizen_obj else None,
-                email=citizen_obj.email if citizen_obj else None,
-                phone=citizen_obj.phone if citizen_obj else None,
-                role=citizen_obj.role if citizen_obj else None,
-                document_links=document_links,
-                active=citizen_obj.active if citizen_obj else None,
-                created_at=citizen_obj.created_at if citizen_obj else None
-            ) if citizen_obj else None
-        )
+        return to_schema(new_user, ReservedUser)
 
     except HTTPException as error:
         raise error
@@ -335,8 +384,12 @@ async def delete_reserved_user(reference_id: int, db: Session):
         if not user:
             raise HTTPException(status_code=404, detail="Reserved user not found")
         slot = db.query(reservation_services_model.ReservationSlots).filter_by(slot_id=user.slot_id).first()
-        if slot and slot.reserved_count > 0:
-            slot.reserved_count -= 1
+        if slot:
+            deltas = [attendance_change(slot, user.attendance, None)]
+            if slot.reserved_count > 0:
+                slot.reserved_count -= 1
+                deltas.append(reservation_change(slot, booked=False))
+            apply_rollup_deltas(db, deltas)
         db.delete(user)
         db.commit()
 
@@ -357,36 +410,67 @@ async def delete_reserved_user(reference_id: int, db: Session):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting reserved user: {str(e)}")
 
-async def get_reserved_slot_details(nic: str, db: Session) -> list[ReservationSlotSchema]:
+async def set_attendance(reference_id: int, attendance: str, db: Session) -> ReservedUser:
     """
-    Get reserved slot details for a user by NIC
+    Record whether the citizen of a reservation checked in or did not show up
     """
     try:
-        # Fetch ReservedUser rows for the given NIC and extract slot_id integers
-        reserved_users = db.query(reservation_services_model.ReservedUser).filter(
-            reservation_services_model.ReservedUser.citizen_nic == nic
-        ).all()
+        # locked, so a concurrent update cannot compute its delta from the same old attendance
+        user = db.query(reservation_services_model.ReservedUser).filter_by(reference_id=reference_id).with_for_update().first()
+        if not user:
+            raise HTTPException(status_code=404, detail="Reserved user not found")
+        slot = db.query(reservation_services_model.ReservationSlots).filter_by(slot_id=user.slot_id).first()
+        if attendance == "no_show" and slot and slot.booking_date > date.today():
+            raise HTTPException(status_code=400, detail="Cannot mark a no-show before the reservation date")
+
+        if attendance != user.attendance:
+            if slot:
+                apply_rollup_deltas(db, [attendance_change(slot, user.attendance, attendance)])
+            user.attendance = attendance
+            user.checked_in_at = datetime.now() if attendance == "checked_in" else None
+            db.commit()
+        db.refresh(user)
+        return to_schema(user, ReservedUser)
 
-        slot_ids = [ru.slot_id for ru in reserved_users]
+    except HTTPException as error:
+        raise error
 
-        if not slot_ids:
-            return []
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error updating attendance: {str(e)}")
 
-        reserved_slots = db.query(reservation_services_model.ReservationSlots).filter(
-            reservation_services_model.ReservationSlots.slot_id.in_(slot_ids)
+async def get_reserved_users_by_ids(reference_ids: list[int], db: Session) -> list[ReservedUser]:
+    """
+    Get the reservations with the given reference ids, with their citizens loaded in a
+    second IN query instead of one query per reservation. Unknown ids are left out.
+    """
+    try:
+        users = db.query(reservation_services_model.ReservedUser).options(
+            selectinload(reservation_services_model.ReservedUser.citizen)
+        ).filter(
+            reservation_services_model.ReservedUser.reference_id.in_(set(reference_ids))
         ).all()
+        by_id = {user.reference_id: user for user in to_schemas(users, ReservedUser)}
+        return [by_id[reference_id] for reference_id in dict.fromkeys(reference_ids) if reference_id in by_id]
 
-        return [ReservationSlotSchema(
-            slot_id=slot.slot_id,
-            reservation_id=slot.reservation_id,
-            start_time=slot.start_time,
-            end_time=slot.end_time,
-            max_capacity=slot.max_capacity,
-            reserved_count=slot.reserved_count,
-            status=slot.status,
-            booking_date=slot.booking_date,
-            recurrent_count=slot.recurrent_count
-        ) for slot in reserved_slots]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching reserved users: {str(e)}")
+
+async def get_reserved_slot_details(nic: str, db: Session, fields: Optional[FrozenSet[str]] = None) -> list[dict]:
+    """
+    Get reserved slot details for a user by NIC
+    """
+    try:
+        columns = check_projection(model_columns(reservation_services_model.ReservationSlots, ReservationSlotSchema, fields))
+        # slot ids reserved by this NIC are resolved in the same query
+        slot_ids = db.query(reservation_services_model.ReservedUser.slot_id).filter(
+            reservation_services_model.ReservedUser.citizen_nic == nic
+        )
+        reserved_slots = db.query(*columns).filter(
+            reservation_services_model.ReservationSlots.slot_id.in_(slot_ids.scalar_subquery())
+        ).all()
+
+        return rows_to_dicts(reserved_slots, column_keys(columns))
 
     except HTTPException as error:
         raise error
@@ -395,35 +479,39 @@ async def get_reserved_slot_details(nic: str, db: Session) -> list[ReservationSl
         raise HTTPException(status_code=500, detail=f"Error fetching reserved slot details: {str(e)}")
 
 
-async def get_reserved_users(slot_id: int, db: Session) -> list[ReservedUser]:
+async def get_reserved_users(
+    slot_id: int, db: Session, fields: Optional[FrozenSet[str]] = None, page: PageParams = PageParams()
+) -> Tuple[list[ReservedUser] | list[dict], Optional[str]]:
     """
-    Get reserved users for a specific slot
+    Get one page of reserved users for a specific slot and the cursor of the next page.
+    Unless `fields` asks for the nested citizen, the citizen row (and its document links)
+    is not loaded at all.
     """
     try:
-        users = db.query(reservation_services_model.ReservedUser).filter(
+        keys = (reservation_services_model.ReservedUser.reference_id,)
+        if fields and "citizen" not in fields:
+            columns = check_projection(model_columns(reservation_services_model.ReservedUser, ReservedUser, fields))
+            query = db.query(*columns).filter(
+                reservation_services_model.ReservedUser.slot_id == slot_id
+            )
+            users, next_cursor = paginate(query, keys, page)
+            if not users:
+                raise HTTPException(status_code=404, detail="No reserved users found for this slot")
+            return rows_to_dicts(users, column_keys(columns)), next_cursor
+
+        query = db.query(reservation_services_model.ReservedUser).options(
+            selectinload(reservation_services_model.ReservedUser.citizen)
+        ).filter(
             reservation_services_model.ReservedUser.slot_id == slot_id
-        ).all()
+        )
+        users, next_cursor = paginate(query, keys, page)
 
         if not users:
             raise HTTPException(status_code=404, detail="No reserved users found for this slot")
 
-        return [ReservedUser(
-            reference_id=user.reference_id,
-            slot_id=user.slot_id,
-            citizen_nic=user.citizen_nic,
-            citizen=CitizenResponse(
-                id=user.citizen.id if user.citizen else None,
-                nic=user.citizen.nic if user.citizen else None,
-                first_name=user.citizen.first_name if user.citizen else None,
-                last_name=user.citizen.last_name if user.citizen else None,
-                email=user.citizen.email if user.citizen else None,
-                phone=user.citizen.phone if user.citizen else None,
-                role=user.citizen.role if user.citizen else None,
-                document_links=user.citizen.document_links if user.citizen and user.citizen.document_links else [],
-                active=user.citizen.active if user.citizen else None,
-                created_at=user.citizen.created_at if user.citizen else None
-            )
-        ) for user in users]
+        if fields:
+            return [user.model_dump(mode="json", include=fields) for user in to_schemas(users, ReservedUser)], next_cursor
+        return to_schemas(users, ReservedUser), next_cursor
 
     except HTTPException as error:
         raise error
@@ -440,6 +528,7 @@ async def delete_slot(slot_id: int, db: Session) -> dict:
         if not slot:
             raise HTTPException(status_code=404, detail="Reservation slot not found")
 
+        apply_rollup_deltas(db, [slot_totals(slot, -1)])
         db.delete(slot)
         db.commit()
 
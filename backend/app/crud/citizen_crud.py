@@ -1,13 +1,17 @@
 from app.schemas import citizen_schema, registration_schema, response_schema, notification_schema
 from app.models import registration_model, citizen_model, notification_model
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from typing import Optional, List
+from typing import Optional, List, Set, Tuple
 from app.utils.hashing import hash_password, verify_password
 from app.utils.send_emails import send, get_temporary_password_email_html, get_password_change_email_html
 from app.utils.password_generator import generate_temp_password
 from app.utils.document_serializer import serialize_document_links, deserialize_document_links
 from app.utils.logger import logger
+from app.utils.mapper import to_schema, to_schemas
+from app.utils.dataloader import DataLoader
 from datetime import datetime
 
 async def create_citizen_registration(
@@ -50,8 +54,6 @@ async def create_citizen_registration(
         #         registration_schema.DocumentJsonDict(**doc)
         #     )
 
-        document_links_response = serialize_document_links(new_registration.document_links)
-
         notification = notification_model.Notification(
             nic=new_registration.nic,
             message="Your registration has been completed successfully.",
@@ -61,18 +63,7 @@ async def create_citizen_registration(
         db.add(notification)
         db.commit()
 
-        return registration_schema.RegistrationResponse(
-            reference_id=new_registration.reference_id,
-            nic=new_registration.nic,
-            first_name=new_registration.first_name,
-            last_name=new_registration.last_name,
-            email=new_registration.email,
-            phone=new_registration.phone,
-            role=new_registration.role,
-            active=new_registration.active,
-            document_links=document_links_response,
-            created_at=new_registration.created_at
-        )
+        return to_schema(new_registration, registration_schema.RegistrationResponse)
     except Exception as e:
         db.rollback()
         logger.error(f"Error creating citizen registration: {e}")
@@ -97,8 +88,6 @@ async def authenticate_citizen(
             logger.error("Invalid password")
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        document_links_response = serialize_document_links(db_citizen.document_links)
-
         notification = notification_model.Notification(
             nic=db_citizen.nic,
             message="You have successfully logged in.",
@@ -108,18 +97,7 @@ async def authenticate_citizen(
         db.add(notification)
         db.commit()
 
-        return citizen_schema.CitizenResponse(
-            id=db_citizen.id,
-            nic=db_citizen.nic,
-            first_name=db_citizen.first_name,
-            last_name=db_citizen.last_name,
-            email=db_citizen.email,
-            phone=db_citizen.phone,
-            role=db_citizen.role,
-            active=db_citizen.active,
-            document_links=document_links_response,
-            created_at=db_citizen.created_at
-        )
+        return to_schema(db_citizen, citizen_schema.CitizenResponse)
 
     except HTTPException as error:
         raise error
@@ -128,33 +106,43 @@ async def authenticate_citizen(
         logger.error(f"Error authenticating citizen: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def _citizens_by_nic(nics: List[str], db: Session) -> dict:
+    db_citizens = db.query(citizen_model.Citizen).filter(citizen_model.Citizen.nic.in_(set(nics))).all()
+    return {citizen.nic: citizen for citizen in to_schemas(db_citizens, citizen_schema.CitizenResponse)}
+
+async def get_citizens_by_nics(nics: List[str], db: Session) -> List[citizen_schema.CitizenResponse]:
+    """
+    Get the citizens with the given NICs in one query, in the order of `nics`.
+    NICs without a citizen are left out.
+    """
+    try:
+        by_nic = _citizens_by_nic(nics, db)
+        return [by_nic[nic] for nic in dict.fromkeys(nics) if nic in by_nic]
+
+    except Exception as e:
+        logger.error(f"Error getting citizens by NIC: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+def _load_citizens(nics: List[str], bind) -> dict:
+    with Session(bind=bind) as db:
+        return _citizens_by_nic(nics, db)
+
+# collapses the per-request citizen lookups (e.g. from get_current_citizen) of one event-loop tick
+citizen_loader = DataLoader(_load_citizens)
+
 async def get_citizen_by_nic(nic: str, db: Session) -> Optional[citizen_schema.CitizenResponse]:
     """
-    Get a citizen by their NIC.
+    Get a citizen by their NIC. Concurrent lookups on the same engine as `db` are
+    batched by `citizen_loader`, which runs in its own session.
     """
     try:
-        db_citizen = db.query(citizen_model.Citizen).filter(
-            citizen_model.Citizen.nic == nic
-        ).first()
+        db_citizen = await citizen_loader.load(nic, db.get_bind())
 
         if not db_citizen:
             logger.error("Citizen not found")
             raise HTTPException(status_code=404, detail="Citizen not found")
 
-        document_links_response = serialize_document_links(db_citizen.document_links)
-
-        return citizen_schema.CitizenResponse(
-            id=db_citizen.id,
-            nic=db_citizen.nic,
-            first_name=db_citizen.first_name,
-            last_name=db_citizen.last_name,
-            email=db_citizen.email,
-            phone=db_citizen.phone,
-            role=db_citizen.role,
-            active=db_citizen.active,
-            document_links=document_links_response,
-            created_at=db_citizen.created_at
-        )
+        return db_citizen
     
     except HTTPException as error:
         raise error
@@ -163,6 +151,36 @@ async def get_citizen_by_nic(nic: str, db: Session) -> Optional[citizen_schema.C
         logger.error(f"Error getting citizen by NIC: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+async def get_citizen_document_type_ids(nic: str, db: Session) -> Set[int]:
+    """
+    Ids of the document types the citizen has a document for.
+    """
+    try:
+        documents = citizen_model.CitizenDocument
+        rows = db.query(documents.document_type_id).filter(documents.nic == nic).all()
+        if not rows and not db.query(citizen_model.Citizen.id).filter(citizen_model.Citizen.nic == nic).first():
+            raise HTTPException(status_code=404, detail="Citizen not found")
+        return {row.document_type_id for row in rows}
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        logger.error(f"Error getting citizen document types: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+def _split_document_links(nic: str, document_links) -> Tuple[List[citizen_model.CitizenDocument], list]:
+    """
+    Typed links as citizen_documents rows (the last one wins per type), and the
+    untyped ones serialized for the legacy document_links column.
+    """
+    typed = {doc.document_type_id: doc for doc in document_links or [] if doc.document_type_id is not None}
+    rows = [
+        citizen_model.CitizenDocument(nic=nic, document_type_id=type_id, title=doc.title, url=doc.url, uploaded_at=doc.uploaded_at)
+        for type_id, doc in typed.items()
+    ]
+    return rows, serialize_document_links([doc for doc in document_links or [] if doc.document_type_id is None])
+
 async def create_citizen_account(
     citizen: citizen_schema.CitizenCreate, db: Session
 ) -> Optional[citizen_schema.CitizenResponse]:
@@ -181,8 +199,7 @@ async def create_citizen_account(
             temp_password=temp_password
         )
 
-        # Serialize document_links before saving
-        serialized_links = serialize_document_links(citizen.document_links)
+        documents, untyped_links = _split_document_links(citizen.nic, citizen.document_links)
 
         new_citizen = citizen_model.Citizen(
             nic=citizen.nic,
@@ -192,7 +209,8 @@ async def create_citizen_account(
             phone=citizen.phone,
             password=hashed_password,
             active=citizen.active,
-            document_links=serialized_links
+            document_links=untyped_links,
+            documents=documents,
         )
         db.add(new_citizen)
         db.commit()
@@ -217,18 +235,7 @@ async def create_citizen_account(
             html_content=html_content
         )
 
-        return citizen_schema.CitizenResponse(
-            id=new_citizen.id,
-            nic=new_citizen.nic,
-            first_name=new_citizen.first_name,
-            last_name=new_citizen.last_name,
-            email=new_citizen.email,
-            phone=new_citizen.phone,
-            role=new_citizen.role,
-            active=new_citizen.active,
-            document_links=serialize_document_links(new_citizen.document_links),
-            created_at=new_citizen.created_at
-        )
+        return to_schema(new_citizen, citizen_schema.CitizenResponse)
     except Exception as e:
         logger.error(f"Error creating citizen account: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -273,18 +280,7 @@ async def reset_password(
         db.add(notification)
         db.commit()
 
-        return citizen_schema.CitizenResponse(
-            id=db_citizen.id,
-            nic=db_citizen.nic,
-            first_name=db_citizen.first_name,
-            last_name=db_citizen.last_name,
-            email=db_citizen.email,
-            phone=db_citizen.phone,
-            role=db_citizen.role,
-            active=db_citizen.active,
-            document_links=serialize_document_links(db_citizen.document_links),
-            created_at=db_citizen.created_at
-        )
+        return to_schema(db_citizen, citizen_schema.CitizenResponse)
     
     except HTTPException as error:
         logger.error(f"Error updating citizen: {error.detail}")
@@ -298,7 +294,8 @@ async def update_citizen_document_links(
     citizen: citizen_schema.CitizenUpdateDocumentLinks, db: Session
 ) -> Optional[citizen_schema.CitizenResponse]:
     """
-    Update the document links of an existing citizen.
+    Replace all documents of an existing citizen. Superseded by the per-document
+    endpoints, which do not rewrite the others.
     """
     try:
         db_citizen = db.query(citizen_model.Citizen).filter(citizen_model.Citizen.nic == citizen.nic).first()
@@ -306,8 +303,10 @@ async def update_citizen_document_links(
             logger.error("Citizen not found")
             raise HTTPException(status_code=404, detail="Citizen not found")
 
-        # Update document links
-        db_citizen.document_links = serialize_document_links(citizen.document_links)
+        documents, untyped_links = _split_document_links(citizen.nic, citizen.document_links)
+        db.query(citizen_model.CitizenDocument).filter(citizen_model.CitizenDocument.nic == citizen.nic).delete(synchronize_session=False)
+        db.add_all(documents)
+        db_citizen.document_links = untyped_links
 
         db.commit()
         db.refresh(db_citizen)
@@ -321,18 +320,7 @@ async def update_citizen_document_links(
         db.add(notification)
         db.commit()
 
-        return citizen_schema.CitizenResponse(
-            id=db_citizen.id,
-            nic=db_citizen.nic,
-            first_name=db_citizen.first_name,
-            last_name=db_citizen.last_name,
-            email=db_citizen.email,
-            phone=db_citizen.phone,
-            role=db_citizen.role,
-            active=db_citizen.active,
-            document_links=serialize_document_links(db_citizen.document_links),
-            created_at=db_citizen.created_at
-        )
+        return to_schema(db_citizen, citizen_schema.CitizenResponse)
 
     except HTTPException as error:
         logger.error(f"Error updating citizen: {error.detail}")
@@ -340,4 +328,78 @@ async def update_citizen_document_links(
 
     except Exception as e:
         logger.error(f"Error updating citizen: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def get_citizen_documents(nic: str, db: Session) -> List[citizen_schema.CitizenDocumentResponse]:
+    """
+    Get the documents of a citizen by document type, followed by the legacy links
+    that have no type.
+    """
+    try:
+        legacy = db.query(citizen_model.Citizen.document_links).filter(citizen_model.Citizen.nic == nic).first()
+        if not legacy:
+            raise HTTPException(status_code=404, detail="Citizen not found")
+        documents = citizen_model.CitizenDocument
+        rows = db.query(documents).filter(documents.nic == nic).order_by(documents.document_type_id).all()
+        # typed legacy links were copied into citizen_documents, so only the untyped ones are added
+        untyped = [
+            citizen_schema.CitizenDocumentResponse(title=doc["title"], url=doc["url"], uploaded_at=doc.get("uploaded_at"))
+            for doc in legacy.document_links or []
+            if doc.get("document_type_id") is None
+        ]
+        return to_schemas(rows, citizen_schema.CitizenDocumentResponse) + untyped
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        logger.error(f"Error getting citizen documents: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def put_citizen_document(
+    nic: str, document_type_id: int, document: citizen_schema.CitizenDocumentCreate, db: Session
+) -> citizen_schema.CitizenDocumentResponse:
+    """
+    Add the citizen's document of a type, or replace it if there is one, in one
+    INSERT .. ON CONFLICT statement that leaves the other documents untouched.
+    """
+    try:
+        documents = citizen_model.CitizenDocument
+        values = dict(title=document.title, url=document.url, uploaded_at=document.uploaded_at)
+        statement = insert(documents).values(nic=nic, document_type_id=document_type_id, **values)
+        statement = statement.on_conflict_do_update(constraint="uq_citizen_document", set_=values).returning(documents)
+        row = db.execute(statement).scalars().first()
+        db.commit()
+        return to_schema(row, citizen_schema.CitizenDocumentResponse)
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Error saving citizen document: {e}")
+        raise HTTPException(status_code=404, detail="Citizen or document type not found")
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error saving citizen document: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def delete_citizen_document(nic: str, document_type_id: int, db: Session) -> response_schema.ResponseMsg:
+    """
+    Delete the citizen's document of a type.
+    """
+    try:
+        documents = citizen_model.CitizenDocument
+        deleted = db.query(documents).filter(
+            documents.nic == nic, documents.document_type_id == document_type_id
+        ).delete(synchronize_session=False)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Document not found")
+        db.commit()
+        return response_schema.ResponseMsg(message="Document deleted successfully")
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error deleting citizen document: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,102 @@
+"""
+The category -> office -> service directory behind the citizen home screen.
+
+The tree is loaded with selectinload in three queries (plus one for the next free
+slots), serialized once and kept in the shared cache as a single JSON blob. Blobs are
+versioned with the catalog table versions, so a write to a category, office or
+service makes the next request rebuild it; the variant with next free slots also
+expires after DIRECTORY_SLOT_CACHE_TTL, as booking a slot does not bump a version.
+"""
+from typing import Dict, Optional, Type
+from pydantic import BaseModel
+from sqlalchemy.orm import Session, selectinload
+from fastapi import HTTPException
+from app.core.config import CATALOG_CACHE_MAX_AGE, DIRECTORY_SLOT_CACHE_TTL
+from app.core.state import get_state_backend
+from app.crud.appointment_crud import get_earliest_free_slots
+from app.models.gov_model import GovNode
+from app.models.gov_node_services_model import GovNodeService
+from app.models.services_model import GovServiceCategory
+from app.schemas import directory_schema
+from app.utils.etag import table_version
+from app.utils.logger import logger
+from app.utils.responses import FastJSONResponse
+
+DIRECTORY_TABLES = (GovServiceCategory.__tablename__, GovNode.__tablename__, GovNodeService.__tablename__)
+
+# nested fields, filled in by _build_directory
+_CHILDREN = frozenset({"offices", "services", "next_slot"})
+
+
+def _row(obj, schema: Type[BaseModel], lang: Optional[str]) -> dict:
+    row = {}
+    for field in schema.model_fields:
+        if field in _CHILDREN:
+            continue
+        source = f"{field}_{lang}" if lang and hasattr(obj, f"{field}_{lang}") else field
+        row[field] = getattr(obj, source)
+    return row
+
+
+async def _build_directory(db: Session, lang: Optional[str], with_slots: bool) -> list:
+    categories = db.query(GovServiceCategory).options(
+        selectinload(GovServiceCategory.offices).selectinload(GovNode.services)
+    ).order_by(GovServiceCategory.id).all()
+
+    localized = bool(lang)
+    category_schema = directory_schema.DirectoryCategoryLocalized if localized else directory_schema.DirectoryCategory
+    office_schema = directory_schema.DirectoryOfficeLocalized if localized else directory_schema.DirectoryOffice
+    service_schema = directory_schema.DirectoryServiceLocalized if localized else directory_schema.DirectoryService
+
+    slots: Dict[int, dict] = {}
+    if with_slots:
+        service_ids = [
+            service.service_id
+            for category in categories for office in category.offices for service in office.services
+            if service.is_active
+        ]
+        slots = await get_earliest_free_slots(service_ids, db)
+
+    directory = []
+    for category in categories:
+        offices = []
+        for office in category.offices:
+            services = []
+            for service in office.services:
+                if not service.is_active:
+                    continue
+                row = _row(service, service_schema, lang)
+                row["required_document_types"] = row["required_document_types"] or []
+                if with_slots:
+                    row["next_slot"] = slots.get(service.service_id)
+                services.append(row)
+            offices.append({**_row(office, office_schema, lang), "services": services})
+        directory.append({**_row(category, category_schema, lang), "offices": offices})
+    return directory
+
+
+async def get_directory(db: Session, lang: Optional[str] = None, with_slots: bool = False) -> bytes:
+    """
+    The serialized directory, from the shared cache unless a catalog table changed
+    since it was built.
+    """
+    try:
+        # the counters only grow, so their sum changes whenever one of them does
+        version = sum([await table_version(table) for table in DIRECTORY_TABLES])
+        key = f"directory:{lang or '*'}:{'slots' if with_slots else 'plain'}"
+        backend = get_state_backend()
+        cached = await backend.cache_get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        body = FastJSONResponse(await _build_directory(db, lang, with_slots)).body
+        ttl = DIRECTORY_SLOT_CACHE_TTL if with_slots else CATALOG_CACHE_MAX_AGE
+        await backend.cache_set(key, body, ttl, version)
+        return body
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        logger.error(f"Error building service directory: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
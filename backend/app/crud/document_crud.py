@@ -1,7 +1,11 @@
+from typing import Optional, FrozenSet
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.document_types_model import DocumentType
-from app.schemas.document_types_schema import DocumentTypeBase, DocumentTypeCreate
+from app.schemas.document_types_schema import DocumentTypeBase, DocumentTypeCreate, DocumentTypeLocalized
+from app.core.catalog import catalog
+from app.utils.mapper import to_schema
+from app.utils.etag import bump_table_version
 
 async def create_document(document_data: DocumentTypeCreate, db: Session) -> DocumentTypeBase:
     try:
@@ -16,32 +20,18 @@ async def create_document(document_data: DocumentTypeCreate, db: Session) -> Doc
         db.add(new_doc)
         db.commit()
         db.refresh(new_doc)
-        return DocumentTypeBase(
-            id=new_doc.id,
-            name_si=new_doc.type_si,
-            name_en=new_doc.type_en,
-            name_ta=new_doc.type_ta,
-            description_si=new_doc.description_si,
-            description_en=new_doc.description_en,
-            description_ta=new_doc.description_ta,
-        )
+        await bump_table_version(DocumentType.__tablename__)
+        return to_schema(new_doc, DocumentTypeBase)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating document: {str(e)}")
 
-async def get_document_by_id(document_id: int, db: Session) -> DocumentTypeBase:
+async def get_document_by_id(document_id: int, db: Session, lang: Optional[str] = None) -> dict:
     try:
-        doc = db.query(DocumentType).filter_by(id=document_id).first()
-        if not doc:
+        snapshot = await catalog.snapshot(db, DocumentType.__tablename__)
+        documents = snapshot[DocumentType.__tablename__].project((document_id,), lang, schema=DocumentTypeLocalized if lang else None)
+        if not documents:
             raise HTTPException(status_code=404, detail="Document not found")
-        return DocumentTypeBase(
-            id=doc.id,
-            name_si=doc.type_si,
-            name_en=doc.type_en,
-            name_ta=doc.type_ta,
-            description_si=doc.description_si,
-            description_en=doc.description_en,
-            description_ta=doc.description_ta,
-        )
+        return documents[0]
     
     except HTTPException as error:
         raise error
@@ -49,19 +39,14 @@ async def get_document_by_id(document_id: int, db: Session) -> DocumentTypeBase:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching document: {str(e)}")
 
-async def get_all_documents(db: Session) -> list[DocumentTypeBase]:
+async def get_all_documents(
+    db: Session, lang: Optional[str] = None, fields: Optional[FrozenSet[str]] = None
+) -> list[dict]:
     try:
-        docs = db.query(DocumentType).all()
-        return [
-            DocumentTypeBase(
-                id=doc.id,
-                name_si=doc.type_si,
-                name_en=doc.type_en,
-                name_ta=doc.type_ta,
-                description_si=doc.description_si,
-                description_en=doc.description_en,
-                description_ta=doc.description_ta,
-            ) for doc in docs
-        ]
+        snapshot = await catalog.snapshot(db, DocumentType.__tablename__)
+        documents = snapshot[DocumentType.__tablename__]
+        return documents.project(documents.ids, lang, fields, DocumentTypeLocalized if lang else None)
+    except HTTPException as error:
+        raise error
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching documents: {str(e)}")
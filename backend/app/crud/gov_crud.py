@@ -1,44 +1,44 @@
 from app.schemas import gov_schema, response_schema, citizen_schema, registration_schema
-from app.models import gov_model, registration_model
+from app.models import gov_model, gov_node_services_model, registration_model
 from app.crud.citizen_crud import create_citizen_account
+from app.crud.appointment_crud import get_earliest_free_slots
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, FrozenSet, Tuple
 from fastapi import HTTPException
 from app.utils.hashing import hash_password, verify_password
-from app.utils.document_serializer import serialize_document_links
 from app.utils.logger import logger
+from app.utils.mapper import to_schema
+from app.core.catalog import catalog
+from app.core.geo import office_locator
+from app.utils.etag import bump_table_version
+from app.utils.pagination import PageParams, paginate_ids
 from datetime import datetime
 
-async def get_all_gov_offices(category_id: None | str, db: Session) -> List[gov_schema.GovNodeResponse]:
+async def get_all_gov_offices(
+    category_id: None | str,
+    db: Session,
+    lang: Optional[str] = None,
+    fields: Optional[FrozenSet[str]] = None,
+    page: PageParams = PageParams(),
+) -> Tuple[List[dict], Optional[str]]:
     """
-    Retrieve all government offices from the database.
+    Retrieve one page of government offices from the catalog snapshot as plain dicts,
+    ready to be rendered by FastJSONResponse, and the cursor of the next page. With
+    `lang`, only that language's name and description are returned; with `fields`,
+    only those fields.
     """
     try:
-        if category_id:
-            offices = db.query(gov_model.GovNode).filter(gov_model.GovNode.category_id == category_id).all()
-        else:
-            offices = db.query(gov_model.GovNode).all()
-        if not offices:
-            return []
-        
-        return [gov_schema.GovNodeResponse(
-            id=office.id,
-            email=office.email,
-            username=office.username,
-            location=office.location,
-            category_id=office.category_id,
-            name_si=office.name_si,
-            name_en=office.name_en,
-            name_ta=office.name_ta,
-            role=office.role,
-            description_si=office.description_si,
-            description_en=office.description_en,
-            description_ta=office.description_ta,
-            created_at=office.created_at,
-        ) for office in offices]
+        snapshot = await catalog.snapshot(db, gov_model.GovNode.__tablename__)
+        offices = snapshot[gov_model.GovNode.__tablename__]
+        ids = offices.group_ids(category_id) if category_id else offices.ids
+        ids, next_cursor = paginate_ids(ids, page)
+        schema = gov_schema.GovNodeLocalized if lang else None
+        return offices.project(ids, lang, fields, schema), next_cursor
+    except HTTPException as error:
+        raise error
     except Exception as e:
         logger.error(f"Error retrieving government offices: {e}")
-        return []
+        return [], None
     
 async def activate_user_account(reference_id: str, db: Session) -> Optional[response_schema.ResponseMsg]:
     """
@@ -55,7 +55,8 @@ async def activate_user_account(reference_id: str, db: Session) -> Optional[resp
             citizen_schema.DocumentJsonDict(
                 title=doc['title'],
                 url=doc['url'],
-                uploaded_at=datetime.fromisoformat(doc['uploaded_at'])
+                uploaded_at=datetime.fromisoformat(doc['uploaded_at']),
+                document_type_id=doc.get('document_type_id'),
             )
             for doc in user.document_links
         ]
@@ -91,7 +92,7 @@ async def authenticate_gov_office(gov_office: gov_schema.GovLogin, db: Session)
         if not verify_password(gov_office.password, user.password):
             logger.error("Invalid password")
             raise HTTPException(status_code=404, detail="Government office email or password is incorrect")
-        return gov_schema.GovNodeResponse.model_validate(user)
+        return to_schema(user, gov_schema.GovNodeResponse)
 
     except HTTPException as error:
         logger.error(f"Error authenticating government office: {error.detail}")
@@ -106,10 +107,11 @@ async def get_gov_office_by_id(gov_office_id: int, db: Session) -> Optional[gov_
     Retrieve a government office by its ID.
     """
     try:
+        # authenticates tokens, so it reads the database rather than the catalog snapshot
         user = db.query(gov_model.GovNode).filter(gov_model.GovNode.id == gov_office_id).first()
         if not user:
             raise HTTPException(status_code=404, detail="Government office not found")
-        return gov_schema.GovNodeResponse.model_validate(user)
+        return to_schema(user, gov_schema.GovNodeResponse)
     
     except HTTPException as error:
         logger.error(f"Error retrieving government office by ID: {error.detail}")
@@ -136,19 +138,92 @@ async def create_gov_office(gov_office: gov_schema.GovNodeCreate, db: Session) -
             role=gov_office.role,
             description_si=gov_office.description_si,
             description_en=gov_office.description_en,
-            description_ta=gov_office.description_ta
+            description_ta=gov_office.description_ta,
+            latitude=gov_office.latitude,
+            longitude=gov_office.longitude,
         )
         db.add(new_office)
         db.commit()
         db.refresh(new_office)
+        await bump_table_version(gov_model.GovNode.__tablename__)
         logger.info(f"New government office created: {new_office.id} at {new_office.created_at}")
 
-        return gov_schema.GovNodeResponse.model_validate(new_office)
+        return to_schema(new_office, gov_schema.GovNodeResponse)
     except Exception as e:
         logger.error(f"Error creating government office: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def get_nearest_gov_offices(
+    latitude: float,
+    longitude: float,
+    db: Session,
+    service_type: Optional[str] = None,
+    k: int = 5,
+    max_km: Optional[float] = None,
+    rank_by: str = "distance",
+    lang: Optional[str] = None,
+) -> List[dict]:
+    """
+    The `k` offices nearest to a point as plain dicts with their distance and the ids
+    of their active services (of `service_type`, when given). With
+    `rank_by="earliest_slot"`, each office carries its earliest free slot among those
+    services and the offices are ordered by it, nearest first on ties and offices
+    without a free slot last.
+    """
+    try:
+        # one snapshot for the search and the rows, so every hit has its office row
+        snapshot = await catalog.snapshot(db, gov_model.GovNode.__tablename__, gov_node_services_model.GovNodeService.__tablename__)
+        hits = await office_locator.nearest(db, latitude, longitude, k, service_type, max_km, snapshot)
+        schema = gov_schema.NearestGovNodeLocalized if lang else gov_schema.NearestGovNode
+        rows = snapshot[gov_model.GovNode.__tablename__].project([office for _, office, _ in hits], lang, schema=schema)
+        for row, (distance, _, service_ids) in zip(rows, hits):
+            row["distance_km"] = round(distance, 3)
+            row["service_ids"] = list(service_ids)
+        if rank_by == "earliest_slot":
+            slots = await get_earliest_free_slots([service for *_, ids in hits for service in ids], db)
+            for row in rows:
+                free = [slots[service] for service in row["service_ids"] if service in slots]
+                row["earliest_slot"] = min(free, key=lambda slot: (slot["booking_date"], slot["start_time"]), default=None)
+            rows.sort(key=lambda row: (
+                row["earliest_slot"] is None,
+                (row["earliest_slot"]["booking_date"], row["earliest_slot"]["start_time"]) if row["earliest_slot"] else (),
+                row["distance_km"],
+            ))
+        return rows
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        logger.error(f"Error retrieving nearest government offices: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def update_gov_office_coordinates(gov_office_id: int, coordinates: gov_schema.GovNodeCoordinates, db: Session) -> gov_schema.GovNodeResponse:
+    """
+    Set the coordinates of a government office.
+    """
+    try:
+        office = db.query(gov_model.GovNode).filter(gov_model.GovNode.id == gov_office_id).first()
+        if not office:
+            raise HTTPException(status_code=404, detail="Government office not found")
+        office.latitude = coordinates.latitude
+        office.longitude = coordinates.longitude
+        db.commit()
+        db.refresh(office)
+        await bump_table_version(gov_model.GovNode.__tablename__)
+        return to_schema(office, gov_schema.GovNodeResponse)
+
+    except HTTPException as error:
+        logger.error(f"Error updating government office coordinates: {error.detail}")
+        raise error
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error updating government office coordinates: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 async def get_registration_by_reference_id(reference_id: str, db: Session) -> Optional[registration_schema.RegistrationResponse]:
     """
     Get a registration by its reference ID.
@@ -162,20 +237,7 @@ async def get_registration_by_reference_id(reference_id: str, db: Session) -> Op
             logger.error("Registration not found")
             raise HTTPException(status_code=404, detail="Registration not found")
 
-        document_links_response = serialize_document_links(db_registration.document_links)
-
-        return registration_schema.RegistrationResponse(
-            reference_id=db_registration.reference_id,
-            nic=db_registration.nic,
-            first_name=db_registration.first_name,
-            last_name=db_registration.last_name,
-            email=db_registration.email,
-            phone=db_registration.phone,
-            role=db_registration.role,
-            active=db_registration.active,
-            document_links=document_links_response,
-            created_at=db_registration.created_at
-        )
+        return to_schema(db_registration, registration_schema.RegistrationResponse)
 
     except HTTPException as error:
         raise error
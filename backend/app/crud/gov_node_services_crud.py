@@ -1,9 +1,17 @@
 from app.schemas import gov_node_services_schema
 from app.models import gov_node_services_model
+from sqlalchemy import Integer, func
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, FrozenSet, Set, Tuple
 from fastapi import HTTPException
 from app.utils.logger import logger
+from app.utils.mapper import to_schema
+from app.core.catalog import catalog
+from app.utils.etag import bump_table_version
+from app.utils.pagination import PageParams, paginate, paginate_ids
+from app.utils.responses import model_columns, column_keys, rows_to_dicts, check_projection
+from app.utils.i18n import localized_columns
 from datetime import datetime
 
 async def create_gov_node_service(db: Session, service: gov_node_services_schema.GovNodeServiceCreate) -> Optional[gov_node_services_schema.GovNodeServiceResponse]:
@@ -26,46 +34,35 @@ async def create_gov_node_service(db: Session, service: gov_node_services_schema
         db.add(db_service)
         db.commit()
         db.refresh(db_service)
-        return gov_node_services_schema.GovNodeServiceResponse(
-            service_id=db_service.service_id,
-            gov_node_id=db_service.gov_node_id,
-            service_type=db_service.service_type,
-            service_name_si=db_service.service_name_si,
-            service_name_en=db_service.service_name_en,
-            service_name_ta=db_service.service_name_ta,
-            description_si=db_service.description_si,
-            description_en=db_service.description_en,
-            description_ta=db_service.description_ta,
-            created_at=db_service.created_at,
-            updated_at=db_service.updated_at,
-            is_active=db_service.is_active,
-            required_document_types=db_service.required_document_types
-        )
+        await bump_table_version(gov_node_services_model.GovNodeService.__tablename__)
+        return to_schema(db_service, gov_node_services_schema.GovNodeServiceResponse)
     
     except Exception as e:
         logger.error(f"Error creating government node service: {e}")
         db.rollback()
         raise HTTPException(status_code=500, detail="Service creation failed")
     
-async def get_gov_node_services(db: Session, gov_node_id: int) -> List[gov_node_services_schema.GovNodeServiceResponse]:
+async def get_gov_node_services(
+    db: Session,
+    gov_node_id: int,
+    lang: Optional[str] = None,
+    fields: Optional[FrozenSet[str]] = None,
+    page: PageParams = PageParams(),
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Retrieve one page of an office's services from the catalog snapshot and the
+    cursor of the next page.
+    """
     try:
-        db_services = db.query(gov_node_services_model.GovNodeService).filter(gov_node_services_model.GovNodeService.gov_node_id == gov_node_id).all()
-        return [gov_node_services_schema.GovNodeServiceResponse(
-            service_id=service.service_id,
-            gov_node_id=service.gov_node_id,
-            service_type=service.service_type,
-            service_name_si=service.service_name_si,
-            service_name_en=service.service_name_en,
-            service_name_ta=service.service_name_ta,
-            description_si=service.description_si,
-            description_en=service.description_en,
-            description_ta=service.description_ta,
-            created_at=service.created_at,
-            updated_at=service.updated_at,
-            is_active=service.is_active,
-            required_document_types=service.required_document_types
-        ) for service in db_services]
+        snapshot = await catalog.snapshot(db, gov_node_services_model.GovNodeService.__tablename__)
+        services = snapshot[gov_node_services_model.GovNodeService.__tablename__]
+        ids, next_cursor = paginate_ids(services.group_ids(gov_node_id), page)
+        schema = gov_node_services_schema.GovNodeServiceLocalized if lang else None
+        return services.project(ids, lang, fields, schema), next_cursor
     
+    except HTTPException as error:
+        raise error
+
     except Exception as e:
         logger.error(f"Error fetching government node services: {e}")
         raise HTTPException(status_code=500, detail="Service retrieval failed")
@@ -81,21 +78,8 @@ async def update_gov_node_service(db: Session, service_id: int, service: gov_nod
 
         db.commit()
         db.refresh(db_service)
-        return gov_node_services_schema.GovNodeServiceResponse(
-            service_id=db_service.service_id,
-            gov_node_id=db_service.gov_node_id,
-            service_type=db_service.service_type,
-            service_name_si=db_service.service_name_si,
-            service_name_en=db_service.service_name_en,
-            service_name_ta=db_service.service_name_ta,
-            description_si=db_service.description_si,
-            description_en=db_service.description_en,
-            description_ta=db_service.description_ta,
-            created_at=db_service.created_at,
-            updated_at=db_service.updated_at,
-            is_active=db_service.is_active,
-            required_document_types=db_service.required_document_types
-        )
+        await bump_table_version(gov_node_services_model.GovNodeService.__tablename__)
+        return to_schema(db_service, gov_node_services_schema.GovNodeServiceResponse)
     
     except HTTPException as error:
         logger.error(f"Error updating government node service: {error.detail}")
@@ -112,23 +96,11 @@ async def delete_gov_node_service(db: Session, service_id: int) -> Optional[gov_
         if not db_service:
             raise HTTPException(status_code=404, detail="Service not found")
 
+        deleted = to_schema(db_service, gov_node_services_schema.GovNodeServiceResponse)
         db.delete(db_service)
         db.commit()
-        return gov_node_services_schema.GovNodeServiceResponse(
-            service_id=db_service.service_id,
-            gov_node_id=db_service.gov_node_id,
-            service_type=db_service.service_type,
-            service_name_si=db_service.service_name_si,
-            service_name_en=db_service.service_name_en,
-            service_name_ta=db_service.service_name_ta,
-            description_si=db_service.description_si,
-            description_en=db_service.description_en,
-            description_ta=db_service.description_ta,
-            created_at=db_service.created_at,
-            updated_at=db_service.updated_at,
-            is_active=db_service.is_active,
-            required_document_types=db_service.required_document_types
-        )
+        await bump_table_version(gov_node_services_model.GovNodeService.__tablename__)
+        return deleted
 
     except HTTPException as error:
         logger.error(f"Error deleting government node service: {error.detail}")
@@ -138,3 +110,67 @@ async def delete_gov_node_service(db: Session, service_id: int) -> Optional[gov_
         logger.error(f"Error deleting government node service: {e}")
         db.rollback()
         raise HTTPException(status_code=500, detail="Service deletion failed")
+
+
+def _required_document_types():
+    # services saved without the column hold NULL, which means no documents are required
+    services = gov_node_services_model.GovNodeService
+    return func.coalesce(services.required_document_types, "{}", type_=ARRAY(Integer))
+
+async def get_service_readiness(document_type_ids: Set[int], service_ids: List[int], db: Session) -> List[dict]:
+    """
+    Whether the document types `document_type_ids` cover the required documents of
+    each of `service_ids`, and which are missing, from one query. Unknown service ids
+    are left out.
+    """
+    try:
+        services = gov_node_services_model.GovNodeService
+        rows = db.query(services.service_id, _required_document_types()).filter(
+            services.service_id.in_(set(service_ids))
+        ).all()
+        required = dict(rows)
+        readiness = []
+        for service_id in dict.fromkeys(service_ids):
+            if service_id in required:
+                missing = sorted(set(required[service_id]) - document_type_ids)
+                readiness.append({"service_id": service_id, "ready": not missing, "missing_document_types": missing})
+        return readiness
+
+    except Exception as e:
+        logger.error(f"Error checking service readiness: {e}")
+        raise HTTPException(status_code=500, detail="Readiness check failed")
+
+async def get_ready_services(
+    document_type_ids: Set[int],
+    db: Session,
+    service_type: Optional[str] = None,
+    lang: Optional[str] = None,
+    fields: Optional[FrozenSet[str]] = None,
+    page: PageParams = PageParams(),
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of the active services whose required documents are all among
+    `document_type_ids`, and the cursor of the next page.
+    """
+    try:
+        services = gov_node_services_model.GovNodeService
+        if lang:
+            columns = localized_columns(services, gov_node_services_schema.GovNodeServiceLocalized, lang, fields=fields)
+        else:
+            columns = model_columns(services, gov_node_services_schema.GovNodeServiceResponse, fields)
+        columns = check_projection(columns)
+        query = db.query(*columns).filter(
+            services.is_active.is_(True),
+            _required_document_types().contained_by(sorted(document_type_ids)),
+        )
+        if service_type:
+            query = query.filter(services.service_type == service_type)
+        rows, next_cursor = paginate(query, (services.service_id,), page)
+        return rows_to_dicts(rows, column_keys(columns)), next_cursor
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        logger.error(f"Error fetching ready services: {e}")
+        raise HTTPException(status_code=500, detail="Service retrieval failed")
@@ -1,7 +1,10 @@
+from typing import Optional, FrozenSet
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.notification_model import Notification
 from app.schemas.notification_schema import NotificationCreate, NotificationResponse, NotificationRequest, NotificationUpdate
+from app.utils.mapper import to_schema
+from app.utils.responses import model_columns, column_keys, rows_to_dicts, check_projection
 
 async def delete_notification(notification_id: int, db: Session):
     try:
@@ -24,26 +27,15 @@ async def create_notification(notification_data: NotificationCreate, db: Session
         db.add(new_notification)
         db.commit()
         db.refresh(new_notification)
-        return NotificationResponse(
-            notification_id=new_notification.notification_id,
-            nic=new_notification.nic,
-            message=new_notification.message,
-            status=new_notification.status,
-            created_at=new_notification.created_at
-        )
+        return to_schema(new_notification, NotificationResponse)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating notification: {str(e)}")
 
-async def get_all_notifications(req: NotificationRequest, db: Session) -> list[NotificationResponse]:
+async def get_all_notifications(req: NotificationRequest, db: Session, fields: Optional[FrozenSet[str]] = None) -> list[dict]:
+    columns = check_projection(model_columns(Notification, NotificationResponse, fields))
     try:
-        notifications = db.query(Notification).filter(Notification.nic == req.nic).order_by(Notification.created_at.desc()).offset(req.start_count).limit(req.limit).all()
-        return [NotificationResponse(
-            notification_id=n.notification_id,
-            nic=n.nic,
-            message=n.message,
-            status=n.status,
-            created_at=n.created_at
-        ) for n in notifications]
+        notifications = db.query(*columns).filter(Notification.nic == req.nic).order_by(Notification.created_at.desc()).offset(req.start_count).limit(req.limit).all()
+        return rows_to_dicts(notifications, column_keys(columns))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching notifications: {str(e)}")
 
@@ -59,13 +51,7 @@ async def update_notification(notification_data: NotificationUpdate, db: Session
 
         db.commit()
         db.refresh(notification)
-        return NotificationResponse(
-            notification_id=notification.notification_id,
-            nic=notification.nic,
-            message=notification.message,
-            status=notification.status,
-            created_at=notification.created_at
-        )
+        return to_schema(notification, NotificationResponse)
     
     except HTTPException as error:
         raise error
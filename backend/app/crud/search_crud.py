@@ -0,0 +1,149 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import Float, cast, func, literal, or_, select, text, union_all
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.models.gov_model import GovNode
+from app.models.gov_node_services_model import GovNodeService
+from app.db.search import SEARCH_CONFIG
+from app.utils.logger import logger
+from app.utils.pagination import PageParams, paginate
+from app.utils.responses import column_keys, rows_to_dicts
+
+# names within this word similarity of the query count as fuzzy matches (pg_trgm default 0.6)
+WORD_SIMILARITY_THRESHOLD = 0.4
+
+# best matches kept per searched table; bounds the hits a query pages through
+SEARCH_CANDIDATES = 1000
+
+# characters with a meaning in to_tsquery syntax
+_TSQUERY_SYNTAX = str.maketrans("", "", "&|!():*<>'\\\"")
+
+_trigram_available: Optional[bool] = None
+
+
+def prefix_tsquery(q: str) -> Optional[str]:
+    """
+    to_tsquery input matching documents that contain every term of `q` as a word prefix.
+    """
+    terms = [term.translate(_TSQUERY_SYNTAX) for term in q.split()]
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def trigram_available(db: Session) -> bool:
+    global _trigram_available
+    if _trigram_available is None:
+        _trigram_available = bool(db.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        ).scalar())
+    return _trigram_available
+
+
+def _candidates(model, key, columns, filters, q: str, tsquery, trigram: bool):
+    """
+    The best SEARCH_CANDIDATES rows of `model` matching `q`, with their rank: full-text
+    prefix matches, plus fuzzy name matches when pg_trgm is installed. Matching only
+    touches the GIN indexes; every match is then ranked and the best are kept, ties
+    broken by `key` descending like the page order, so a query always pages over the
+    same candidates.
+    """
+    match = model.search_vector.bool_op("@@")(tsquery)
+    if trigram:
+        match = or_(match, literal(q).bool_op("<%")(model.search_names))
+    rank = func.ts_rank_cd(model.search_vector, tsquery)
+    if trigram:
+        rank = rank + func.word_similarity(q, model.search_names)
+    rank = cast(rank, Float).label("rank")
+    candidates = (
+        select(*columns, rank)
+        .where(match, *filters)
+        .order_by(rank.desc(), key.desc())
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+    return candidates, candidates.c.rank
+
+
+async def search_catalog(
+    q: str,
+    db: Session,
+    kind: Optional[str] = None,
+    lang: Optional[str] = None,
+    page: PageParams = PageParams(),
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Rank active services and offices against `q` and return one page of hits, best
+    first, with the cursor of the next page.
+    """
+    query_text = prefix_tsquery(q)
+    if query_text is None:
+        return [], None
+    try:
+        tsquery = func.to_tsquery(SEARCH_CONFIG, query_text)
+        trigram = trigram_available(db)
+        if trigram:
+            db.execute(
+                text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                {"threshold": str(WORD_SIMILARITY_THRESHOLD)},
+            )
+
+        branches = []
+        if kind in (None, "service"):
+            services, rank = _candidates(
+                GovNodeService, GovNodeService.service_id,
+                (
+                    GovNodeService.service_id.label("id"),
+                    GovNodeService.gov_node_id.label("office_id"),
+                    GovNodeService.service_name_si.label("name_si"),
+                    GovNodeService.service_name_en.label("name_en"),
+                    GovNodeService.service_name_ta.label("name_ta"),
+                ),
+                (GovNodeService.is_active.isnot(False),),
+                q, tsquery, trigram,
+            )
+            branches.append(
+                select(
+                    literal("service").label("kind"),
+                    services.c.id, services.c.office_id,
+                    services.c.name_si, services.c.name_en, services.c.name_ta,
+                    GovNode.location.label("location"),
+                    rank,
+                ).join(GovNode, GovNode.id == services.c.office_id)
+            )
+        if kind in (None, "office"):
+            offices, rank = _candidates(
+                GovNode, GovNode.id,
+                (
+                    GovNode.id.label("id"),
+                    GovNode.id.label("office_id"),
+                    GovNode.name_si, GovNode.name_en, GovNode.name_ta, GovNode.location,
+                ),
+                (),
+                q, tsquery, trigram,
+            )
+            branches.append(
+                select(
+                    literal("office").label("kind"),
+                    offices.c.id, offices.c.office_id,
+                    offices.c.name_si, offices.c.name_en, offices.c.name_ta, offices.c.location,
+                    rank,
+                )
+            )
+        hits = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery("hits")
+
+        if lang:
+            names = (hits.c[f"name_{lang}"].label("name"),)
+        else:
+            names = (hits.c.name_si, hits.c.name_en, hits.c.name_ta)
+        columns = (hits.c.kind, hits.c.id, hits.c.office_id, *names, hits.c.location, hits.c.rank)
+        rows, next_cursor = paginate(db.query(*columns), (hits.c.rank, hits.c.kind, hits.c.id), page, descending=True)
+        return rows_to_dicts(rows, column_keys(columns)), next_cursor
+
+    except HTTPException as error:
+        raise error
+
+    except Exception as e:
+        logger.error(f"Error searching the catalog: {e}")
+        raise HTTPException(status_code=500, detail="Search failed")
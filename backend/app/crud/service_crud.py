@@ -1,19 +1,34 @@
 from app.schemas import services_schema
 from app.models import services_model
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, FrozenSet, Tuple
 from fastapi import HTTPException
 from app.utils.logger import logger
+from app.utils.mapper import to_schema
+from app.core.catalog import catalog
+from app.utils.etag import bump_table_version
+from app.utils.pagination import PageParams, paginate_ids
 
-async def get_all_services(db: Session) -> List[services_schema.ServiceResponse]:
+async def get_all_services(
+    db: Session,
+    lang: Optional[str] = None,
+    fields: Optional[FrozenSet[str]] = None,
+    page: PageParams = PageParams(),
+) -> Tuple[List[dict], Optional[str]]:
     """
-    Retrieve all services from the database.
+    Retrieve one page of services from the catalog snapshot and the cursor of the
+    next page. With `lang`, only that language's category and description are
+    returned, with `fields` only those fields.
     """
     try:
-        services = db.query(services_model.GovServiceCategory).all()
+        snapshot = await catalog.snapshot(db, services_model.GovServiceCategory.__tablename__)
+        categories = snapshot[services_model.GovServiceCategory.__tablename__]
+        ids, next_cursor = paginate_ids(categories.ids, page)
+        schema = services_schema.ServiceLocalized if lang else None
+        services = categories.project(ids, lang, fields, schema)
         if not services:
             raise HTTPException(status_code=404, detail="No services found")
-        return [services_schema.ServiceResponse.model_validate(service) for service in services]
+        return services, next_cursor
 
     except HTTPException as error:
         logger.error(f"Error retrieving services: {error.detail}")
@@ -32,7 +47,8 @@ async def create_service(service: services_schema.ServiceCreate, db: Session) ->
         db.add(new_service)
         db.commit()
         db.refresh(new_service)
-        return services_schema.ServiceResponse.model_validate(new_service)
+        await bump_table_version(services_model.GovServiceCategory.__tablename__)
+        return to_schema(new_service, services_schema.ServiceResponse)
     except Exception as e:
         logger.error(f"Error creating service: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,7 +1,12 @@
+from typing import Optional, FrozenSet, Tuple
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from app.models.service_ratings_model import ServiceRating
-from app.schemas.service_rating_schema import ServiceRatingCreate, ServiceRatingUpdate, ServiceRatingResponse
+from app.models.service_ratings_model import ServiceRating, ServiceRatingAggregate, OfficeRatingAggregate
+from app.schemas.service_rating_schema import ServiceRatingCreate, ServiceRatingUpdate, ServiceRatingResponse, RatingSummary
+from app.db.rating_aggregates import apply_rating_deltas, rating_change, summarize
+from app.utils.mapper import to_schema
+from app.utils.responses import model_columns, column_keys, rows_to_dicts, check_projection
+from app.utils.pagination import PageParams, paginate
 
 async def create_service_rating(rating_data: ServiceRatingCreate, db: Session) -> ServiceRatingResponse:
     try:
@@ -13,16 +18,10 @@ async def create_service_rating(rating_data: ServiceRatingCreate, db: Session) -
             created_at=rating_data.created_at
         )
         db.add(new_rating)
+        apply_rating_deltas(db, new_rating.service_id, new_rating.service_node_id, rating_change(None, new_rating.rating))
         db.commit()
         db.refresh(new_rating)
-        return ServiceRatingResponse(
-            rating_id=new_rating.rating_id,
-            service_id=new_rating.service_id,
-            service_node_id=new_rating.service_node_id,
-            rating=new_rating.rating,
-            comment=new_rating.comment,
-            created_at=new_rating.created_at
-        )
+        return to_schema(new_rating, ServiceRatingResponse)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating service rating: {str(e)}")
@@ -32,14 +31,7 @@ async def get_service_rating(rating_id: int, db: Session) -> ServiceRatingRespon
         rating = db.query(ServiceRating).filter_by(rating_id=rating_id).first()
         if not rating:
             raise HTTPException(status_code=404, detail="Service rating not found")
-        return ServiceRatingResponse(
-            rating_id=rating.rating_id,
-            service_id=rating.service_id,
-            service_node_id=rating.service_node_id,
-            rating=rating.rating,
-            comment=rating.comment,
-            created_at=rating.created_at
-        )
+        return to_schema(rating, ServiceRatingResponse)
     
     except HTTPException as error:
         raise error
@@ -49,22 +41,17 @@ async def get_service_rating(rating_id: int, db: Session) -> ServiceRatingRespon
 
 async def update_service_rating(rating_id: int, update_data: ServiceRatingUpdate, db: Session) -> ServiceRatingResponse:
     try:
-        rating = db.query(ServiceRating).filter_by(rating_id=rating_id).first()
+        # locked, so a concurrent update cannot compute its delta from the same old rating
+        rating = db.query(ServiceRating).filter_by(rating_id=rating_id).with_for_update().first()
         if not rating:
             raise HTTPException(status_code=404, detail="Service rating not found")
         
+        apply_rating_deltas(db, rating.service_id, rating.service_node_id, rating_change(rating.rating, update_data.rating))
         rating.rating = update_data.rating
         rating.comment = update_data.comment
         db.commit()
         db.refresh(rating)
-        return ServiceRatingResponse(
-            rating_id=rating.rating_id,
-            service_id=rating.service_id,
-            service_node_id=rating.service_node_id,
-            rating=rating.rating,
-            comment=rating.comment,
-            created_at=rating.created_at
-        )
+        return to_schema(rating, ServiceRatingResponse)
     
     except HTTPException as error:
         raise error
@@ -73,30 +60,49 @@ async def update_service_rating(rating_id: int, update_data: ServiceRatingUpdate
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating service rating: {str(e)}")
 
-async def list_service_ratings(service_id: int, db: Session) -> list[ServiceRatingResponse]:
+async def list_service_ratings(
+    service_id: int, db: Session, fields: Optional[FrozenSet[str]] = None, page: PageParams = PageParams()
+) -> Tuple[list[dict], Optional[str]]:
+    columns = check_projection(model_columns(ServiceRating, ServiceRatingResponse, fields))
     try:
-        ratings = db.query(ServiceRating).filter_by(service_id=service_id).all()
-        return [ServiceRatingResponse(
-            rating_id=r.rating_id,
-            service_id=r.service_id,
-            service_node_id=r.service_node_id,
-            rating=r.rating,
-            comment=r.comment,
-            created_at=r.created_at
-        ) for r in ratings]
+        query = db.query(*columns).filter(ServiceRating.service_id == service_id)
+        # newest ratings first
+        ratings, next_cursor = paginate(query, (ServiceRating.rating_id,), page, descending=True)
+        return rows_to_dicts(ratings, column_keys(columns)), next_cursor
+    except HTTPException as error:
+        raise error
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing service ratings: {str(e)}")
     
-async def list_service_ratings_by_node(service_node_id: int, db: Session) -> list[ServiceRatingResponse]:
+async def list_service_ratings_by_node(
+    service_node_id: int, db: Session, fields: Optional[FrozenSet[str]] = None, page: PageParams = PageParams()
+) -> Tuple[list[dict], Optional[str]]:
+    columns = check_projection(model_columns(ServiceRating, ServiceRatingResponse, fields))
+    try:
+        query = db.query(*columns).filter(ServiceRating.service_node_id == service_node_id)
+        ratings, next_cursor = paginate(query, (ServiceRating.rating_id,), page, descending=True)
+        return rows_to_dicts(ratings, column_keys(columns)), next_cursor
+    except HTTPException as error:
+        raise error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing service ratings by node: {str(e)}")
+
+async def get_service_rating_summary(service_id: int, db: Session) -> RatingSummary:
+    """
+    Average, count and 1-5 histogram of a service's ratings, from its running aggregate.
+    """
+    try:
+        row = db.query(ServiceRatingAggregate).filter_by(service_id=service_id).first()
+        return RatingSummary(**summarize(row))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching service rating summary: {str(e)}")
+
+async def get_office_rating_summary(service_node_id: int, db: Session) -> RatingSummary:
+    """
+    Average, count and 1-5 histogram of the ratings of an office's services, from its running aggregate.
+    """
     try:
-        ratings = db.query(ServiceRating).filter_by(service_node_id=service_node_id).all()
-        return [ServiceRatingResponse(
-            rating_id=r.rating_id,
-            service_id=r.service_id,
-            service_node_id=r.service_node_id,
-            rating=r.rating,
-            comment=r.comment,
-            created_at=r.created_at
-        ) for r in ratings]
+        row = db.query(OfficeRatingAggregate).filter_by(gov_node_id=service_node_id).first()
+        return RatingSummary(**summarize(row))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error listing service ratings by node: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching office rating summary: {str(e)}")
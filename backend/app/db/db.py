@@ -2,7 +2,10 @@ import sqlalchemy
 from sqlalchemy import create_engine
 from app.core.config import DB_HOST, DB_PASSWORD, DB_USER, DB_NAME
 
-DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:5432/{DB_NAME}?sslmode=require"
+def database_url(host: str) -> str:
+    return f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{host}:5432/{DB_NAME}?sslmode=require"
+
+DATABASE_URL = database_url(DB_HOST)
 
 # engine = create_engine(DATABASE_URL, echo=True)
 
@@ -13,11 +16,11 @@ DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:5432/{D
 # except Exception as e:
 #     print(f"Failed to connect: {e}")
 
-def connect_with_connector() -> sqlalchemy.engine.base.Engine:
+def connect_with_connector(host: str = DB_HOST, **options) -> sqlalchemy.engine.base.Engine:
     """
-    Connect to the database using the connector.
+    Connect to the database on `host` (the primary by default) using the connector.
     """
     # Create a connection to the database
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(database_url(host), **options)
     return engine
 
@@ -0,0 +1,92 @@
+"""
+Per-engine query latency, recorded from SQLAlchemy cursor events.
+
+Each instrumented engine keeps a count, total, maximum and a histogram over fixed
+millisecond buckets, from which approximate percentiles are read; recording is O(1)
+and the memory per engine is constant. The numbers are per process.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# upper bounds of the histogram buckets, in milliseconds; the last bucket is open
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class EngineLatency:
+    """
+    Latency of the queries run on one engine.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram: List[int] = [0] * (len(BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float):
+        bucket = bisect.bisect_left(BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.histogram[bucket] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Upper bound of the bucket holding the `fraction` quantile, or the maximum when
+        that is the open bucket.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return min(float(bound), round(self.max_ms, 3))
+        return self.max_ms
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self.count,
+                "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+                "p50_ms": self.percentile(0.5) if self.count else None,
+                "p95_ms": self.percentile(0.95) if self.count else None,
+                "p99_ms": self.percentile(0.99) if self.count else None,
+                "max_ms": round(self.max_ms, 3),
+            }
+
+
+engine_latency: Dict[str, EngineLatency] = {}
+
+
+def instrument(engine: Engine, name: str) -> EngineLatency:
+    """
+    Record the latency of every statement `engine` executes under `name`.
+    """
+    latency = engine_latency.setdefault(name, EngineLatency(name))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        latency.record((time.perf_counter() - conn.info["query_start"].pop()) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+    return latency
+
+
+def latency_report() -> Dict[str, dict]:
+    return {name: latency.report() for name, latency in engine_latency.items()}
@@ -0,0 +1,108 @@
+"""
+Idempotent schema catch-up run at startup, after `Base.metadata.create_all`.
+
+create_all only creates missing tables, so nullable, server-defaulted or generated
+columns and indexes added to the models later are applied here to databases created before them, and
+data moved to a new table is copied over once. Every step is a no-op once applied.
+Trigram indexes need the pg_trgm extension; when it cannot be enabled (e.g. not on
+the server's allow-list) search falls back to full-text only.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+from app.db.base import Base
+from app.models.gov_model import GovNode
+from app.models.gov_node_services_model import GovNodeService
+from app.db import rating_aggregates, rollups
+from app.utils.logger import logger
+
+TRIGRAM_INDEXES = (
+    (GovNodeService.__tablename__, "search_names"),
+    (GovNode.__tablename__, "search_names"),
+)
+
+
+def _add_missing_columns(connection) -> None:
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            if column.computed is not None:
+                definition = f"{column_type} GENERATED ALWAYS AS ({column.computed.sqltext}) STORED"
+            elif column.nullable:
+                definition = column_type
+            elif column.server_default is not None:
+                definition = f"{column_type} NOT NULL DEFAULT {column.server_default.arg}"
+            else:
+                logger.warning(f"Column {table.name}.{column.name} is missing and NOT NULL, add it by hand")
+                continue
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column.name} {definition}"))
+
+
+def _create_indexes(connection) -> None:
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _backfill_citizen_documents(connection) -> None:
+    # typed links of the legacy citizens.document_links JSON, once, while citizen_documents is empty
+    connection.execute(text("""
+        INSERT INTO citizen_documents (nic, document_type_id, title, url, uploaded_at)
+        SELECT DISTINCT ON (c.nic, (doc->>'document_type_id')::int)
+               c.nic, (doc->>'document_type_id')::int, doc->>'title', doc->>'url', (doc->>'uploaded_at')::timestamp
+        FROM citizens c
+        CROSS JOIN LATERAL json_array_elements(c.document_links) AS doc
+        JOIN document_types t ON t.id = (doc->>'document_type_id')::int
+        WHERE json_typeof(c.document_links) = 'array'
+          AND NOT EXISTS (SELECT 1 FROM citizen_documents)
+        ON CONFLICT DO NOTHING
+    """))
+
+
+def _backfill_reservation_rollups(connection) -> None:
+    if connection.execute(text("SELECT NOT EXISTS (SELECT 1 FROM reservation_rollups)")).scalar():
+        connection.execute(text(rollups.REBUILD_SQL))
+
+
+def _backfill_rating_aggregates(connection) -> None:
+    if connection.execute(text(
+        "SELECT NOT EXISTS (SELECT 1 FROM service_rating_aggregates) AND NOT EXISTS (SELECT 1 FROM office_rating_aggregates)"
+    )).scalar():
+        for statement in rating_aggregates.REBUILD_SQL:
+            connection.execute(text(statement))
+
+
+def enable_extension(engine: Engine, name: str) -> bool:
+    """
+    Create the extension `name` if it is missing; False when the server refuses.
+    """
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {name}"))
+        return True
+    except Exception as e:
+        logger.warning(f"Extension {name} is not available: {e}")
+        return False
+
+
+def apply_migrations(engine: Engine) -> None:
+    with engine.begin() as connection:
+        _add_missing_columns(connection)
+        _create_indexes(connection)
+        _backfill_citizen_documents(connection)
+        _backfill_reservation_rollups(connection)
+        _backfill_rating_aggregates(connection)
+
+    if enable_extension(engine, "pg_trgm"):
+        with engine.begin() as connection:
+            for table, column in TRIGRAM_INDEXES:
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)"
+                ))
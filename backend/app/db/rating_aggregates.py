@@ -0,0 +1,110 @@
+"""
+Running rating aggregates: per service and per office rating sum, count and a
+histogram of the 1-5 stars.
+
+`create_service_rating` and `update_service_rating` add their deltas with
+`apply_rating_deltas` before committing, one INSERT .. ON CONFLICT DO UPDATE per
+table, so the aggregates change in the same transaction as the rating and concurrent
+ratings cannot lose an increment. Summaries and averages read one aggregate row
+instead of every rating.
+
+`rebuild_rating_aggregates` recomputes both tables from service_ratings. Run it from
+the backend directory with
+
+    python -m app.db.rating_aggregates
+"""
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.service_ratings_model import ServiceRatingAggregate, OfficeRatingAggregate
+
+STARS = range(1, 6)
+COUNTERS = ("rating_sum", "rating_count") + tuple(f"stars_{stars}" for stars in STARS)
+
+_HISTOGRAM_SQL = ", ".join(f"COUNT(*) FILTER (WHERE rating = {stars})" for stars in STARS)
+
+REBUILD_SQL = (
+    f"""
+    INSERT INTO service_rating_aggregates (service_id, {", ".join(COUNTERS)})
+    SELECT service_id, SUM(rating), COUNT(*), {_HISTOGRAM_SQL}
+    FROM service_ratings
+    WHERE service_id IS NOT NULL
+    GROUP BY service_id
+    """,
+    f"""
+    INSERT INTO office_rating_aggregates (gov_node_id, {", ".join(COUNTERS)})
+    SELECT service_node_id, SUM(rating), COUNT(*), {_HISTOGRAM_SQL}
+    FROM service_ratings
+    WHERE service_node_id IS NOT NULL
+    GROUP BY service_node_id
+    """,
+)
+
+
+def rating_change(old: Optional[int], new: Optional[int]) -> dict:
+    """
+    The counter deltas of a rating going from `old` to `new` stars; None for a rating
+    that did not exist before, or no longer does.
+    """
+    delta = dict.fromkeys(COUNTERS, 0)
+    for stars, sign in ((old, -1), (new, 1)):
+        if stars is not None:
+            delta["rating_sum"] += sign * stars
+            delta["rating_count"] += sign
+            if stars in STARS:
+                delta[f"stars_{stars}"] += sign
+    return delta
+
+
+def apply_rating_deltas(db: Session, service_id: Optional[int], gov_node_id: Optional[int], delta: dict) -> None:
+    """
+    Add `delta` to the service's and the office's aggregates, within the caller's
+    transaction.
+    """
+    if not any(delta.values()):
+        return
+    for model, key, value in (
+        (ServiceRatingAggregate, "service_id", service_id),
+        (OfficeRatingAggregate, "gov_node_id", gov_node_id),
+    ):
+        if value is None:
+            continue
+        statement = insert(model).values({key: value, **delta})
+        statement = statement.on_conflict_do_update(
+            index_elements=[getattr(model, key)],
+            set_={name: getattr(model, name) + getattr(statement.excluded, name) for name in COUNTERS},
+        )
+        db.execute(statement)
+
+
+def summarize(row) -> dict:
+    """
+    Average, count and histogram of an aggregate row, or of no ratings when None.
+    """
+    count = row.rating_count if row is not None else 0
+    return {
+        "average": row.rating_sum / count if count else None,
+        "count": count,
+        "histogram": {stars: getattr(row, f"stars_{stars}") if row is not None else 0 for stars in STARS},
+    }
+
+
+def rebuild_rating_aggregates(connection) -> None:
+    """
+    Recompute both aggregate tables from service_ratings.
+    """
+    connection.execute(text("DELETE FROM service_rating_aggregates"))
+    connection.execute(text("DELETE FROM office_rating_aggregates"))
+    for statement in REBUILD_SQL:
+        connection.execute(text(statement))
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+    from app.utils.logger import logger
+
+    with engine.begin() as connection:
+        rebuild_rating_aggregates(connection)
+        count = connection.execute(text("SELECT COUNT(*) FROM service_rating_aggregates")).scalar()
+    logger.info(f"Rebuilt rating aggregates of {count} services")
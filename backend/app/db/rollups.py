@@ -0,0 +1,135 @@
+"""
+Daily reservation rollups: per service, booking date and start hour counts of slots,
+offered capacity, currently reserved places, bookings, cancellations, and the
+reservations checked in or marked as no-shows.
+
+The CRUD functions that create, update or delete slots and reservations add their
+deltas with `apply_rollup_deltas` before committing, so the counters change in the
+same transaction as the rows they describe. Each key is updated with one
+INSERT .. ON CONFLICT DO UPDATE SET n = n + excluded.n, which is safe under
+concurrent bookings. Analytics read these rows, O(days * hours), instead of
+scanning reservation_slots.
+
+`rebuild_rollups` recomputes every row from reservation_slots; bookings start at the
+reserved counts and cancellations at zero, as past cancellations are not recorded.
+Run it from the backend directory with
+
+    python -m app.db.rollups
+"""
+from datetime import date, time
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.reservation_services_model import ReservationRollup
+
+COUNTERS = ("slots", "capacity", "reserved", "bookings", "cancellations", "checked_in", "no_shows")
+
+# attendance state of a reservation -> the counter it adds to
+ATTENDANCE_COUNTERS = {"checked_in": "checked_in", "no_show": "no_shows"}
+
+REBUILD_SQL = """
+    INSERT INTO reservation_rollups (service_id, booking_date, hour, slots, capacity, reserved, bookings, cancellations, checked_in, no_shows)
+    SELECT s.reservation_id, s.booking_date, COALESCE(EXTRACT(HOUR FROM s.start_time), 0),
+           COUNT(*), COALESCE(SUM(s.max_capacity), 0), COALESCE(SUM(s.reserved_count), 0), COALESCE(SUM(s.reserved_count), 0), 0,
+           COALESCE(SUM(u.checked_in), 0), COALESCE(SUM(u.no_shows), 0)
+    FROM reservation_slots s
+    LEFT JOIN (
+        SELECT slot_id,
+               COUNT(*) FILTER (WHERE attendance = 'checked_in') AS checked_in,
+               COUNT(*) FILTER (WHERE attendance = 'no_show') AS no_shows
+        FROM reserved_users
+        GROUP BY slot_id
+    ) u ON u.slot_id = s.slot_id
+    WHERE s.reservation_id IS NOT NULL
+    GROUP BY 1, 2, 3
+"""
+
+
+def rollup_key(service_id: int, booking_date: date, start_time: Optional[time]) -> Tuple[int, date, int]:
+    return service_id, booking_date, start_time.hour if start_time else 0
+
+
+def slot_totals(slot, sign: int = 1) -> dict:
+    """
+    The deltas adding (or with `sign=-1` removing) a slot's contribution, including
+    the attendance of its reservations.
+    """
+    totals = {
+        "key": rollup_key(slot.reservation_id, slot.booking_date, slot.start_time),
+        "slots": sign,
+        "capacity": sign * (slot.max_capacity or 0),
+        "reserved": sign * (slot.reserved_count or 0),
+    }
+    for user in slot.reserved_users:
+        counter = ATTENDANCE_COUNTERS.get(user.attendance)
+        if counter:
+            totals[counter] = totals.get(counter, 0) + sign
+    return totals
+
+
+def reservation_change(slot, booked: bool) -> dict:
+    """
+    The deltas of one place of `slot` being booked, or cancelled when not `booked`.
+    """
+    key = rollup_key(slot.reservation_id, slot.booking_date, slot.start_time)
+    if booked:
+        return {"key": key, "reserved": 1, "bookings": 1}
+    return {"key": key, "reserved": -1, "cancellations": 1}
+
+
+def attendance_change(slot, old: Optional[str], new: Optional[str]) -> dict:
+    """
+    The deltas of a reservation of `slot` going from attendance `old` to `new`; None
+    for a reservation that did not exist before, or no longer does.
+    """
+    delta = {"key": rollup_key(slot.reservation_id, slot.booking_date, slot.start_time)}
+    for state, sign in ((old, -1), (new, 1)):
+        counter = ATTENDANCE_COUNTERS.get(state)
+        if counter:
+            delta[counter] = delta.get(counter, 0) + sign
+    return delta
+
+
+def apply_rollup_deltas(db: Session, deltas: Iterable[dict]) -> None:
+    """
+    Add `deltas` (dicts of a `key` and counter increments) to the rollups in one
+    statement, within the caller's transaction.
+    """
+    merged: Dict[Tuple[int, date, int], Dict[str, int]] = {}
+    for delta in deltas:
+        if delta["key"][0] is None:
+            continue
+        counters = merged.setdefault(delta["key"], dict.fromkeys(COUNTERS, 0))
+        for name in COUNTERS:
+            counters[name] += delta.get(name, 0)
+    if not merged:
+        return
+    rows = [
+        {"service_id": service_id, "booking_date": booking_date, "hour": hour, **counters}
+        for (service_id, booking_date, hour), counters in merged.items()
+    ]
+    statement = insert(ReservationRollup).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ReservationRollup.service_id, ReservationRollup.booking_date, ReservationRollup.hour],
+        set_={name: getattr(ReservationRollup, name) + getattr(statement.excluded, name) for name in COUNTERS},
+    )
+    db.execute(statement)
+
+
+def rebuild_rollups(connection) -> None:
+    """
+    Recompute every rollup row from reservation_slots.
+    """
+    connection.execute(text("DELETE FROM reservation_rollups"))
+    connection.execute(text(REBUILD_SQL))
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+    from app.utils.logger import logger
+
+    with engine.begin() as connection:
+        rebuild_rollups(connection)
+        count = connection.execute(text("SELECT COUNT(*) FROM reservation_rollups")).scalar()
+    logger.info(f"Rebuilt {count} reservation rollup rows")
@@ -0,0 +1,37 @@
+"""
+Generated search columns shared by the searchable catalog models.
+
+Every searchable table carries `search_vector`, a weighted tsvector over its names and
+descriptions built with the 'simple' configuration (no stemming or stop words, so the
+Sinhala, Tamil and English columns are tokenised alike), and `search_names`, the
+concatenated names that back fuzzy trigram matching. Both are STORED generated columns,
+so Postgres keeps them up to date on every write and ranking does not re-parse rows.
+"""
+from typing import Sequence, Tuple
+from sqlalchemy import Column, Computed, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+SEARCH_CONFIG = "simple"
+
+
+def _joined(columns: Sequence[str]) -> str:
+    return " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+
+def search_vector_column(*weighted: Tuple[str, Sequence[str]]):
+    """
+    Deferred tsvector column over `(weight, columns)` groups, e.g. ("A", names).
+    """
+    expression = " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', {_joined(columns)}), '{weight}')"
+        for weight, columns in weighted
+    )
+    return deferred(Column(TSVECTOR, Computed(expression, persisted=True)))
+
+
+def search_names_column(columns: Sequence[str]):
+    """
+    Deferred text column holding `columns` joined by spaces, for trigram matching.
+    """
+    return deferred(Column(Text, Computed(_joined(columns), persisted=True)))
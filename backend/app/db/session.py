@@ -1,20 +1,104 @@
+"""
+Database engines and the request session dependencies.
+
+`get_db` gives a session on the primary. `get_read_db` gives one on the read-only
+replica (DB_REPLICA_HOST) for analytics and listing reads that can be a little
+behind, unless the same client committed a write within READ_YOUR_WRITES_SECONDS:
+then it reads from the primary, so it always sees its own writes. Clients are told
+apart by their bearer token, or their address without one. A commit is noted in
+this process right away and, when the request is done with its session, in the
+shared state backend for the other workers.
+Without a replica both dependencies use the primary.
+
+Query latency is recorded per engine (see app.db.latency).
+"""
+import hashlib
+import time
+from typing import Dict, Optional
+from fastapi import Request
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, scoped_session
+from app.core.config import DB_REPLICA_HOST, READ_YOUR_WRITES_SECONDS
+from app.core.state import get_state_backend
 from app.db.db import connect_with_connector
+from app.db.latency import instrument
 
 # create the engine
 engine = connect_with_connector()
+instrument(engine, "primary")
+
+replica_engine = None
+if DB_REPLICA_HOST:
+    replica_engine = connect_with_connector(DB_REPLICA_HOST, execution_options={"postgresql_readonly": True})
+    instrument(replica_engine, "replica")
 
 # create a configured "Session" class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine or engine)
 
 # create a scoped session
 Session = scoped_session(SessionLocal)
 
-def get_db():
+# client key -> monotonic time of its last commit in this process
+_recent_writes: Dict[str, float] = {}
+
+
+def client_key(request: Request) -> str:
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return "token:" + hashlib.sha256(authorization.encode()).hexdigest()[:32]
+    return "address:" + (request.client.host if request.client else "unknown")
+
+
+def _write_key(client: str) -> str:
+    return f"recent_write:{client}"
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _note_write(session):
+    client = session.info.get("client")
+    if client is None:
+        return
+    now = time.monotonic()
+    _recent_writes[client] = now
+    if len(_recent_writes) > 10_000:
+        for key, written in list(_recent_writes.items()):
+            if now - written > READ_YOUR_WRITES_SECONDS:
+                del _recent_writes[key]
+    # shared with the other workers by get_db once the request is done with the session
+    session.info["wrote"] = True
+
+
+async def wrote_recently(client: str) -> bool:
+    written = _recent_writes.get(client)
+    if written is not None and time.monotonic() - written < READ_YOUR_WRITES_SECONDS:
+        return True
+    return await get_state_backend().cache_get(_write_key(client)) is not None
+
+
+async def get_db(request: Request):
+    """
+    Dependency that provides a database session on the primary.
+    """
+    client = client_key(request)
+    db = SessionLocal(info={"client": client})
+    try:
+        yield db
+    finally:
+        db.close()
+        if db.info.get("wrote"):
+            await get_state_backend().cache_set(_write_key(client), b"1", READ_YOUR_WRITES_SECONDS)
+
+
+async def get_read_db(request: Request):
     """
-    Dependency that provides a database session.
+    Dependency that provides a read-only session on the replica, or on the primary
+    when there is none or the client wrote recently.
     """
-    db = Session()
+    if replica_engine is None or await wrote_recently(client_key(request)):
+        db = SessionLocal()
+    else:
+        db = ReplicaSessionLocal()
     try:
         yield db
     finally:
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, UniqueConstraint
+from sqlalchemy.orm import deferred, relationship
 from app.db.base import Base
 from datetime import datetime
 
@@ -15,7 +15,26 @@ class Citizen(Base):
     password = Column(String)
     role = Column(String, default="user")
     active = Column(Boolean, default=False)
-    document_links = Column(JSON) # documents as Json dictionary
+    # legacy untyped document links; typed documents live in citizen_documents
+    document_links = deferred(Column(JSON))
     created_at = Column(DateTime, default=datetime.now)
 
-    reservations = relationship("ReservedUser", back_populates="citizen")
\ No newline at end of file
+    reservations = relationship("ReservedUser", back_populates="citizen")
+    documents = relationship("CitizenDocument", back_populates="citizen", cascade="all, delete-orphan")
+
+class CitizenDocument(Base):
+    __tablename__ = "citizen_documents"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    nic = Column(String, ForeignKey("citizens.nic"), nullable=False)
+    document_type_id = Column(Integer, ForeignKey("document_types.id"), nullable=False)
+    title = Column(String)
+    url = Column(String)
+    uploaded_at = Column(DateTime, default=datetime.now)
+
+    # one document per type and citizen; also the index for a citizen's documents
+    __table_args__ = (
+        UniqueConstraint("nic", "document_type_id", name="uq_citizen_document"),
+    )
+
+    citizen = relationship("Citizen", back_populates="documents")
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.search import search_vector_column, search_names_column
 from datetime import datetime
 
 class GovNode(Base):
@@ -11,7 +12,7 @@ class GovNode(Base):
     username = Column(String)
     password = Column(String)
     category_id = Column(Integer, ForeignKey("gov_service_categories.id"))
-    category = relationship("GovServiceCategory")
+    category = relationship("GovServiceCategory", back_populates="offices")
     location = Column(String)
     name_si = Column(String)
     name_en = Column(String)
@@ -20,6 +21,17 @@ class GovNode(Base):
     description_si = Column(String)
     description_en = Column(String)
     description_ta = Column(String)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
+    search_vector = search_vector_column(
+        ("A", ("name_si", "name_en", "name_ta")),
+        ("B", ("location",)),
+    )
+    search_names = search_names_column(("name_si", "name_en", "name_ta", "location"))
 
-    # gov_service_category = relationship("GovServiceCategory", back_populates="offices")
+    __table_args__ = (
+        Index("ix_gov_nodes_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    services = relationship("GovNodeService", back_populates="office", order_by="GovNodeService.service_id")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.search import search_vector_column, search_names_column
 from datetime import datetime
 
 class GovNodeService(Base):
@@ -20,5 +21,15 @@ class GovNodeService(Base):
     updated_at = Column(DateTime, default=datetime.now)
     is_active = Column(Boolean, default=True)
     required_document_types = Column(ARRAY(Integer), default=list)
+    search_vector = search_vector_column(
+        ("A", ("service_name_si", "service_name_en", "service_name_ta")),
+        ("B", ("description_si", "description_en", "description_ta")),
+    )
+    search_names = search_names_column(("service_name_si", "service_name_en", "service_name_ta"))
 
+    __table_args__ = (
+        Index("ix_gov_node_services_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    office = relationship("GovNode", back_populates="services")
     reservation_slots = relationship("ReservationSlots", back_populates="sub_services", cascade="all, delete-orphan")
\ No newline at end of file
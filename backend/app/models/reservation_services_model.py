@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Time, DateTime, ForeignKey, Boolean, Date, UniqueConstraint
+from sqlalchemy import Column, Integer, SmallInteger, Float, String, Time, DateTime, ForeignKey, Boolean, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from datetime import datetime, time
@@ -10,6 +10,9 @@ class ReservedUser(Base):
     # reservation_id = Column(Integer, ForeignKey("reservation_slots.reservation_id"), index=True)
     slot_id = Column(Integer, ForeignKey("reservation_slots.slot_id"), index=True)
     citizen_nic = Column(String, ForeignKey("citizens.nic"), index=True)
+    # booked, checked_in or no_show; NULL on reservations made before attendance was recorded
+    attendance = Column(String, nullable=True, default="booked")
+    checked_in_at = Column(DateTime, nullable=True)
 
     citizen = relationship("Citizen", back_populates="reservations")
     slot = relationship("ReservationSlots", back_populates="reserved_users")
@@ -30,7 +33,43 @@ class ReservationSlots(Base):
     # composite unique constraint
     __table_args__ = (
         UniqueConstraint("reservation_id", "start_time", "end_time", name="uq_reservation_slot"),
+        # slots of a set of services in a date window, in booking order
+        Index("ix_reservation_slots_service_date_time", "reservation_id", "booking_date", "start_time"),
     )
     # when delete slot id its associated ReservedUser also needed to be deleted
     reserved_users = relationship("ReservedUser", back_populates="slot", cascade="all, delete-orphan")
-    sub_services = relationship("GovNodeService", back_populates="reservation_slots")
\ No newline at end of file
+    sub_services = relationship("GovNodeService", back_populates="reservation_slots")
+
+class ReservationRollup(Base):
+    """
+    Per service, booking date and start hour counters of the slots, maintained by the
+    slot and reservation writes (see app.db.rollups).
+    """
+    __tablename__ = "reservation_rollups"
+
+    service_id = Column(Integer, ForeignKey("gov_node_services.service_id", ondelete="CASCADE"), primary_key=True)
+    booking_date = Column(Date, primary_key=True)
+    hour = Column(SmallInteger, primary_key=True)
+    slots = Column(Integer, nullable=False, default=0, server_default="0")
+    capacity = Column(Integer, nullable=False, default=0, server_default="0")
+    reserved = Column(Integer, nullable=False, default=0, server_default="0")
+    bookings = Column(Integer, nullable=False, default=0, server_default="0")
+    cancellations = Column(Integer, nullable=False, default=0, server_default="0")
+    checked_in = Column(Integer, nullable=False, default=0, server_default="0")
+    no_shows = Column(Integer, nullable=False, default=0, server_default="0")
+
+class CapacityRecommendation(Base):
+    """
+    Forecast demand and recommended slot capacity of a service per weekday (0 is
+    Monday) and start hour, published by the forecasting job (see app.core.forecast).
+    """
+    __tablename__ = "capacity_recommendations"
+
+    service_id = Column(Integer, ForeignKey("gov_node_services.service_id", ondelete="CASCADE"), primary_key=True)
+    weekday = Column(SmallInteger, primary_key=True)
+    hour = Column(SmallInteger, primary_key=True)
+    forecast_demand = Column(Float, nullable=False)
+    demand_std = Column(Float, nullable=False)
+    recommended_capacity = Column(Integer, nullable=False)
+    observed_weeks = Column(Integer, nullable=False)
+    fitted_at = Column(DateTime, default=datetime.now)
@@ -13,4 +13,36 @@ class ServiceRating(Base):
     comment = Column(String, nullable=True, default="")
     created_at = Column(DateTime, default=datetime.now)
 
-    # service = relationship("GovNodeService", back_populates="ratings")
\ No newline at end of file
+    # service = relationship("GovNodeService", back_populates="ratings")
+
+class ServiceRatingAggregate(Base):
+    """
+    Running rating totals and 1-5 histogram of a service, maintained by the rating
+    writes (see app.db.rating_aggregates).
+    """
+    __tablename__ = "service_rating_aggregates"
+
+    service_id = Column(Integer, ForeignKey("gov_node_services.service_id", ondelete="CASCADE"), primary_key=True)
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_5 = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class OfficeRatingAggregate(Base):
+    """
+    Running rating totals and 1-5 histogram of an office (the ratings' service_node_id).
+    """
+    __tablename__ = "office_rating_aggregates"
+
+    gov_node_id = Column(Integer, ForeignKey("gov_nodes.id", ondelete="CASCADE"), primary_key=True)
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_5 = Column(Integer, nullable=False, default=0, server_default="0")
@@ -15,4 +15,4 @@ class GovServiceCategory(Base):
     description_ta = Column(String)
     created_at = Column(DateTime, default=datetime.now)
 
-    # offices = relationship("GovNode", back_populates="gov_service_category")
+    offices = relationship("GovNode", back_populates="category", order_by="GovNode.id")
@@ -1,10 +1,11 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import date, datetime
 
 class MostReservedSlotSchema(BaseModel):
     booking_date: str
-    max_reserved: int
-    start_time: str
+    max_reserved: int = Field(..., description="Reservations summed over every slot starting in this hour, not the busiest single slot")
+    start_time: str = Field(..., description="Start of the hour the slots are grouped by")
 
 class AppointmentPercentageChangeSchema(BaseModel):
     percentage_change: Optional[float]
@@ -15,3 +16,57 @@ class TodayAppointmentCountSchema(BaseModel):
 class OverallSatisfactionSchema(BaseModel):
     category_en: str
     avg_rating: float
+
+class ServiceDashboardSchema(BaseModel):
+    service_id: int
+    service_type: Optional[str]
+    service_name_en: Optional[str]
+    most_reserved_slots: List[MostReservedSlotSchema]
+    today_count: int
+    percentage_change: Optional[float]
+    avg_rating: Optional[float]
+    rating_count: int
+
+class OfficeDashboardSchema(BaseModel):
+    office_id: int
+    services: List[ServiceDashboardSchema]
+
+class TimeSeriesSchema(BaseModel):
+    metric: Literal["bookings", "utilisation", "ratings"]
+    bucket: Literal["hour", "day", "week", "month"]
+    service_id: Optional[int]
+    office_id: Optional[int]
+    start: date
+    end: date
+    window: Optional[int]
+    # one entry per bucket, in order
+    buckets: List[datetime]
+    values: List[Optional[float]]
+    counts: List[int]
+    rolling_average: Optional[List[Optional[float]]]
+
+class CapacityRecommendationSchema(BaseModel):
+    service_id: int
+    weekday: int  # 0 is Monday
+    hour: int
+    forecast_demand: float
+    demand_std: float
+    recommended_capacity: int
+    observed_weeks: int
+    fitted_at: datetime
+
+class OfficeAttendanceSchema(BaseModel):
+    office_id: int
+    start: date
+    end: date
+    capacity: int
+    reserved: int
+    checked_in: int
+    no_shows: int
+    unmarked: int  # reserved places neither checked in nor marked as no-shows
+    utilisation: Optional[float]
+    attendance_rate: Optional[float]
+    no_show_rate: Optional[float]
+    # weekday (0 is Monday) x hour
+    heatmap: List[List[int]]
+    utilisation_heatmap: List[List[Optional[float]]]
@@ -7,6 +7,7 @@ class DocumentJsonDict(BaseModel):
     title: str = Field(..., min_length=3, max_length=100)
     url: str = Field(..., min_length=5, max_length=200)
     uploaded_at: datetime = Field(...)
+    document_type_id: Optional[int] = Field(None, description="Document type this document satisfies")
 
 
 class Citizen(BaseModel):
@@ -38,7 +39,8 @@ class Citizen(BaseModel):
                     {
                         "title": "birth certificate",
                         "url": "https://example.com/birth_cert.pdf",
-                        "uploaded_at": "2025-08-09T06:30:00Z"
+                        "uploaded_at": "2025-08-09T06:30:00Z",
+                        "document_type_id": 1
                     },
                     {
                         "title": "license",
@@ -81,7 +83,8 @@ class CitizenCreate(BaseModel):
                     {
                         "title": "birth certificate",
                         "url": "https://example.com/birth_cert.pdf",
-                        "uploaded_at": "2025-08-09T06:30:00Z"
+                        "uploaded_at": "2025-08-09T06:30:00Z",
+                        "document_type_id": 1
                     },
                     {
                         "title": "license",
@@ -105,7 +108,6 @@ class CitizenResponse(BaseModel):
     phone: str = Field(..., min_length=10, max_length=15)
     role: Literal["user", "normal"] = Field(..., description="Role of the citizen")
     active: bool = Field(default=False)
-    document_links: Optional[List[DocumentJsonDict]] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.now)
 
     model_config = ConfigDict(
@@ -119,18 +121,6 @@ class CitizenResponse(BaseModel):
                 "email": "john@gmail.com",
                 "phone": "0712345678",
                 "role": "user",
-                "document_links": [
-                    {
-                        "title": "birth certificate",
-                        "url": "https://example.com/birth_cert.pdf",
-                        "uploaded_at": "2025-08-09T06:30:00Z"
-                    },
-                    {
-                        "title": "license",
-                        "url": "https://example.com/license.pdf",
-                        "uploaded_at": "2025-08-09T07:00:00Z"
-                    }
-                ],
                 "active": False,
                 "created_at": "2025-08-09T07:00:00Z"
             }
@@ -182,7 +172,8 @@ class CitizenUpdateDocumentLinks(BaseModel):
                     {
                         "title": "birth certificate",
                         "url": "https://example.com/birth_cert.pdf",
-                        "uploaded_at": "2025-08-09T06:30:00Z"
+                        "uploaded_at": "2025-08-09T06:30:00Z",
+                        "document_type_id": 1
                     },
                     {
                         "title": "license",
@@ -193,3 +184,75 @@ class CitizenUpdateDocumentLinks(BaseModel):
             }
         },
     )
+
+
+class CitizenBatchRequest(BaseModel):
+    nics: List[str] = Field(..., min_length=1, max_length=500)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "nics": ["123456789V", "987654321V"]
+            }
+        }
+    )
+
+
+class ReadinessRequest(BaseModel):
+    service_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "service_ids": [1, 2, 3]
+            }
+        }
+    )
+
+class ServiceReadiness(BaseModel):
+    service_id: int
+    ready: bool
+    missing_document_types: List[int]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "service_id": 1,
+                "ready": False,
+                "missing_document_types": [2]
+            }
+        }
+    )
+
+class CitizenDocumentCreate(BaseModel):
+    title: str = Field(..., min_length=3, max_length=100)
+    url: str = Field(..., min_length=5, max_length=200)
+    uploaded_at: datetime = Field(default_factory=datetime.now)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "title": "birth certificate",
+                "url": "https://example.com/birth_cert.pdf",
+                "uploaded_at": "2025-08-09T06:30:00Z"
+            }
+        }
+    )
+
+class CitizenDocumentResponse(BaseModel):
+    document_type_id: Optional[int] = Field(None, description="None for a legacy link without a document type")
+    title: str
+    url: str
+    uploaded_at: Optional[datetime] = Field(None, description="None for a legacy link stored without an upload time")
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "example": {
+                "document_type_id": 1,
+                "title": "birth certificate",
+                "url": "https://example.com/birth_cert.pdf",
+                "uploaded_at": "2025-08-09T06:30:00Z"
+            }
+        }
+    )
@@ -0,0 +1,49 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.schemas.gov_schema import FreeSlot
+
+class DirectoryService(BaseModel):
+    service_id: int
+    service_type: str
+    service_name_si: str
+    service_name_en: str
+    service_name_ta: str
+    required_document_types: List[int] = []
+    next_slot: Optional[FreeSlot] = None
+
+class DirectoryServiceLocalized(BaseModel):
+    service_id: int
+    service_type: str
+    service_name: str
+    required_document_types: List[int] = []
+    next_slot: Optional[FreeSlot] = None
+
+class DirectoryOffice(BaseModel):
+    id: int
+    name_si: str
+    name_en: str
+    name_ta: str
+    location: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    services: List[DirectoryService]
+
+class DirectoryOfficeLocalized(BaseModel):
+    id: int
+    name: str
+    location: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    services: List[DirectoryServiceLocalized]
+
+class DirectoryCategory(BaseModel):
+    id: int
+    category_si: str
+    category_en: str
+    category_ta: str
+    offices: List[DirectoryOffice]
+
+class DirectoryCategoryLocalized(BaseModel):
+    id: int
+    category: str
+    offices: List[DirectoryOfficeLocalized]
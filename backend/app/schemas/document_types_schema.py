@@ -27,6 +27,25 @@ class DocumentTypeBase(BaseModel):
             }
         }
     )
+
+
+class DocumentTypeLocalized(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_schema_extra={
+            "example": {
+                "id": 1,
+                "name": "Essential Document",
+                "description": "This is an essential document.",
+            }
+        }
+    )
     
 class DocumentTypeCreate(BaseModel):
     name_si: str
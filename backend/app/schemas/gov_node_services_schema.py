@@ -136,3 +136,35 @@ class GovNodeServiceResponse(GovNodeServiceBase):
         },
         
     )
+
+
+class GovNodeServiceLocalized(BaseModel):
+    service_id: int
+    gov_node_id: int
+    service_type: str
+    service_name: str
+    description: str
+    created_at: datetime
+    updated_at: datetime
+    is_active: bool
+    required_document_types: list[int] = []
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_schema_extra={
+            "examples": [
+                {
+                    "service_id": 1,
+                    "gov_node_id": 1,
+                    "service_type": "public",
+                    "service_name": "Service Name English",
+                    "description": "Description English",
+                    "created_at": "2023-01-01T00:00:00Z",
+                    "updated_at": "2023-01-01T00:00:00Z",
+                    "is_active": True,
+                    "required_document_types": [1, 2, 3]
+                }
+            ]
+        },
+    )
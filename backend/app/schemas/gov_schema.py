@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime, time
 
 class GovNode(BaseModel):
     id: Optional[int] = Field()
@@ -16,6 +16,8 @@ class GovNode(BaseModel):
     description_si: str = Field(..., min_length=10, max_length=500)
     description_en: str = Field(..., min_length=10, max_length=500)
     description_ta: str = Field(..., min_length=10, max_length=500)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     created_at: datetime = Field(default_factory=datetime.now)
 
     model_config = ConfigDict(
@@ -55,6 +57,8 @@ class GovNodeCreate(BaseModel):
     description_si: str = Field(..., min_length=10, max_length=500)
     description_en: str = Field(..., min_length=10, max_length=500)
     description_ta: str = Field(..., min_length=10, max_length=500)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     created_at: datetime = Field(default_factory=datetime.now)
 
     model_config = ConfigDict(
@@ -92,6 +96,8 @@ class GovNodeResponse(BaseModel):
     description_si: str
     description_en: str
     description_ta: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime
 
     model_config = ConfigDict(
@@ -117,6 +123,38 @@ class GovNodeResponse(BaseModel):
         },
     )
 
+class GovNodeLocalized(BaseModel):
+    id: int
+    email: str
+    username: str
+    location: str
+    category_id: int
+    name: str
+    role: str
+    description: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    created_at: datetime
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        from_attributes=True,
+        arbitrary_types_allowed=True,
+        json_schema_extra={
+            "example": {
+                "id": 1,
+                "email": "gov@example.com",
+                "username": "gov_user",
+                "location": "Colombo",
+                "category_id": 1,
+                "name": "Government Node",
+                "role": "user",
+                "description": "This is a government node.",
+                "created_at": "2023-01-01T00:00:00Z",
+            }
+        },
+    )
+
 class GovLogin(BaseModel):
     email: str = Field(..., min_length=3, max_length=100)
     password: str = Field(..., min_length=8)
@@ -132,3 +170,45 @@ class GovLogin(BaseModel):
             }
         },
     )
+
+class GovNodeCoordinates(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "latitude": 6.9271,
+                "longitude": 79.8612,
+            }
+        },
+    )
+
+class FreeSlot(BaseModel):
+    slot_id: int
+    service_id: int
+    booking_date: date
+    start_time: time
+    end_time: time
+
+class NearestGovNode(BaseModel):
+    id: int
+    location: str
+    name_si: str
+    name_en: str
+    name_ta: str
+    latitude: float
+    longitude: float
+    distance_km: float
+    service_ids: List[int]
+    earliest_slot: Optional[FreeSlot] = None
+
+class NearestGovNodeLocalized(BaseModel):
+    id: int
+    location: str
+    name: str
+    latitude: float
+    longitude: float
+    distance_km: float
+    service_ids: List[int]
+    earliest_slot: Optional[FreeSlot] = None
@@ -6,6 +6,7 @@ class DocumentJsonDict(BaseModel):
     title: str = Field(..., min_length=3, max_length=100)
     url: str = Field(..., min_length=5, max_length=200)
     uploaded_at: datetime = Field(..., default_factory=datetime.now)
+    document_type_id: Optional[int] = Field(None, description="Document type this document satisfies")
 
 class Registration(BaseModel):
     reference_id: int
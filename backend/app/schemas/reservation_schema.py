@@ -1,6 +1,6 @@
 from datetime import datetime, date, time
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Literal
 from app.schemas.citizen_schema import CitizenResponse
 
 
@@ -8,6 +8,8 @@ class ReservedUser(BaseModel):
     reference_id: int
     slot_id: int
     citizen_nic: str
+    attendance: Optional[str] = None
+    checked_in_at: Optional[datetime] = None
     citizen: Optional[CitizenResponse]
 
     model_config = ConfigDict(
@@ -43,6 +45,17 @@ class ReservedUser(BaseModel):
         }
     )
 
+class AttendanceUpdate(BaseModel):
+    attendance: Literal["booked", "checked_in", "no_show"] = Field(..., description="Attendance of the reservation")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "attendance": "checked_in"
+            }
+        }
+    )
+
 class ReservedUserCreate(BaseModel):
     slot_id: int
     citizen_nic: str
@@ -176,3 +189,50 @@ class ReservedUserSlotsResponse(BaseModel):
             }
         }
     )
+
+class SlotBatchRequest(BaseModel):
+    slot_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "slot_ids": [1, 2, 3]
+            }
+        }
+    )
+
+class ReservedUserBatchRequest(BaseModel):
+    reference_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "reference_ids": [1, 2, 3]
+            }
+        }
+    )
+
+class AvailableSlot(BaseModel):
+    slot_id: int
+    reservation_id: int
+    gov_node_id: int
+    booking_date: date
+    start_time: time
+    end_time: time
+    free_capacity: int
+    distance_km: Optional[float] = None
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "slot_id": 1,
+                "reservation_id": 1,
+                "gov_node_id": 3,
+                "booking_date": "2025-08-09",
+                "start_time": "07:00:00",
+                "end_time": "08:00:00",
+                "free_capacity": 5,
+                "distance_km": 4.2
+            }
+        }
+    )
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+class SearchResult(BaseModel):
+    kind: Literal["service", "office"]
+    id: int
+    office_id: int
+    name_si: Optional[str] = None
+    name_en: Optional[str] = None
+    name_ta: Optional[str] = None
+    location: Optional[str] = None
+    rank: float
+
+class SearchResultLocalized(BaseModel):
+    kind: Literal["service", "office"]
+    id: int
+    office_id: int
+    name: Optional[str] = None
+    location: Optional[str] = None
+    rank: float
+
+class SearchSuggestion(BaseModel):
+    text: str
+    kind: Literal["service", "office", "document"]
+    lang: Literal["si", "en", "ta"]
+    count: int
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 class ServiceRatingBase(BaseModel):
@@ -64,3 +64,17 @@ class ServiceRatingResponse(ServiceRatingBase):
         }
     )
 
+class RatingSummary(BaseModel):
+    average: Optional[float] = Field(None, description="Average rating, none without ratings")
+    count: int = Field(..., description="Number of ratings")
+    histogram: Dict[int, int] = Field(..., description="Number of ratings of each value (1-5)")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "average": 4.2,
+                "count": 5,
+                "histogram": {"1": 0, "2": 0, "3": 1, "4": 2, "5": 2}
+            }
+        }
+    )
@@ -54,3 +54,23 @@ class ServiceResponse(Service):
             }
         }
     )
+
+class ServiceLocalized(BaseModel):
+    id: int
+    category: str
+    description: str
+    created_at: datetime
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        from_attributes=True,
+        arbitrary_types_allowed=True,
+        json_schema_extra={
+            "example": {
+                "id": 1,
+                "category": "Service Category English",
+                "description": "This is a description of the service category.",
+                "created_at": "2023-01-01T00:00:00Z"
+            }
+        }
+    )
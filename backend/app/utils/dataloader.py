@@ -0,0 +1,67 @@
+"""
+DataLoader-style batching of single-row lookups.
+
+Concurrent `load(key, bind)` calls made within the same event-loop tick are collected
+and answered by one call to the batch function per engine, typically a single
+`IN (...)` query. The batch function is a blocking query, so it runs in the threadpool.
+Nothing is cached between ticks, so a loader can be shared by every request without
+serving stale rows.
+"""
+import asyncio
+from typing import Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """
+    :param batch_fn: Function taking a list of distinct keys and the engine to query,
+        returning a dict from key to value; keys missing from the dict resolve to None.
+    :param max_batch_size: Keys per batch_fn call; larger ticks are split into several calls.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[K], Engine], Dict[K, V]], max_batch_size: int = 500):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        # engine -> key -> future; callers on the primary and on the replica are batched apart
+        self._pending: Dict[Engine, Dict[K, asyncio.Future]] = {}
+
+    async def load(self, key: K, bind: Engine) -> Optional[V]:
+        """
+        Value of `key`, read through `bind`, usually the caller's `db.get_bind()`.
+        """
+        pending = self._pending.setdefault(bind, {})
+        future = pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not pending:
+                # first key of this tick, dispatch once the other ready callbacks have run
+                loop.call_soon(self._dispatch, bind)
+            future = loop.create_future()
+            pending[key] = future
+        return await future
+
+    async def load_many(self, keys: Iterable[K], bind: Engine) -> List[Optional[V]]:
+        return list(await asyncio.gather(*(self.load(key, bind) for key in keys)))
+
+    def _dispatch(self, bind: Engine):
+        pending = self._pending.pop(bind, {})
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch_size):
+            chunk = {key: pending[key] for key in keys[start:start + self.max_batch_size]}
+            asyncio.ensure_future(self._run(chunk, bind))
+
+    async def _run(self, futures: Dict[K, asyncio.Future], bind: Engine):
+        try:
+            values = await run_in_threadpool(self.batch_fn, list(futures), bind)
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(values.get(key))
@@ -0,0 +1,89 @@
+"""
+Strong ETags and conditional GET for the catalog endpoints.
+
+Every catalog table has a version counter in the shared state backend, bumped by the
+CRUD functions that write to it. The ETag of a response is a hash of the request
+(path, query string and resolved language) and the versions of the tables it reads,
+so a matching If-None-Match is answered with 304 before the database is touched.
+"""
+import hashlib
+from typing import Callable, Optional
+from fastapi import Depends, HTTPException, Request, Response
+from app.core.config import CATALOG_CACHE_MAX_AGE
+from app.core.state import get_state_backend
+from app.utils.i18n import get_language
+
+# CompressionMiddleware tags compressed representations as "<etag>-<encoding>"
+_ENCODING_SUFFIXES = ('-gzip"', '-br"')
+
+
+def _version_key(table: str) -> str:
+    return f"version:{table}"
+
+
+async def bump_table_version(table: str) -> int:
+    """
+    Invalidate the ETags of every response that reads `table`. Call after a committed write.
+    """
+    return await get_state_backend().incr(_version_key(table))
+
+
+async def table_version(table: str) -> int:
+    return await get_state_backend().get_counter(_version_key(table))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Weak comparison of an If-None-Match header against `etag`, as RFC 9110 requires for GET.
+
+    Returns the matching entity tag, which may carry a content-coding suffix, or None.
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        opaque = candidate.removeprefix("W/")
+        for suffix in _ENCODING_SUFFIXES:
+            if opaque.endswith(suffix):
+                opaque = opaque[:-len(suffix)] + '"'
+                break
+        if opaque == etag:
+            return candidate
+    return None
+
+
+def conditional_get(*tables: str) -> Callable:
+    """
+    Dependency factory for catalog endpoints reading `tables`.
+
+    Sets ETag and Cache-Control on the response and raises a 304 when the client already
+    has the current representation. Resolves to the headers, for endpoints that return
+    a Response object themselves and have to pass them on.
+    """
+    async def dependency(request: Request, response: Response, lang: Optional[str] = Depends(get_language)) -> dict:
+        versions = [str(await table_version(table)) for table in tables]
+        # versions from process-local counters restart at 0, tag them with the state they came from
+        local_id = get_state_backend().local_id
+        if local_id is not None:
+            versions.append(local_id)
+        digest = hashlib.sha1(
+            "|".join([request.url.path, request.url.query, lang or "", *versions]).encode("utf-8")
+        ).hexdigest()
+
+        headers = {
+            "ETag": f'"{digest}"',
+            "Cache-Control": f"public, max-age={CATALOG_CACHE_MAX_AGE}",
+        }
+        if lang is not None:
+            headers["Vary"] = "Accept-Language"
+        matched = etag_matches(request.headers.get("if-none-match"), headers["ETag"])
+        if matched:
+            # the 304 refers to the representation the client holds, compressed or not
+            raise HTTPException(status_code=304, headers={**headers, "ETag": matched})
+
+        response.headers.update(headers)
+        return headers
+
+    return dependency
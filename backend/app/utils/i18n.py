@@ -0,0 +1,90 @@
+"""
+Single-language projection of the trilingual (si/en/ta) entities.
+
+Endpoints that accept `get_language` keep returning every `_si`, `_en` and `_ta`
+column by default. With `?lang=si|en|ta` only that language's columns are selected
+in SQL and returned under the unsuffixed name (`name`, `description`, ...).
+`?lang=auto` picks the language from the Accept-Language header.
+"""
+from functools import lru_cache
+from typing import FrozenSet, Literal, Optional, Tuple, Type
+from fastapi import Header, Query
+from pydantic import BaseModel
+
+SUPPORTED_LANGUAGES = ("si", "en", "ta")
+DEFAULT_LANGUAGE = "en"
+
+
+def parse_accept_language(header: Optional[str]) -> str:
+    """
+    Return the supported language with the highest q-value in an Accept-Language header.
+    """
+    best, best_q = DEFAULT_LANGUAGE, 0.0
+    for position, part in enumerate((header or "").split(",")):
+        tag, _, params = part.strip().partition(";")
+        language = tag.split("-")[0].strip().lower()
+        if language not in SUPPORTED_LANGUAGES:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        # ties keep the earlier entry, as the header lists preferences in order
+        if q > best_q:
+            best, best_q = language, q
+    return best
+
+
+async def get_language(
+    lang: Optional[Literal["si", "en", "ta", "auto"]] = Query(
+        None, description="Return a single-language shape; 'auto' uses the Accept-Language header"
+    ),
+    accept_language: Optional[str] = Header(None),
+) -> Optional[str]:
+    """
+    Dependency resolving the requested response language, or None for the full trilingual shape.
+    """
+    if lang == "auto":
+        return parse_accept_language(accept_language)
+    return lang
+
+
+@lru_cache(maxsize=1024)
+def localized_columns(
+    model,
+    schema: Type[BaseModel],
+    lang: str,
+    prefixes: Tuple[Tuple[str, str], ...] = (),
+    fields: Optional[FrozenSet[str]] = None,
+) -> tuple:
+    """
+    ORM columns of `model` backing a single-language `schema`, labelled with the schema field names.
+
+    A field `name` is read from `name_<lang>` when the model has it, otherwise from the
+    same-named column. `prefixes` maps fields whose columns use another stem,
+    e.g. (("name", "type"),) reads `name` from `type_<lang>`. With `fields`, only those
+    schema fields are selected.
+    """
+    stems = dict(prefixes)
+    columns = []
+    for field in schema.model_fields:
+        if fields is not None and field not in fields:
+            continue
+        localized = f"{stems.get(field, field)}_{lang}"
+        if hasattr(model, localized):
+            columns.append(getattr(model, localized).label(field))
+        elif hasattr(model, field):
+            columns.append(getattr(model, field))
+    return tuple(columns)
+
+
+def language_headers(lang: Optional[str]) -> dict:
+    """
+    Headers describing a single-language response.
+    """
+    if lang is None:
+        return {}
+    return {"Content-Language": lang, "Vary": "Accept-Language"}
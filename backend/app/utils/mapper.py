@@ -0,0 +1,102 @@
+"""
+Declarative ORM -> Pydantic schema mapping shared by the CRUD modules.
+
+By default every schema field is read from the ORM attribute of the same name.
+Fields that are named differently or need a conversion are declared once with
+`register_mapping`. Each (ORM type, schema) pair is compiled into a converter the
+first time it is used and cached afterwards.
+"""
+from functools import lru_cache, partial
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, List, Optional, Type, TypeVar, Union
+from pydantic import BaseModel
+from app.models.document_types_model import DocumentType
+from app.models.registration_model import Registration
+from app.models.reservation_services_model import ReservedUser
+from app.schemas import citizen_schema, document_types_schema, registration_schema, reservation_schema
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+# (orm type, schema) -> {schema field: ORM attribute name or callable(obj)}
+_MAPPINGS: Dict[tuple, Dict[str, Union[str, Callable]]] = {}
+
+
+def register_mapping(orm_type: type, schema: Type[BaseModel], fields: Dict[str, Union[str, Callable]]):
+    """
+    Declare schema fields of `schema` that are not a same-named attribute of `orm_type`.
+
+    A string value names the ORM attribute to read, a callable receives the ORM object.
+    """
+    _MAPPINGS[(orm_type, schema)] = dict(fields)
+    _compile.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _compile(orm_type: type, schema: Type[SchemaT]) -> Callable[[object], SchemaT]:
+    spec = _MAPPINGS.get((orm_type, schema))
+    if not spec:
+        # pydantic-core reads the attributes itself, which beats building a dict in Python
+        return partial(schema.model_validate, from_attributes=True)
+
+    names, sources, computed = [], [], []
+    for name in schema.model_fields:
+        source = spec.get(name, name)
+        if callable(source):
+            computed.append((name, source))
+        elif hasattr(orm_type, source):
+            names.append(name)
+            sources.append(source)
+        # anything else falls back to the schema default
+
+    # attrgetter with several names returns a tuple in one C call
+    if len(sources) > 1:
+        getter = attrgetter(*sources)
+    elif sources:
+        single = attrgetter(sources[0])
+        getter = lambda obj: (single(obj),)
+    else:
+        getter = lambda obj: ()
+    names = tuple(names)
+    computed = tuple(computed)
+    validate = schema.model_validate
+
+    def convert(obj) -> SchemaT:
+        data = dict(zip(names, getter(obj)))
+        for name, fn in computed:
+            data[name] = fn(obj)
+        return validate(data)
+
+    return convert
+
+
+def to_schema(obj, schema: Type[SchemaT]) -> Optional[SchemaT]:
+    """
+    Convert one ORM object to `schema`; None stays None.
+    """
+    if obj is None:
+        return None
+    return _compile(type(obj), schema)(obj)
+
+
+def to_schemas(objs: Iterable, schema: Type[SchemaT]) -> List[SchemaT]:
+    """
+    Convert a list of ORM objects of the same type to `schema`.
+    """
+    objs = list(objs)
+    if not objs:
+        return []
+    convert = _compile(type(objs[0]), schema)
+    return [convert(obj) for obj in objs]
+
+
+register_mapping(DocumentType, document_types_schema.DocumentTypeBase, {
+    "name_si": "type_si",
+    "name_en": "type_en",
+    "name_ta": "type_ta",
+})
+register_mapping(Registration, registration_schema.RegistrationResponse, {
+    "document_links": lambda registration: registration.document_links or [],
+})
+register_mapping(ReservedUser, reservation_schema.ReservedUser, {
+    "citizen": lambda user: to_schema(user.citizen, citizen_schema.CitizenResponse),
+})
@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Pages are ordered by a unique, stable key (the primary key), and the cursor is the
+opaque, url-safe encoding of the last key on the page. Each page is fetched with
+`WHERE key > :last ORDER BY key LIMIT n`, which stays an index range scan however
+deep the client pages, unlike OFFSET. List bodies keep their shape; the cursor for
+the next page is sent in the `X-Next-Cursor` header and is absent on the last page.
+"""
+import base64
+import json
+from bisect import bisect_right
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from fastapi import HTTPException, Query
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query as SQLQuery
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams(NamedTuple):
+    after: Optional[tuple] = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(values)
+
+
+async def page_params(
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+) -> PageParams:
+    """
+    Dependency parsing the `cursor` and `limit` query parameters.
+    """
+    return PageParams(after=decode_cursor(cursor) if cursor else None, limit=limit)
+
+
+def paginate(query: SQLQuery, keys: Sequence, page: PageParams, descending: bool = False) -> Tuple[List, Optional[str]]:
+    """
+    Apply keyset pagination on the unique `keys` columns to `query`.
+
+    Returns the page and the cursor of the next page (None on the last page). Rows keep
+    the shape of `query`: model instances for `db.query(Model)`, row tuples for
+    `db.query(*columns)`, whether or not the key columns are among the selected ones.
+    """
+    descriptions = query.column_descriptions
+    single_entity = len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+    if page.after is not None:
+        if len(page.after) != len(keys):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        position = tuple_(*keys) if len(keys) > 1 else keys[0]
+        bound = tuple_(*page.after) if len(keys) > 1 else page.after[0]
+        query = query.filter(position < bound if descending else position > bound)
+
+    # labelled copies so the key values are always at the end of the row, even if selected already
+    query = query.add_columns(*(key.label(f"_cursor_{i}") for i, key in enumerate(keys)))
+    order = [key.desc() for key in keys] if descending else list(keys)
+    rows = query.order_by(*order).limit(page.limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(rows[-1][-len(keys):])
+
+    if single_entity:
+        return [row[0] for row in rows], next_cursor
+    return [tuple(row[:-len(keys)]) for row in rows], next_cursor
+
+
+def paginate_ids(ids: Sequence[int], page: PageParams) -> Tuple[Sequence[int], Optional[str]]:
+    """
+    Keyset pagination over an ascending sequence of integer keys held in memory.
+    """
+    start = 0
+    if page.after is not None:
+        if len(page.after) != 1 or not isinstance(page.after[0], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        start = bisect_right(ids, page.after[0])
+    chunk = ids[start:start + page.limit]
+    next_cursor = encode_cursor((chunk[-1],)) if start + page.limit < len(ids) else None
+    return chunk, next_cursor
+
+
+def page_headers(next_cursor: Optional[str]) -> dict:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
@@ -0,0 +1,81 @@
+from functools import lru_cache
+from typing import Any, Callable, FrozenSet, Iterable, List, Optional, Sequence, Type
+from fastapi import HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, FastJSONResponse falls back to the stdlib encoder
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Endpoints opt in with ``response_class=FastJSONResponse`` and return an instance
+    built from plain dicts/lists, which skips FastAPI's response_model validation and
+    serialization pass. The response_model is still used for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=1024)
+def model_columns(model, schema: Type[BaseModel], fields: Optional[FrozenSet[str]] = None) -> tuple:
+    """
+    ORM columns of `model` backing the fields of `schema`, in schema field order.
+    With `fields`, only those schema fields are selected.
+    """
+    return tuple(
+        getattr(model, name) for name in schema.model_fields
+        if hasattr(model, name) and (fields is None or name in fields)
+    )
+
+
+def check_projection(columns: tuple) -> tuple:
+    """
+    Reject a `fields=` selection that leaves no column to select in the requested shape.
+    """
+    if not columns:
+        raise HTTPException(status_code=400, detail="None of the requested fields exist in this response")
+    return columns
+
+
+def sparse_fields(*schemas: Type[BaseModel]) -> Callable:
+    """
+    Dependency factory for the `fields=` query parameter of list endpoints.
+
+    Resolves to a frozenset of the requested field names, or None when every field is
+    wanted. Names that are not a field of any of `schemas` are rejected with a 400.
+    """
+    allowed = {name for schema in schemas for name in schema.model_fields}
+
+    async def dependency(
+        fields: Optional[str] = Query(None, description="Comma separated list of fields to return")
+    ) -> Optional[FrozenSet[str]]:
+        if not fields:
+            return None
+        requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+        unknown = requested - allowed
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        return requested or None
+
+    return dependency
+
+
+def column_keys(columns: Iterable) -> tuple:
+    return tuple(column.key for column in columns)
+
+
+def rows_to_dicts(rows: Iterable[Sequence], keys: Sequence[str]) -> List[dict]:
+    """
+    Turn row tuples into dicts without building intermediate Pydantic objects.
+    """
+    return [dict(zip(keys, row)) for row in rows]
@@ -0,0 +1,95 @@
+"""
+Gap filling and rolling averages for bucketed time series.
+
+SQL groups the rows with `date_trunc`, so only buckets with data come back; these
+helpers lay them out on the full range of buckets as NumPy arrays and smooth them
+without a Python loop per bucket. Buckets follow Postgres: weeks start on Monday,
+months on the 1st.
+"""
+from datetime import date, datetime, timedelta
+from typing import Sequence, Tuple
+import numpy as np
+
+BUCKETS = ("hour", "day", "week", "month")
+
+# numpy datetime64 unit of each bucket, and the step between two buckets in it
+_UNITS = {"hour": ("h", 1), "day": ("D", 1), "week": ("D", 7), "month": ("M", 1)}
+
+
+def bucket_starts(bucket: str, start: date, end: date) -> np.ndarray:
+    """
+    Start of every bucket overlapping the days `start` to `end`, inclusive.
+    """
+    unit, step = _UNITS[bucket]
+    if bucket == "week":
+        start = start - timedelta(days=start.weekday())
+    first = np.datetime64(start, unit)
+    last = np.datetime64(end + timedelta(days=1), unit) if bucket == "hour" else np.datetime64(end, unit) + 1
+    return np.arange(first, last, step)
+
+
+def bucket_count(bucket: str, start: date, end: date) -> int:
+    """
+    Number of buckets `bucket_starts` would return, without building them.
+    """
+    days = (end - start).days + 1
+    if bucket == "hour":
+        return days * 24
+    if bucket == "day":
+        return days
+    if bucket == "week":
+        return ((end - timedelta(days=end.weekday())) - (start - timedelta(days=start.weekday()))).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def fill_gaps(
+    starts: np.ndarray, buckets: Sequence[datetime], *columns: Sequence[float], fill: float = 0.0
+) -> Tuple[np.ndarray, ...]:
+    """
+    Spread `columns`, given for the `buckets` SQL returned, over all bucket `starts`;
+    missing buckets get `fill`.
+    """
+    filled = tuple(np.full(len(starts), fill, dtype=float) for _ in columns)
+    if len(buckets):
+        index = np.searchsorted(starts, np.array(buckets, dtype=starts.dtype))
+        for target, column in zip(filled, columns):
+            target[index] = np.asarray(column, dtype=float)
+    return filled
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum of each value and the `window - 1` before it.
+    """
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    upper = np.arange(1, len(values) + 1)
+    return sums[upper] - sums[np.maximum(upper - window, 0)]
+
+
+def rolling_ratio(numerators: np.ndarray, denominators: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling sum of `numerators` over rolling sum of `denominators`, e.g. an average
+    rating weighted by the ratings per bucket; NaN where the denominators sum to 0.
+    """
+    numerator, denominator = rolling_sum(numerators, window), rolling_sum(denominators, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of each value and the `window - 1` before it, skipping NaN; NaN where the
+    window holds no value.
+    """
+    valid = ~np.isnan(values)
+    return rolling_ratio(np.where(valid, values, 0.0), valid.astype(float), window)
+
+
+def nullable(values: np.ndarray) -> list:
+    """
+    `values` as a list with NaN as None, for JSON.
+    """
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    return result.tolist()
+
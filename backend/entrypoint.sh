@@ -1,3 +1,4 @@
 #!/bin/sh
-# Start FastAPI server
-uvicorn app.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+# Start FastAPI server; the client address comes from the ingress' X-Forwarded-For,
+# so rate limits apply per client rather than to the ingress
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --proxy-headers --forwarded-allow-ips "*"
\ No newline at end of file
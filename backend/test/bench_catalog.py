@@ -0,0 +1,71 @@
+"""
+Cost of a catalog read served from the in-memory snapshot.
+
+Builds a GovNodeService section of 100k rows from synthetic tuples (no database needed)
+and times a 100-row page of one office in the full, single-language and sparse shapes,
+plus a single lookup by id. Run from the backend directory:
+
+    PYTHONPATH=. python test/bench_catalog.py
+"""
+import time
+from datetime import datetime
+from types import MappingProxyType
+from app.core.catalog import CatalogSection
+from app.schemas.gov_node_services_schema import GovNodeServiceLocalized, GovNodeServiceResponse
+from app.utils.pagination import PageParams, paginate_ids
+
+ROWS = 100_000
+OFFICES = 500
+
+
+def make_section() -> CatalogSection:
+    now = datetime(2025, 1, 1)
+    fields = tuple(GovNodeServiceResponse.model_fields)
+    values = {
+        "service_type": "driving_licence", "service_name_si": "සේවා නාමය", "service_name_en": "Service Name",
+        "service_name_ta": "சேவை பெயர்", "description_si": "විස්තර", "description_en": "Description",
+        "description_ta": "விளக்கம்", "created_at": now, "updated_at": now, "is_active": True,
+        "required_document_types": (1, 2, 3),
+    }
+    rows, groups = {}, {}
+    for i in range(ROWS):
+        row = {**values, "service_id": i, "gov_node_id": i % OFFICES}
+        rows[i] = tuple(row.get(field) for field in fields)
+        groups.setdefault(i % OFFICES, []).append(i)
+    return CatalogSection(
+        1, fields, MappingProxyType(rows), tuple(rows),
+        MappingProxyType({office: tuple(ids) for office, ids in groups.items()}),
+    )
+
+
+def measure(fn, repeat: int = 200) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main():
+    section = make_section()
+    page = PageParams(limit=100)
+
+    def read(lang=None, fields=None, schema=None):
+        ids, _ = paginate_ids(section.group_ids(7), page)
+        return section.project(ids, lang, fields, schema)
+
+    cases = [
+        ("full page", lambda: read()),
+        ("lang=en page", lambda: read("en", None, GovNodeServiceLocalized)),
+        ("fields= page", lambda: read(None, frozenset({"service_id", "service_name_en"}))),
+        ("lookup by id", lambda: section.project((ROWS // 2,))),
+    ]
+    print(f"{ROWS} services in {OFFICES} offices")
+    print(f"{'case':<16} {'us/read':>9}")
+    for label, fn in cases:
+        print(f"{label:<16} {measure(fn):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+CPU vs bytes tradeoff of response compression for a trilingual catalog payload.
+
+For each codec setting, reports the compressed size, the ratio and the time to
+compress one response. The last rows show what CompressionMiddleware pays per
+request for a catalog response once its compressed form is cached by ETag.
+Run from the backend directory:
+
+    PYTHONPATH=. python test/bench_compression.py
+"""
+import gzip
+import time
+from datetime import datetime, timedelta
+from app.core.middleware import CompressionMiddleware, brotli
+from app.schemas.gov_schema import GovNodeResponse
+from app.utils.responses import FastJSONResponse, rows_to_dicts
+
+KEYS = tuple(GovNodeResponse.model_fields)
+
+
+def make_payload(count: int) -> bytes:
+    created_at = datetime(2025, 1, 1)
+    rows = [
+        (
+            i, f"office{i}@gov.lk", f"office_{i}", "Colombo", i % 12,
+            f"කාර්යාලය {i}", f"Government Office {i}", f"அலுவலகம் {i}", "user",
+            "මෙය රජයේ කාර්යාලයකි.", "This is a government office.", "இது ஒரு அரசாங்க அலுவலகம்.",
+            created_at + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    return FastJSONResponse(rows_to_dicts(rows, KEYS)).body
+
+
+def measure(fn, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main():
+    codecs = [("gzip-1", lambda body: gzip.compress(body, compresslevel=1, mtime=0)),
+              ("gzip-6", lambda body: gzip.compress(body, compresslevel=6, mtime=0)),
+              ("gzip-9", lambda body: gzip.compress(body, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        codecs += [("br-1", lambda body: brotli.compress(body, quality=1)),
+                   ("br-5", lambda body: brotli.compress(body, quality=5)),
+                   ("br-11", lambda body: brotli.compress(body, quality=11))]
+
+    for count in (20, 200, 2000):
+        body = make_payload(count)
+        print(f"\n{count} offices, {len(body)} bytes uncompressed")
+        print(f"{'codec':<14} {'bytes':>9} {'ratio':>7} {'us/response':>12}")
+        for label, codec in codecs:
+            size = len(codec(body))
+            print(f"{label:<14} {size:>9} {len(body) / size:>6.1f}x {measure(lambda: codec(body)):>12.1f}")
+
+        middleware = CompressionMiddleware(app=None)
+        encoding = "br" if brotli is not None else "gzip"
+        miss = measure(lambda: middleware._cached_compress(body, encoding, None))
+        middleware._cached_compress(body, encoding, '"etag"')
+        hit = measure(lambda: middleware._cached_compress(body, encoding, '"etag"'))
+        print(f"{'middleware':<14} {encoding + ' uncached':>21} {miss:>12.1f}")
+        print(f"{'middleware':<14} {encoding + ' cached':>21} {hit:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Backtest error and fit time of the weekly capacity forecast on synthetic bookings.
+
+Each synthetic service has a weekday x hour demand profile with a slow trend and
+Poisson noise, slots only in office hours on weekdays, and capacities set with
+some guesswork so part of the hours sell out. The last weeks are held out and
+forecast from the rest, next to the seasonal naive forecast. Run from the backend
+directory:
+
+    PYTHONPATH=. python test/bench_forecast.py
+"""
+import numpy as np
+from app.core.forecast import HISTORY_WEEKS, backtest, demand_matrix
+
+SERVICES = (100, 1_000, 5_000)
+HOLDOUT_WEEKS = 4
+OPEN_HOURS = range(8, 16)
+
+
+def make_rows(services: int, weeks: int, rng: np.random.Generator) -> np.ndarray:
+    days = np.arange(weeks * 7)
+    days = days[days % 7 < 5]
+    hours = np.array(OPEN_HOURS)
+    service, day, hour = (grid.ravel() for grid in np.meshgrid(np.arange(services), days, hours, indexing="ij"))
+    level = rng.gamma(2.0, 3.0, services)
+    weekday_shape = rng.uniform(0.6, 1.4, (services, 7))
+    hour_shape = rng.uniform(0.5, 1.5, (services, len(hours)))
+    trend = np.maximum(1 + rng.normal(0, 0.01, services)[:, None] * np.arange(weeks), 0.2)
+    expected = (level[service] * weekday_shape[service, day % 7] * hour_shape[service, hour - hours[0]]
+                * trend[service, day // 7])
+    demand = rng.poisson(expected)
+    capacity = np.maximum(np.round(level[service] * rng.uniform(0.8, 2.0, services)[service]), 1).astype(int)
+    reserved = np.minimum(demand, capacity)
+    return np.stack([service + 1, day, hour, reserved, capacity], axis=1)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    weeks = HISTORY_WEEKS + HOLDOUT_WEEKS
+    print(f"{'services':>8} {'rows':>9} {'hours':>8} {'mae':>6} {'naive':>6} {'rmse':>6} {'cover':>6} {'fit ms':>7}")
+    for services in SERVICES:
+        rows = make_rows(services, weeks, rng)
+        _, matrix = demand_matrix(rows, weeks)
+        result = backtest(matrix, HOLDOUT_WEEKS)
+        print(f"{services:>8} {len(rows):>9} {result['scored_hours']:>8} {result['mae']:>6.2f} {result['naive_mae']:>6.2f} "
+              f"{result['rmse']:>6.2f} {result['coverage']:>6.1%} {result['fit_seconds'] * 1000:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
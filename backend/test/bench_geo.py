@@ -0,0 +1,48 @@
+"""
+Build time and k-nearest latency of the office grid, checked against a full scan.
+
+Places synthetic offices over Sri Lanka (plus a few abroad, e.g. embassies) and times
+`GeoGrid.nearest` for random points on the island. Run from the backend directory:
+
+    PYTHONPATH=. python test/bench_geo.py
+"""
+import random
+import time
+from app.core.geo import GeoGrid, haversine_km
+
+OFFICES = (1_000, 20_000, 100_000)
+QUERIES = 1_000
+ABROAD = [(51.5, -0.13), (-33.87, 151.21), (25.2, 55.27)]
+
+
+def make_points(count: int) -> list:
+    rng = random.Random(0)
+    points = [(i, rng.uniform(5.9, 9.8), rng.uniform(79.6, 81.9)) for i in range(1, count + 1)]
+    return points + [(count + i, latitude, longitude) for i, (latitude, longitude) in enumerate(ABROAD, 1)]
+
+
+def main():
+    rng = random.Random(1)
+    queries = [(rng.uniform(5.9, 9.8), rng.uniform(79.6, 81.9)) for _ in range(QUERIES)]
+    print(f"{'offices':>8} {'build ms':>9} {'k=1 us':>8} {'k=10 us':>8} {'scan us':>9}")
+    for count in OFFICES:
+        points = make_points(count)
+        start = time.perf_counter()
+        grid = GeoGrid(points)
+        build = (time.perf_counter() - start) * 1000
+        timings = []
+        for k in (1, 10):
+            start = time.perf_counter()
+            for latitude, longitude in queries:
+                grid.nearest(latitude, longitude, k)
+            timings.append((time.perf_counter() - start) / QUERIES * 1e6)
+        start = time.perf_counter()
+        for latitude, longitude in queries[:20]:
+            expected = sorted((haversine_km(latitude, longitude, a, b), i) for i, a, b in points)[:10]
+            assert [i for _, i in grid.nearest(latitude, longitude, 10)] == [i for _, i in expected]
+        scan = (time.perf_counter() - start) / 20 * 1e6
+        print(f"{count:>8} {build:>9.1f} {timings[0]:>8.1f} {timings[1]:>8.1f} {scan:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
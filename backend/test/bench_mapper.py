@@ -0,0 +1,105 @@
+"""
+Microbenchmark of ORM -> schema conversion.
+
+Compares the hand-written ``*Response(field=obj.field, ...)`` constructors the CRUD
+modules used to contain with the compiled converters from ``app.utils.mapper``,
+for a plain mapping (GovNodeServiceResponse) and a renamed one (DocumentTypeBase).
+"from_attributes" is a bare ``model_validate(obj, from_attributes=True)`` for reference;
+it cannot express the renamed fields of DocumentTypeBase. Run from the backend directory:
+
+    PYTHONPATH=. python test/bench_mapper.py
+"""
+import time
+from datetime import datetime
+from app.models.document_types_model import DocumentType
+from app.models.gov_node_services_model import GovNodeService
+from app.schemas.document_types_schema import DocumentTypeBase
+from app.schemas.gov_node_services_schema import GovNodeServiceResponse
+from app.utils.mapper import to_schemas
+
+ROWS = 10_000
+
+
+def make_services() -> list:
+    now = datetime(2025, 1, 1)
+    return [
+        GovNodeService(
+            service_id=i, gov_node_id=i % 50, service_type="driving_licence",
+            service_name_si="සේවා නාමය", service_name_en="Service Name", service_name_ta="சேவை பெயர்",
+            description_si="විස්තර", description_en="Description", description_ta="விளக்கம்",
+            created_at=now, updated_at=now, is_active=True, required_document_types=[1, 2, 3],
+        )
+        for i in range(ROWS)
+    ]
+
+
+def make_documents() -> list:
+    return [
+        DocumentType(
+            id=i, type_si="ලේඛනය", type_en="Document", type_ta="ஆவணம்",
+            description_si="විස්තර", description_en="Description", description_ta="விளக்கம்",
+        )
+        for i in range(ROWS)
+    ]
+
+
+def hand_written_services(services: list) -> list:
+    return [GovNodeServiceResponse(
+        service_id=service.service_id,
+        gov_node_id=service.gov_node_id,
+        service_type=service.service_type,
+        service_name_si=service.service_name_si,
+        service_name_en=service.service_name_en,
+        service_name_ta=service.service_name_ta,
+        description_si=service.description_si,
+        description_en=service.description_en,
+        description_ta=service.description_ta,
+        created_at=service.created_at,
+        updated_at=service.updated_at,
+        is_active=service.is_active,
+        required_document_types=service.required_document_types
+    ) for service in services]
+
+
+def hand_written_documents(docs: list) -> list:
+    return [DocumentTypeBase(
+        id=doc.id,
+        name_si=doc.type_si,
+        name_en=doc.type_en,
+        name_ta=doc.type_ta,
+        description_si=doc.description_si,
+        description_en=doc.description_en,
+        description_ta=doc.description_ta,
+    ) for doc in docs]
+
+
+def from_attributes(objs: list, schema) -> list:
+    return [schema.model_validate(obj, from_attributes=True) for obj in objs]
+
+
+def measure(fn, *args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / ROWS * 1e6
+
+
+def main():
+    services = make_services()
+    documents = make_documents()
+    cases = [
+        ("GovNodeServiceResponse", hand_written_services, services, GovNodeServiceResponse, True),
+        ("DocumentTypeBase", hand_written_documents, documents, DocumentTypeBase, False),
+    ]
+    print(f"{'schema':<24} {'hand-written us/item':>21} {'mapper us/item':>15} {'from_attributes us/item':>24}")
+    for label, hand_written, objs, schema, same_names in cases:
+        before = measure(hand_written, objs)
+        after = measure(to_schemas, objs, schema)
+        reference = f"{measure(from_attributes, objs, schema):.2f}" if same_names else "n/a"
+        print(f"{label:<24} {before:>21.2f} {after:>15.2f} {reference:>24}")
+
+
+if __name__ == "__main__":
+    main()
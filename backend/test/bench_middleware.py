@@ -0,0 +1,103 @@
+"""
+Throughput benchmark for the middleware stack on a trivial `/health` endpoint.
+
+Compares the previous ``BaseHTTPMiddleware`` implementations with the pure ASGI
+middleware in ``app.core.middleware``. Run from the backend directory:
+
+    PYTHONPATH=. python test/bench_middleware.py --requests 5000
+"""
+import argparse
+import asyncio
+import logging
+import time
+import httpx
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.middleware import SecurityCustomHeaderCheckMiddleware, RateLimitMiddleware, ProcessTimeMiddleware
+
+SECRET_TOKEN = "tech25"
+
+# app.utils.logger configures INFO logging, which would log every benchmark request
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class LegacySecurityMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in ["/docs", "/redoc", "/openapi.json"]:
+            return await call_next(request)
+        if request.headers.get("Secret-token") == SECRET_TOKEN:
+            return await call_next(request)
+        return Response(content="Invalid or missing security token", status_code=401)
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, rate_limit: float = 0.0):
+        super().__init__(app)
+        self.rate_limit_records = {}
+        self.rate_limit = rate_limit
+        self.lock = asyncio.Lock()
+
+    async def dispatch(self, request: Request, call_next):
+        client_ip = request.client.host
+        current_time = time.time()
+        async with self.lock:
+            last_request_time = self.rate_limit_records.get(client_ip, 0)
+            if current_time - last_request_time < self.rate_limit:
+                return Response(content="Rate limit exceeded", status_code=429)
+            self.rate_limit_records[client_ip] = current_time
+
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = f"{time.time() - start_time:.4f} seconds"
+        return response
+
+
+def build_app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "ok"}
+
+    # rate_limit=0 keeps the limiter on the hot path without rejecting the benchmark client
+    if legacy:
+        app.add_middleware(LegacyRateLimitMiddleware, rate_limit=0.0)
+        app.add_middleware(LegacySecurityMiddleware)
+    else:
+        app.add_middleware(ProcessTimeMiddleware)
+        app.add_middleware(RateLimitMiddleware, rate_limit=0.0)
+        app.add_middleware(SecurityCustomHeaderCheckMiddleware, secret_token=SECRET_TOKEN)
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Secret-token": SECRET_TOKEN}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        per_worker = requests // concurrency
+
+        async def worker():
+            for _ in range(per_worker):
+                response = await client.get("/health", headers=headers)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return (per_worker * concurrency) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, legacy in (("BaseHTTPMiddleware", True), ("pure ASGI", False)):
+        app = build_app(legacy)
+        asyncio.run(run(app, 200, args.concurrency))  # warm up
+        throughput = asyncio.run(run(app, args.requests, args.concurrency))
+        print(f"{label:<20} {throughput:10.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
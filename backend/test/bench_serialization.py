@@ -0,0 +1,66 @@
+"""
+Per-item serialization cost of list responses, for 1k and 10k rows.
+
+"pydantic" mirrors the previous path: a Response object is built field by field
+for every row, then FastAPI validates the list against the response_model and
+serializes it again. "row tuples" is the FastJSONResponse path: row tuples are
+zipped into dicts and rendered by orjson directly. Run from the backend directory:
+
+    PYTHONPATH=. python test/bench_serialization.py
+"""
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+from app.schemas.gov_schema import GovNodeResponse
+from app.utils.responses import FastJSONResponse, rows_to_dicts
+
+KEYS = tuple(GovNodeResponse.model_fields)
+
+
+def make_rows(count: int) -> list:
+    created_at = datetime(2025, 1, 1)
+    return [
+        (
+            i, f"office{i}@gov.lk", f"office_{i}", "Colombo", i % 12,
+            f"කාර්යාලය {i}", f"Government Office {i}", f"அலுவலகம் {i}", "user",
+            "මෙය රජයේ කාර්යාලයකි.", "This is a government office.", "இது ஒரு அரசாங்க அலுவலகம்.",
+            created_at + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def pydantic_path(rows: list) -> bytes:
+    adapter = TypeAdapter(List[GovNodeResponse])
+    objects = [GovNodeResponse(**dict(zip(KEYS, row))) for row in rows]
+    validated = adapter.validate_python(objects, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def row_tuple_path(rows: list) -> bytes:
+    return FastJSONResponse(rows_to_dicts(rows, KEYS)).body
+
+
+def measure(fn, rows: list, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best / len(rows) * 1e6
+
+
+def main():
+    print(f"{'rows':>6} {'pydantic us/item':>18} {'row tuples us/item':>20} {'speedup':>8}")
+    for count in (1_000, 10_000):
+        rows = make_rows(count)
+        slow = measure(pydantic_path, rows)
+        fast = measure(row_tuple_path, rows)
+        print(f"{count:>6} {slow:>18.2f} {fast:>20.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Build time, memory and query latency of the typeahead prefix index.
+
+Indexes synthetic English, Sinhala and Tamil service names (100k services, many of
+them sharing a name, as offices offer the same services) and times suggestions for
+prefixes of growing length. Run from the backend directory:
+
+    PYTHONPATH=. python test/bench_typeahead.py
+
+Query times cover both indexes of one language, as Typeahead.suggest searches them.
+"""
+import random
+import time
+import tracemalloc
+from app.core.typeahead import PrefixIndex, Suggestion, normalize
+
+SERVICES = 100_000
+
+VOCABULARY = {
+    "en": ["driving", "licence", "passport", "birth", "certificate", "renewal", "marriage", "land",
+           "registration", "vehicle", "tax", "pension", "identity", "card", "police", "clearance"],
+    "si": ["රියදුරු", "බලපත්‍ර", "ගමන්", "උප්පැන්න", "සහතිකය", "අලුත්", "විවාහ", "ඉඩම්",
+           "ලියාපදිංචි", "වාහන", "බදු", "විශ්‍රාම", "හැඳුනුම්", "පත", "පොලිස්", "නිෂ්කාශන"],
+    "ta": ["ஓட்டுநர்", "உரிமம்", "கடவுச்சீட்டு", "பிறப்பு", "சான்றிதழ்", "புதுப்பித்தல்", "திருமண", "நில",
+           "பதிவு", "வாகன", "வரி", "ஓய்வூதியம்", "அடையாள", "அட்டை", "பொலிஸ்", "அனுமதி"],
+}
+PREFIXES = {"en": ["d", "dr", "dri", "driving l", "registration of"], "si": ["ර", "රි", "රියදු"], "ta": ["உ", "உரி", "உரிமம்"]}
+
+
+def make_names(lang: str) -> list:
+    rng = random.Random(0)
+    counts = {}
+    for _ in range(SERVICES):
+        text = " ".join(rng.sample(VOCABULARY[lang], rng.randint(2, 4)))
+        counts[text] = counts.get(text, 0) + 1
+    return [Suggestion(text, "service", lang, count) for text, count in counts.items()]
+
+
+def measure(fn, repeat: int = 2000) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main():
+    for lang, prefixes in PREFIXES.items():
+        names = make_names(lang)
+        start = time.perf_counter()
+        PrefixIndex(names), PrefixIndex(names, whole_names=False)
+        build = time.perf_counter() - start
+        # again under tracemalloc, which slows the build down too much to time it
+        tracemalloc.start()
+        heads, words = PrefixIndex(names), PrefixIndex(names, whole_names=False)
+        _, peak = tracemalloc.get_traced_memory()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"\n{lang}: {len(names)} distinct names of {SERVICES} services, {len(heads.keys) + len(words.keys)} keys")
+        print(f"build {build * 1000:.0f} ms, index {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)")
+        print(f"{'prefix':<18} {'us/query':>9}")
+        for prefix in prefixes:
+            normalized = normalize(prefix)
+            elapsed = measure(lambda: (heads.search(normalized, 10), words.search(normalized, 10)))
+            print(f"{prefix:<18} {elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
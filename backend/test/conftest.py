@@ -0,0 +1,23 @@
+"""
+Behaviour tests of the logic that needs no database. Run from the backend directory:
+
+    python -m pytest test
+
+The Redis backend tests run against fakeredis and are skipped without it; the
+bench_*.py scripts are run directly, not collected.
+
+The settings app.core.config requires at import get placeholder values here, so the
+tests run without a .env; a real environment overrides them.
+"""
+import os
+
+for name, value in {
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "AZURE_CLIENT_ID": "test",
+    "AZURE_CLIENT_SECRET": "test",
+    "AZURE_TENANT_ID": "test",
+    "AZURE_BLOB_ACCOUNT_URL": "https://test.blob.core.windows.net",
+}.items():
+    os.environ.setdefault(name, value)
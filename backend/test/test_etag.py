@@ -0,0 +1,33 @@
+from app.utils.etag import etag_matches
+
+ETAG = '"abc123"'
+
+
+def test_no_header_does_not_match():
+    assert etag_matches(None, ETAG) is None
+    assert etag_matches("", ETAG) is None
+
+
+def test_exact_and_weak_tags_match():
+    assert etag_matches('"abc123"', ETAG) == '"abc123"'
+    assert etag_matches('W/"abc123"', ETAG) == 'W/"abc123"'
+
+
+def test_any_tag_in_a_list_matches():
+    assert etag_matches('"other", "abc123"', ETAG) == '"abc123"'
+    assert etag_matches('"other","abc123"', ETAG) == '"abc123"'
+
+
+def test_star_matches_the_current_tag():
+    assert etag_matches("*", ETAG) == ETAG
+
+
+def test_compressed_representations_match_and_keep_their_suffix():
+    assert etag_matches('"abc123-gzip"', ETAG) == '"abc123-gzip"'
+    assert etag_matches('W/"abc123-br"', ETAG) == 'W/"abc123-br"'
+
+
+def test_other_tags_do_not_match():
+    assert etag_matches('"abc1234"', ETAG) is None
+    assert etag_matches('"abc123-deflate"', ETAG) is None
+    assert etag_matches("abc123", ETAG) is None
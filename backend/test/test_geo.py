@@ -0,0 +1,68 @@
+import random
+import pytest
+from app.core.geo import GeoGrid, haversine_km
+
+
+def brute_force(points, latitude, longitude, k, accept=None, max_km=None):
+    distances = sorted(
+        (haversine_km(latitude, longitude, point_latitude, point_longitude), point_id)
+        for point_id, point_latitude, point_longitude in points
+        if accept is None or accept(point_id)
+    )
+    return [hit for hit in distances if max_km is None or hit[0] <= max_km][:k]
+
+
+def island_points(count, rng):
+    points = [(i, rng.uniform(5.9, 9.8), rng.uniform(79.6, 81.9)) for i in range(1, count + 1)]
+    # a few offices abroad, e.g. embassies
+    return points + [(count + 1, 51.5, -0.13), (count + 2, -33.87, 151.21), (count + 3, 25.2, 55.27)]
+
+
+def test_haversine_known_distance():
+    # Colombo to Kandy, about 94 km in a straight line
+    assert haversine_km(6.9271, 79.8612, 7.2906, 80.6337) == pytest.approx(94.0, abs=1.0)
+    assert haversine_km(7.0, 80.0, 7.0, 80.0) == 0.0
+
+
+@pytest.mark.parametrize("count", [1, 5, 300, 3000])
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_nearest_matches_brute_force(count, k):
+    rng = random.Random(count * 31 + k)
+    points = island_points(count, rng)
+    grid = GeoGrid(points)
+    queries = [(rng.uniform(5.9, 9.8), rng.uniform(79.6, 81.9)) for _ in range(50)]
+    # far from every office
+    queries += [(60.0, 10.0), (-45.0, -70.0), (0.0, 120.0)]
+    for latitude, longitude in queries:
+        assert grid.nearest(latitude, longitude, k) == brute_force(points, latitude, longitude, k)
+
+
+def test_nearest_with_accept_and_max_km_matches_brute_force():
+    rng = random.Random(7)
+    points = island_points(2000, rng)
+    grid = GeoGrid(points)
+    accept = lambda point_id: point_id % 5 == 0
+    for _ in range(100):
+        latitude, longitude = rng.uniform(5.9, 9.8), rng.uniform(79.6, 81.9)
+        max_km = rng.choice([None, 5.0, 25.0, 100.0])
+        k = rng.choice([1, 5, 20])
+        assert grid.nearest(latitude, longitude, k, accept=accept, max_km=max_km) == \
+            brute_force(points, latitude, longitude, k, accept, max_km)
+
+
+def test_nearest_with_a_fixed_cell_size_matches_brute_force():
+    # the grid does not wrap at the antimeridian, so keep points and queries off it
+    rng = random.Random(11)
+    points = [(i, rng.uniform(-60, 60), rng.uniform(-20, 150)) for i in range(1, 500)]
+    for cell_degrees in (0.5, 5.0, 30.0):
+        grid = GeoGrid(points, cell_degrees)
+        for _ in range(100):
+            latitude, longitude = rng.uniform(-70, 70), rng.uniform(-40, 170)
+            assert grid.nearest(latitude, longitude, 4) == brute_force(points, latitude, longitude, 4)
+
+
+def test_empty_grid_and_no_accepted_points():
+    assert GeoGrid([]).nearest(7.0, 80.0, 3) == []
+    grid = GeoGrid([(1, 7.0, 80.0), (2, 8.0, 81.0)])
+    assert grid.nearest(7.0, 80.0, 3, accept=lambda point_id: False) == []
+    assert grid.nearest(7.0, 80.0, 3, max_km=1.0) == [(0.0, 1)]
@@ -0,0 +1,45 @@
+import pytest
+from fastapi import HTTPException
+from app.utils.pagination import PageParams, decode_cursor, encode_cursor, paginate_ids
+
+
+@pytest.mark.parametrize("values", [(1,), (42, "2030-01-07"), ("කාර්යාලය", 3), (2 ** 40, None)])
+def test_cursor_round_trips(values):
+    cursor = encode_cursor(values)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "e30", encode_cursor(()), "%%%", "bnVsbA"])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_paginate_ids_walks_every_id_once():
+    ids = list(range(3, 300, 7))
+    seen, after = [], None
+    while True:
+        chunk, cursor = paginate_ids(ids, PageParams(after=after, limit=10))
+        seen.extend(chunk)
+        if cursor is None:
+            break
+        after = decode_cursor(cursor)
+    assert seen == ids
+
+
+def test_paginate_ids_resumes_after_a_removed_id():
+    chunk, _ = paginate_ids([1, 2, 4, 5], PageParams(after=(3,), limit=10))
+    assert list(chunk) == [4, 5]
+
+
+def test_paginate_ids_has_no_cursor_on_an_exact_last_page():
+    assert paginate_ids([1, 2], PageParams(limit=2)) == ([1, 2], None)
+
+
+def test_paginate_ids_rejects_foreign_cursors():
+    with pytest.raises(HTTPException):
+        paginate_ids([1, 2], PageParams(after=("a",), limit=1))
+    with pytest.raises(HTTPException):
+        paginate_ids([1, 2], PageParams(after=(1, 2), limit=1))
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+import pytest
+from app.db.rating_aggregates import COUNTERS, rating_change, summarize
+
+
+@pytest.mark.parametrize("old, new, expected", [
+    (None, 4, {"rating_sum": 4, "rating_count": 1, "stars_4": 1}),
+    (4, 2, {"rating_sum": -2, "stars_4": -1, "stars_2": 1}),
+    (5, 5, {}),
+    (3, None, {"rating_sum": -3, "rating_count": -1, "stars_3": -1}),
+    (None, None, {}),
+])
+def test_rating_change(old, new, expected):
+    delta = rating_change(old, new)
+    assert set(delta) == set(COUNTERS)
+    assert {name: value for name, value in delta.items() if value} == expected
+
+
+def test_rating_changes_sum_to_the_summary():
+    totals = dict.fromkeys(COUNTERS, 0)
+    for old, new in ((None, 5), (None, 3), (3, 4), (None, 1), (1, None)):
+        for name, value in rating_change(old, new).items():
+            totals[name] += value
+    summary = summarize(SimpleNamespace(**totals))
+    assert summary == {"average": 4.5, "count": 2, "histogram": {1: 0, 2: 0, 3: 0, 4: 1, 5: 1}}
+
+
+def test_summarize_without_ratings():
+    assert summarize(None) == {"average": None, "count": 0, "histogram": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}}
@@ -0,0 +1,82 @@
+from datetime import date, time
+from types import SimpleNamespace
+import pytest
+from app.db.rollups import attendance_change, reservation_change, slot_totals
+
+DAY = date(2030, 1, 7)
+
+
+def make_slot(attendance=(), **fields):
+    values = dict(reservation_id=3, booking_date=DAY, start_time=time(9, 30), max_capacity=5, reserved_count=len(attendance))
+    values.update(fields)
+    return SimpleNamespace(**values, reserved_users=[SimpleNamespace(attendance=state) for state in attendance])
+
+
+def apply(totals, *deltas):
+    for delta in deltas:
+        for name, value in delta.items():
+            if name != "key":
+                totals[name] = totals.get(name, 0) + value
+    return {name: value for name, value in totals.items() if value}
+
+
+def test_slot_totals_count_the_slot():
+    slot = make_slot(reserved_count=4)
+    assert slot_totals(slot) == {"key": (3, DAY, 9), "slots": 1, "capacity": 5, "reserved": 4}
+
+
+def test_slot_totals_with_sign_minus_one_undo_the_slot():
+    slot = make_slot(reserved_count=2)
+    assert apply({}, slot_totals(slot), slot_totals(slot, -1)) == {}
+
+
+def test_slot_totals_of_a_slot_without_start_time_or_counts():
+    slot = make_slot(start_time=None, max_capacity=None, reserved_count=None)
+    assert slot_totals(slot) == {"key": (3, DAY, 0), "slots": 1, "capacity": 0, "reserved": 0}
+
+
+def test_slot_update_moves_counts_between_hours():
+    slot = make_slot(reserved_count=1)
+    before = slot_totals(slot, -1)
+    slot.start_time = time(14, 0)
+    after = slot_totals(slot)
+    assert before["key"] == (3, DAY, 9) and after["key"] == (3, DAY, 14)
+    assert apply({}, before) == {"slots": -1, "capacity": -5, "reserved": -1}
+
+
+def test_reservation_change_books_and_cancels():
+    slot = make_slot()
+    assert reservation_change(slot, True) == {"key": (3, DAY, 9), "reserved": 1, "bookings": 1}
+    assert reservation_change(slot, False) == {"key": (3, DAY, 9), "reserved": -1, "cancellations": 1}
+
+
+def test_slot_totals_count_the_attendance_of_its_reservations():
+    slot = make_slot(("booked", "checked_in", "checked_in", "no_show"))
+    assert slot_totals(slot) == {
+        "key": (3, DAY, 9), "slots": 1, "capacity": 5, "reserved": 4, "checked_in": 2, "no_shows": 1,
+    }
+    assert apply({}, slot_totals(slot), slot_totals(slot, -1)) == {}
+
+
+@pytest.mark.parametrize("old, new, expected", [
+    ("booked", "checked_in", {"checked_in": 1}),
+    ("booked", "no_show", {"no_shows": 1}),
+    ("checked_in", "no_show", {"checked_in": -1, "no_shows": 1}),
+    ("no_show", "booked", {"no_shows": -1}),
+    ("checked_in", "checked_in", {}),
+    (None, "booked", {}),
+    ("checked_in", None, {"checked_in": -1}),
+])
+def test_attendance_change(old, new, expected):
+    delta = attendance_change(make_slot(), old, new)
+    assert delta.pop("key") == (3, DAY, 9)
+    assert {name: value for name, value in delta.items() if value} == expected
+
+
+def test_attendance_changes_agree_with_slot_totals():
+    slot = make_slot(("booked", "booked", "booked"))
+    totals = apply({}, slot_totals(slot))
+    for user, new in zip(slot.reserved_users, ("checked_in", "no_show", "checked_in")):
+        totals = apply(totals, attendance_change(slot, user.attendance, new))
+        user.attendance = new
+    assert totals == apply({}, slot_totals(slot))
@@ -0,0 +1,240 @@
+import asyncio
+import time
+import pytest
+from app.core import state
+from app.core.state import MemoryStateBackend, RateLimiter, RedisStateBackend
+
+
+class CountingBackend(MemoryStateBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def acquire_tokens(self, key, limit, window, requested):
+        self.calls += 1
+        return await super().acquire_tokens(key, limit, window, requested)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    pytest.importorskip("redis")
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(state.redis_asyncio, "from_url", lambda url, **options: fakeredis.FakeAsyncRedis(server=server))
+    return server
+
+
+def test_memory_acquire_tokens_grants_up_to_the_limit():
+    backend = MemoryStateBackend()
+
+    async def scenario():
+        return [await backend.acquire_tokens("k", 10, 60, 4) for _ in range(4)]
+
+    assert [granted for granted, _ in run(scenario())] == [4, 4, 2, 0]
+
+
+def test_memory_acquire_tokens_resets_with_the_window():
+    backend = MemoryStateBackend()
+
+    async def scenario():
+        first = await backend.acquire_tokens("k", 2, 0.05, 2)
+        rejected = await backend.acquire_tokens("k", 2, 0.05, 1)
+        await asyncio.sleep(0.06)
+        return first[0], rejected[0], (await backend.acquire_tokens("k", 2, 0.05, 1))[0]
+
+    assert run(scenario()) == (2, 0, 1)
+
+
+def test_rate_limiter_leases_and_answers_rejections_locally():
+    backend = CountingBackend()
+    limiter = RateLimiter(backend, limit=10, window=60, lease_size=5)
+
+    async def scenario():
+        return [await limiter.allow("client") for _ in range(1000)]
+
+    results = run(scenario())
+    assert results.count(True) == 10
+    assert results[:10] == [True] * 10
+    # two leases of 5 and the one rejection; the other 989 rejections stay local
+    assert backend.calls == 3
+
+
+def test_rate_limiter_allows_again_after_the_window():
+    backend = CountingBackend()
+    limiter = RateLimiter(backend, limit=2, window=0.05, lease_size=2)
+
+    async def scenario():
+        first = [await limiter.allow("client") for _ in range(3)]
+        await asyncio.sleep(0.06)
+        return first, await limiter.allow("client")
+
+    assert run(scenario()) == ([True, True, False], True)
+
+
+def test_rate_limiters_sharing_a_backend_never_exceed_the_limit():
+    backend = MemoryStateBackend()
+    limiters = [RateLimiter(backend, limit=25, window=60, lease_size=4) for _ in range(3)]
+
+    async def scenario():
+        return [await limiters[i % 3].allow("client") for i in range(300)]
+
+    assert run(scenario()).count(True) <= 25
+
+
+def test_rate_limiter_keys_are_independent():
+    limiter = RateLimiter(MemoryStateBackend(), limit=1, window=60)
+
+    async def scenario():
+        return [await limiter.allow(key) for key in ("a", "a", "b")]
+
+    assert run(scenario()) == [True, False, True]
+
+
+def test_rate_limiter_refills_a_lease_once_for_concurrent_requests():
+    backend = CountingBackend()
+    limiter = RateLimiter(backend, limit=100, window=60, lease_size=10)
+
+    async def scenario():
+        return await asyncio.gather(*(limiter.allow("client") for _ in range(10)))
+
+    assert run(scenario()) == [True] * 10
+    assert backend.calls == 1
+
+
+def test_rate_limiter_prune_drops_expired_leases():
+    limiter = RateLimiter(MemoryStateBackend(), limit=1, window=0.01)
+
+    async def scenario():
+        await limiter.allow("a")
+        await limiter.allow("a")
+        await asyncio.sleep(0.02)
+
+    run(scenario())
+    limiter.prune()
+    assert limiter._leases == {}
+
+
+def test_memory_cache_keeps_the_newest_version():
+    backend = MemoryStateBackend()
+
+    async def scenario():
+        assert await backend.cache_set("k", b"v2", 60, version=2)
+        assert not await backend.cache_set("k", b"v1", 60, version=1)
+        return await backend.cache_get("k")
+
+    assert run(scenario()) == (2, b"v2")
+
+
+def test_memory_cache_entries_expire():
+    backend = MemoryStateBackend()
+
+    async def scenario():
+        await backend.cache_set("k", b"v", 0.01)
+        await asyncio.sleep(0.02)
+        return await backend.cache_get("k")
+
+    assert run(scenario()) is None
+
+
+def test_redis_rate_limiter_matches_the_memory_backend(fake_redis):
+    backend = RedisStateBackend("redis://test")
+    limiter = RateLimiter(backend, limit=10, window=60, lease_size=5)
+
+    async def scenario():
+        return [await limiter.allow("client") for _ in range(50)]
+
+    assert run(scenario()).count(True) == 10
+    assert backend._failing_since is None
+
+
+def test_redis_cache_keeps_the_newest_version(fake_redis):
+    backend = RedisStateBackend("redis://test")
+
+    async def scenario():
+        assert await backend.cache_set("k", b"v2", 60, version=2)
+        assert not await backend.cache_set("k", b"v1", 60, version=1)
+        assert await backend.incr("counter") == 1
+        return await backend.cache_get("k"), await backend.get_counter("counter")
+
+    assert run(scenario()) == ((2, b"v2"), 1)
+
+
+def test_redis_failures_fall_back_and_warn_once_per_outage(fake_redis, monkeypatch):
+    backend = RedisStateBackend("redis://test")
+    warnings = []
+    monkeypatch.setattr(state.logger, "warning", warnings.append)
+
+    async def broken(*args, **kwargs):
+        raise state.RedisError("connection timed out")
+
+    monkeypatch.setattr(backend.client, "hmget", broken)
+
+    async def scenario():
+        assert await backend.cache_set("k", b"v", 60)
+        for _ in range(5):
+            assert await backend.cache_get("k") is None
+        return len(warnings)
+
+    assert run(scenario()) == 1
+
+    monkeypatch.setattr(backend, "_failing_since", time.monotonic() - state.REDIS_WARN_INTERVAL)
+    run(backend.cache_get("k"))
+    assert len(warnings) == 2
+
+
+def test_redis_client_is_created_with_timeouts(monkeypatch):
+    pytest.importorskip("redis")
+    fakeredis = pytest.importorskip("fakeredis")
+    options = {}
+
+    def from_url(url, **kwargs):
+        options.update(kwargs)
+        return fakeredis.FakeAsyncRedis()
+
+    monkeypatch.setattr(state.redis_asyncio, "from_url", from_url)
+    RedisStateBackend("redis://test")
+    assert options["socket_timeout"] == state.REDIS_TIMEOUT
+    assert options["socket_connect_timeout"] == state.REDIS_TIMEOUT
+
+
+def test_redis_fallback_gets_a_new_local_id_per_outage(fake_redis, monkeypatch):
+    backend = RedisStateBackend("redis://test")
+    get = backend.client.get
+
+    async def broken(*args, **kwargs):
+        raise state.RedisError("connection timed out")
+
+    async def outage():
+        monkeypatch.setattr(backend.client, "get", broken)
+        await backend.get_counter("counter")
+        local_id = backend.local_id
+        monkeypatch.setattr(backend.client, "get", get)
+        await backend.get_counter("counter")
+        return local_id
+
+    first, second = run(outage()), run(outage())
+    assert first is not None and second is not None and first != second
+    assert backend.local_id is None
+
+
+def test_redis_replays_increments_missed_during_an_outage(fake_redis, monkeypatch):
+    backend = RedisStateBackend("redis://test")
+    incrby = backend.client.incrby
+
+    async def broken(*args, **kwargs):
+        raise state.RedisError("connection timed out")
+
+    async def scenario():
+        assert await backend.incr("counter") == 1
+        monkeypatch.setattr(backend.client, "incrby", broken)
+        await backend.incr("counter")
+        await backend.incr("counter")
+        monkeypatch.setattr(backend.client, "incrby", incrby)
+        return await backend.get_counter("counter"), await backend.incr("counter")
+
+    assert run(scenario()) == (3, 4)
+    assert backend._missed_increments == {}
@@ -0,0 +1,78 @@
+from datetime import date, datetime
+import numpy as np
+import pytest
+from app.utils.timeseries import (
+    BUCKETS, bucket_count, bucket_starts, fill_gaps, nullable, rolling_mean, rolling_ratio, rolling_sum,
+)
+
+
+def naive_rolling(values, window, reduce):
+    return np.array([reduce(values[max(0, i - window + 1):i + 1]) for i in range(len(values))])
+
+
+@pytest.mark.parametrize("bucket", BUCKETS)
+@pytest.mark.parametrize("start, end", [
+    (date(2025, 1, 1), date(2025, 1, 1)),
+    (date(2024, 2, 26), date(2024, 3, 4)),
+    (date(2024, 12, 30), date(2025, 2, 2)),
+    (date(2023, 6, 15), date(2025, 6, 14)),
+])
+def test_bucket_count_matches_bucket_starts(bucket, start, end):
+    starts = bucket_starts(bucket, start, end)
+    assert bucket_count(bucket, start, end) == len(starts)
+    assert np.all(np.diff(starts) > np.timedelta64(0))
+
+
+def test_bucket_starts_follow_postgres_date_trunc():
+    weeks = bucket_starts("week", date(2025, 1, 1), date(2025, 1, 14))
+    assert [str(week) for week in weeks] == ["2024-12-30", "2025-01-06", "2025-01-13"]
+    months = bucket_starts("month", date(2025, 1, 31), date(2025, 3, 1))
+    assert [str(month) for month in months] == ["2025-01", "2025-02", "2025-03"]
+    hours = bucket_starts("hour", date(2025, 1, 1), date(2025, 1, 1))
+    assert len(hours) == 24 and str(hours[-1]) == "2025-01-01T23"
+
+
+def test_fill_gaps_spreads_columns_over_every_bucket():
+    starts = bucket_starts("day", date(2025, 1, 1), date(2025, 1, 5))
+    bookings, ratings = fill_gaps(starts, [datetime(2025, 1, 2), datetime(2025, 1, 5)], [3, 7], [4.5, 2.0])
+    assert bookings.tolist() == [0, 3, 0, 0, 7]
+    assert ratings.tolist() == [0, 4.5, 0, 0, 2.0]
+
+
+def test_fill_gaps_with_nan_fill_and_no_rows():
+    starts = bucket_starts("day", date(2025, 1, 1), date(2025, 1, 3))
+    (filled,) = fill_gaps(starts, [datetime(2025, 1, 3)], [1.0], fill=np.nan)
+    assert np.isnan(filled[:2]).all() and filled[2] == 1.0
+    (empty,) = fill_gaps(starts, [], [])
+    assert empty.tolist() == [0, 0, 0]
+
+
+@pytest.mark.parametrize("window", [1, 2, 7, 30])
+def test_rolling_sum_matches_a_loop(window):
+    values = np.random.default_rng(window).integers(0, 20, 50).astype(float)
+    assert np.allclose(rolling_sum(values, window), naive_rolling(values, window, np.sum))
+
+
+def test_rolling_ratio_weights_by_denominators_and_is_nan_without_them():
+    numerators = np.array([10.0, 0.0, 0.0, 12.0, 0.0])
+    denominators = np.array([2.0, 0.0, 0.0, 3.0, 0.0])
+    result = rolling_ratio(numerators, denominators, 2)
+    assert result[0] == 5.0 and result[1] == 5.0
+    assert np.isnan(result[2])
+    assert result[3] == 4.0 and result[4] == 4.0
+
+
+@pytest.mark.parametrize("window", [1, 3, 7])
+def test_rolling_mean_skips_nan(window):
+    values = np.random.default_rng(window).normal(3, 1, 40)
+    values[np.random.default_rng(window + 1).random(40) < 0.4] = np.nan
+
+    def mean(chunk):
+        chunk = chunk[~np.isnan(chunk)]
+        return chunk.mean() if len(chunk) else np.nan
+
+    assert np.allclose(rolling_mean(values, window), naive_rolling(values, window, mean), equal_nan=True)
+
+
+def test_nullable_turns_nan_into_none():
+    assert nullable(np.array([1.5, np.nan, 0.0])) == [1.5, None, 0.0]
@@ -0,0 +1,75 @@
+import random
+import pytest
+from app.core.catalog import CatalogSection
+from app.core.typeahead import KEY_LENGTH, MAX_SUGGESTIONS, PrefixIndex, Suggestion, build_indexes, normalize
+
+WORDS = [
+    "driving", "licence", "renewal", "registration", "register", "regional", "passport",
+    "birth", "certificate", "marriage", "land", "deed", "vehicle", "revenue", "pension",
+    "රියදුරු", "බලපත්‍ර", "අලුත්", "ஓட்டுநர்", "உரிமம்", "புதுப்பித்தல்",
+]
+
+
+def make_names(count, rng):
+    texts = {" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) for _ in range(count)}
+    return [Suggestion(text.title() if rng.random() < 0.5 else text, "service", "en", rng.randint(1, 50)) for text in texts]
+
+
+def keys(text, whole_names):
+    normalized = normalize(text)
+    starts = [i for i, character in enumerate(normalized) if not character.isspace() and (i == 0 or normalized[i - 1].isspace())]
+    return [normalized[start:start + KEY_LENGTH] for start in (starts[:1] if whole_names else starts[1:])]
+
+
+def brute_force(names, prefix, limit, whole_names):
+    """
+    Best `limit` of `names`, ranked like the index, with a key starting with `prefix`;
+    `names` are (name, keys) pairs in rank order.
+    """
+    matches = [
+        name for name, name_keys in names
+        if any(key.startswith(prefix[:KEY_LENGTH]) for key in name_keys)
+        and (len(prefix) <= KEY_LENGTH or prefix in normalize(name.text))
+    ]
+    return matches[:limit]
+
+
+@pytest.mark.parametrize("whole_names", [True, False])
+@pytest.mark.parametrize("count", [10, 400, 3000])
+def test_search_matches_brute_force(whole_names, count):
+    rng = random.Random(count)
+    names = make_names(count, rng)
+    index = PrefixIndex(names, whole_names=whole_names)
+    ranked = [(name, keys(name.text, whole_names)) for name in sorted(names, key=lambda name: (-name.count, len(name.text), name.text))]
+    prefixes = set()
+    for name in rng.sample(names, min(len(names), 60)):
+        normalized = normalize(name.text)
+        for length in (1, 2, 3, 4, 6, 10, KEY_LENGTH, KEY_LENGTH + 5):
+            prefixes.add(normalized[:length])
+        word_starts = [i + 1 for i, character in enumerate(normalized) if character == " "]
+        for start in word_starts:
+            prefixes.add(normalized[start:start + 4])
+    prefixes |= {"zzz", "re", "reg", "regi", "r"}
+    for prefix in prefixes:
+        for limit in (1, 5, MAX_SUGGESTIONS):
+            assert index.search(prefix, limit) == brute_force(ranked, prefix, limit, whole_names), (prefix, limit)
+
+
+def test_search_ignores_case_and_zero_width_joiners():
+    names = [Suggestion("Driving Licence", "service", "en", 1), Suggestion("බලපත්‍ර නිකුත් කිරීම", "service", "si", 1)]
+    index = PrefixIndex(names)
+    assert index.search(normalize("DRIV")) == [names[0]]
+    assert index.search(normalize("බලපත්ර")) == [names[1]]
+
+
+def test_empty_prefix_and_empty_index():
+    assert PrefixIndex([]).search("a") == []
+    assert PrefixIndex([Suggestion("a", "service", "en", 1)]).search("") == []
+
+
+def test_build_indexes_skips_inactive_rows():
+    fields = ("service_id", "service_name_en", "is_active")
+    rows = {1: (1, "Passport renewal", True), 2: (2, "Passport closed", False), 3: (3, "Passport renewal", True)}
+    section = CatalogSection(1, fields, rows, tuple(rows), {})
+    whole, _ = build_indexes(section, "service", "service_name", "en", active="is_active")
+    assert whole.search("pass") == [Suggestion("Passport renewal", "service", "en", 2)]
@@ -133,6 +133,32 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
     return Date.now() > parseInt(expiryTime);
   };
 
+  // Get the documents of the logged-in citizen
+  const getCitizenDocuments = async (nic: string, token?: string): Promise<DocumentLink[]> => {
+    const bearer = token || authToken || localStorage.getItem(TOKEN_STORAGE_KEY);
+    if (!bearer) return [];
+    try {
+      const baseUrl = getBaseUrl();
+      const response = await fetch(`${baseUrl}/api/v1/citizen/${nic}/documents`, {
+        method: 'GET',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${bearer}`,
+        },
+        credentials: 'include',
+      });
+
+      if (response.ok) {
+        return await response.json();
+      }
+      console.log(`Failed to get citizen documents: ${response.status} ${response.statusText}`);
+      return [];
+    } catch (error) {
+      console.error('Get citizen documents error:', error);
+      return [];
+    }
+  };
+
   // Get citizen by NIC - NEW METHOD
   const getCitizen = async (nic: string): Promise<User | null> => {
     try {
@@ -148,6 +174,8 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
 
       if (response.ok) {
         const userData: User = await response.json();
+        // Documents are not part of the profile, they are fetched separately
+        userData.document_links = await getCitizenDocuments(nic);
         return userData;
       } else if (response.status === 404) {
         console.log(`Citizen with NIC ${nic} not found`);
@@ -189,14 +217,12 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
       if (response.ok) {
         const loginData: LoginResponse = await response.json();
         
-        // Handle different response formats
-        if (loginData.user) {
-          // Response includes separate user object and token
-          storeUserData(loginData.user, loginData.access_token, loginData.expires_in);
-        } else {
-          // Response is the user object directly (your current format)
-          storeUserData(loginData as any, loginData.access_token, loginData.expires_in);
-        }
+        // Handle different response formats: a separate user object and token,
+        // or the user object directly (your current format)
+        const loginUser: User = loginData.user || (loginData as any);
+        // Documents are not part of the login response, they are fetched separately
+        loginUser.document_links = await getCitizenDocuments(nic, loginData.access_token);
+        storeUserData(loginUser, loginData.access_token, loginData.expires_in);
         
         return true;
       } else {